@@ -0,0 +1,60 @@
+import json
+import os
+
+from redis import asyncio as aioredis
+
+# Размер части списка подписчиков в одном сообщении и срок хранения данных поста
+CLAIM_CHECK_CHUNK_SIZE = int(os.getenv("CLAIM_CHECK_CHUNK_SIZE", default="500"))
+CLAIM_CHECK_TTL_SECONDS = int(os.getenv("CLAIM_CHECK_TTL_SECONDS", default=str(2 * 24 * 3600)))
+
+
+class ClaimExpiredError(Exception):
+    """Данные поста, на которые ссылается сообщение, уже удалены из Redis."""
+
+
+def post_key(post_id: str) -> str:
+    return f"claim:post:{post_id}"
+
+
+def subscribers_key(post_id: str, index: int) -> str:
+    return f"claim:post:{post_id}:subscribers:{index}"
+
+
+def split_subscribers(subscribers: list, chunk_size: int) -> list[list]:
+    """Делит подписчиков на части фиксированного размера; пустой список — одна пустая часть."""
+    return [
+        subscribers[start : start + chunk_size]
+        for start in range(0, len(subscribers), chunk_size)
+    ] or [[]]
+
+
+async def store_post(
+    redis: aioredis.Redis,
+    post_id: str,
+    post: dict,
+    subscribers: list,
+    chunk_size: int = CLAIM_CHECK_CHUNK_SIZE,
+    ttl: int = CLAIM_CHECK_TTL_SECONDS,
+) -> list[str]:
+    """
+    Сохраняет пост один раз, а подписчиков — частями, и возвращает ключи
+    частей. Повторное сохранение того же поста перезаписывает те же ключи.
+    """
+    chunks = split_subscribers(subscribers, chunk_size)
+    keys = [subscribers_key(post_id, index) for index in range(len(chunks))]
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(post_key(post_id), json.dumps(post), ex=ttl)
+        for key, chunk in zip(keys, chunks, strict=True):
+            pipe.set(key, json.dumps(chunk), ex=ttl)
+        await pipe.execute()
+    return keys
+
+
+async def load_post(redis: aioredis.Redis, message: dict) -> tuple[dict, list]:
+    """Возвращает пост и часть подписчиков, на которые ссылается сообщение."""
+    post, chunk = await redis.mget(
+        post_key(message["post_id"]), message["subscribers_key"]
+    )
+    if post is None or chunk is None:
+        raise ClaimExpiredError(message["post_id"])
+    return json.loads(post), json.loads(chunk)
@@ -0,0 +1,48 @@
+import os
+
+import aiohttp
+
+# Параметры пула соединений общего HTTP-клиента
+HTTP_CONNECTIONS_LIMIT = int(os.getenv("HTTP_CONNECTIONS_LIMIT", default="100"))
+HTTP_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_CONNECTIONS_PER_HOST", default="8"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", default="300"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", default="10"))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", default="30"))
+
+_session: aiohttp.ClientSession | None = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Возвращает общий для процесса ``aiohttp.ClientSession``.
+
+    Сессия создаётся лениво внутри работающего цикла событий и переиспользует
+    keep-alive соединения, DNS-кэш и TLS-сессии между запросами.
+    """
+    global _session  # noqa: PLW0603
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_CONNECTIONS_LIMIT,
+            limit_per_host=HTTP_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                total=HTTP_TOTAL_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT
+            ),
+        )
+    return _session
+
+
+def request_timeout(total: float) -> aiohttp.ClientTimeout:
+    """Таймаут отдельного запроса с общим ограничением на подключение."""
+    return aiohttp.ClientTimeout(total=total, connect=HTTP_CONNECT_TIMEOUT)
+
+
+async def close_http_session():
+    """Закрывает общую сессию при завершении процесса."""
+    global _session  # noqa: PLW0603
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
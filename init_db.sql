@@ -1,2 +1,3 @@
 CREATE DATABASE user_manager;
-CREATE DATABASE rss_manager;
\ No newline at end of file
+CREATE DATABASE rss_manager;
+CREATE DATABASE content_validator;
\ No newline at end of file
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from collections.abc import Callable
+
+import httpx
+import openai
+
+# Коды ответа провайдера, означающие перегрузку
+TOO_MANY_REQUESTS = 429
+SERVER_ERROR = 500
+# Сглаживание средней задержки и число запросов до начала поиска всплесков
+LATENCY_SMOOTHING = 0.1
+LATENCY_WARMUP_REQUESTS = 5
+# Одновременные ошибки одной волны запросов снижают предел только один раз
+DECREASE_COOLDOWN_SECONDS = 1.0
+# Таймауты и обрывы соединения: клиенты ChatTogether создаются без
+# собственных повторов, поэтому эти ошибки приходят сюда как есть
+TRANSIENT_ERRORS = (asyncio.TimeoutError, openai.APIConnectionError, httpx.TransportError)
+
+
+def is_overload(error: BaseException) -> bool:
+    """
+    Ошибка провайдера, при которой нужно снизить параллелизм и повторить
+    запрос: 429, 5xx, таймаут или обрыв соединения.
+    """
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and (status == TOO_MANY_REQUESTS or status >= SERVER_ERROR)
+
+
+class AIMDController:
+    """
+    Предел параллельных запросов по правилу AIMD.
+
+    После каждого успешного запроса предел растёт на ``increase / limit``,
+    то есть примерно на ``increase`` за «окно» из ``limit`` запросов; при
+    перегрузке (429, 5xx, таймаут или задержка больше ``spike_factor``
+    средней) он умножается на ``decrease_factor``. Предел остаётся в границах
+    ``[min_limit, max_limit]``. Снижения чаще раза в
+    ``DECREASE_COOLDOWN_SECONDS`` не применяются: запросы, начатые до
+    снижения, ещё отражают старую нагрузку.
+    """
+
+    def __init__(
+        self,
+        min_limit: int,
+        max_limit: int,
+        initial_limit: int,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        spike_factor: float = 3.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.spike_factor = spike_factor
+        self.clock = clock
+        self.decreased_at: float | None = None
+        self.current = float(min(max(initial_limit, min_limit), max_limit))
+        self.mean_latency: float | None = None
+        self.samples = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self.current)
+
+    def on_success(self, latency: float) -> bool:
+        """Учитывает успешный запрос; возвращает True, если задержка — всплеск."""
+        spike = (
+            self.mean_latency is not None
+            and self.samples >= LATENCY_WARMUP_REQUESTS
+            and latency > self.spike_factor * self.mean_latency
+        )
+        # Средняя учитывает и всплески, так что устойчивое замедление
+        # со временем становится новой нормой
+        self.samples += 1
+        self.mean_latency = (
+            latency
+            if self.mean_latency is None
+            else self.mean_latency + LATENCY_SMOOTHING * (latency - self.mean_latency)
+        )
+        if spike:
+            self.on_overload()
+        else:
+            self.current = min(self.max_limit, self.current + self.increase / self.current)
+        return spike
+
+    def on_overload(self):
+        now = self.clock()
+        if self.decreased_at is not None and now - self.decreased_at < DECREASE_COOLDOWN_SECONDS:
+            return
+        self.decreased_at = now
+        self.current = max(self.min_limit, self.current * self.decrease_factor)
+
+
+class AdaptiveLimiter:
+    """
+    Ограничитель одновременных запросов с пределом от ``AIMDController``.
+
+    Используется как ``async with limiter:``; при снижении предела новые
+    запросы ждут, пока число выполняющихся не опустится ниже него.
+    """
+
+    def __init__(self, controller: AIMDController):
+        self.controller = controller
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self.condition:
+            await self.condition.wait_for(
+                lambda: self.in_flight < self.controller.limit
+            )
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self.condition:
+            self.in_flight -= 1
+            # Предел мог вырасти, поэтому будим всех ожидающих
+            self.condition.notify_all()
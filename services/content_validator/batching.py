@@ -0,0 +1,61 @@
+import math
+
+# Грубая оценка: в среднем около четырёх символов на токен
+CHARS_PER_TOKEN = 4
+MIN_RANK = 0
+MAX_RANK = 100
+
+
+def estimate_tokens(text: str) -> int:
+    """Приблизительное число токенов текста."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def plan_batches(
+    base_tokens: int,
+    profile_tokens: list[int],
+    budget: int,
+    max_users: int,
+) -> list[list[int]]:
+    """
+    Делит профили на пачки для совместной оценки одного поста.
+
+    Заголовок и текст поста (``base_tokens``) входят в каждый запрос один раз,
+    поэтому пачка растёт, пока запрос укладывается в ``budget`` токенов и
+    содержит не больше ``max_users`` профилей. Возвращает индексы профилей;
+    профиль, не помещающийся в бюджет даже один, образует отдельную пачку.
+    """
+    batches: list[list[int]] = []
+    current: list[int] = []
+    used = base_tokens
+    for index, tokens in enumerate(profile_tokens):
+        if current and (len(current) >= max_users or used + tokens > budget):
+            batches.append(current)
+            current, used = [], base_tokens
+        current.append(index)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_batch_ranks(result: object, size: int) -> list[int] | None:
+    """
+    Извлекает рейтинги читателей 1..size из ответа модели. Возвращает None,
+    если ответ не содержит корректной оценки для каждого читателя.
+    """
+    if not isinstance(result, dict) or not isinstance(result.get("evaluations"), list):
+        return None
+    ranks: dict[int, int] = {}
+    for evaluation in result["evaluations"]:
+        if not isinstance(evaluation, dict):
+            return None
+        reader, rank = evaluation.get("reader"), evaluation.get("rank")
+        if not isinstance(reader, int) or not isinstance(rank, int | float):
+            return None
+        if not MIN_RANK <= rank <= MAX_RANK:
+            return None
+        ranks[reader] = int(rank)
+    if set(ranks) != set(range(1, size + 1)):
+        return None
+    return [ranks[reader] for reader in range(1, size + 1)]
@@ -3,6 +3,9 @@ import os
 
 from aio_pika import connect_robust
 from dotenv import load_dotenv
+from redis import asyncio as aioredis
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
@@ -10,6 +13,46 @@ load_dotenv()
 
 RELEVANCE_THRESHOLD = os.getenv("RELEVANCE_THRESHOLD", default=60)
 
+# Совместная оценка поста для нескольких пользователей одним запросом:
+# бюджет токенов запроса и наибольшее число профилей в нём (1 — оценка по одному)
+RANK_PROMPT_TOKEN_BUDGET = int(os.getenv("RANK_PROMPT_TOKEN_BUDGET", default=6000))
+RANK_BATCH_MAX_USERS = int(os.getenv("RANK_BATCH_MAX_USERS", default=16))
+# Токены ответа на одного пользователя в совместной оценке
+RANK_BATCH_OUTPUT_TOKENS_PER_USER = int(os.getenv("RANK_BATCH_OUTPUT_TOKENS_PER_USER", default=20))
+
+# Предварительный отсев по сходству векторов n-грамм (порог 0 отключает отсев).
+# Пары со сходством с предпочтениями ниже порога не передаются LLM,
+# кроме контрольной выборки доли PREFILTER_SHADOW_RATE для офлайн-оценки
+PREFILTER_DIMENSIONS = int(os.getenv("PREFILTER_DIMENSIONS", default=4096))
+PREFILTER_SIMILARITY_FLOOR = float(os.getenv("PREFILTER_SIMILARITY_FLOOR", default=0.05))
+PREFILTER_ANTIPATHY_CEILING = float(os.getenv("PREFILTER_ANTIPATHY_CEILING", default=0.6))
+PREFILTER_SHADOW_RATE = float(os.getenv("PREFILTER_SHADOW_RATE", default=0.05))
+PROFILE_VECTOR_CACHE_SIZE = int(os.getenv("PROFILE_VECTOR_CACHE_SIZE", default=10000))
+
+# Кэш профилей пользователей в памяти: размер и срок жизни записей.
+# Изменённые профили удаляются из кэша сразу по событию от user_manager
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", default=50000))
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", default=600))
+PROFILE_CHANGED_EXCHANGE = "user.profile.changed"
+
+# Обработка новых постов: число неподтверждённых сообщений на реплику
+RANK_PREFETCH_COUNT = int(os.getenv("RANK_PREFETCH_COUNT", default=8))
+# Параллельные запросы к LLM: предел подбирается по AIMD в заданных границах
+# и снижается при 429, 5xx, таймаутах и всплесках задержки
+RANK_MIN_CONCURRENCY = int(os.getenv("RANK_MIN_CONCURRENCY", default=1))
+RANK_MAX_CONCURRENCY = int(os.getenv("RANK_MAX_CONCURRENCY", default=32))
+RANK_INITIAL_CONCURRENCY = int(os.getenv("RANK_INITIAL_CONCURRENCY", default=4))
+RANK_LATENCY_SPIKE_FACTOR = float(os.getenv("RANK_LATENCY_SPIKE_FACTOR", default=3))
+# Жёсткий потолок частоты запросов к провайдеру и повторы при перегрузке
+RANK_MAX_REQUESTS_PER_SECOND = float(os.getenv("RANK_MAX_REQUESTS_PER_SECOND", default=20))
+RANK_MAX_RETRIES = int(os.getenv("RANK_MAX_RETRIES", default=3))
+RANK_RETRY_BACKOFF_SECONDS = float(os.getenv("RANK_RETRY_BACKOFF_SECONDS", default=1))
+
+# Срок хранения рейтингов в кэше Redis
+RANK_CACHE_TTL_SECONDS = int(os.getenv("RANK_CACHE_TTL_SECONDS", default=3 * 24 * 3600))
+# Срок хранения отметок о доставке, по которым отбрасываются повторы сообщений
+DELIVERY_LOG_TTL_SECONDS = int(os.getenv("DELIVERY_LOG_TTL_SECONDS", default=2 * 24 * 3600))
+
 # Конфигурация базы данных
 POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
@@ -20,19 +63,57 @@ if not all([POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT]):
     raise ValueError("Переменные окружения для базы данных установлены некорректно.")
 
 DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/user_manager"
+# Собственная база сервиса: журнал оценок для настройки предварительного отсева
+RANK_LOG_DATABASE = "content_validator"
+RANK_LOG_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{RANK_LOG_DATABASE}"
+# Служебная база, через которую создаются недостающие базы сервиса
+ADMIN_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/postgres"
 
 engine = create_async_engine(DATABASE_URL)
+rank_log_engine = create_async_engine(RANK_LOG_DATABASE_URL)
+# Таблицы базы content_validator; таблицами user_manager владеет его сервис
 Base = declarative_base()
 async_session_factory = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
+rank_log_session_factory = sessionmaker(
+    rank_log_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+async def ensure_database(name: str):
+    """
+    Создаёт базу данных, если её нет. init_db.sql выполняется только при
+    первом запуске PostgreSQL с пустым томом, поэтому на уже развёрнутом
+    сервере базы сервиса может не быть.
+    """
+    admin_engine = create_async_engine(ADMIN_DATABASE_URL, isolation_level="AUTOCOMMIT")
+    exists_query = text("SELECT 1 FROM pg_database WHERE datname = :name")
+    try:
+        async with admin_engine.connect() as conn:
+            if await conn.scalar(exists_query, {"name": name}):
+                return
+            try:
+                await conn.execute(text(f'CREATE DATABASE "{name}"'))
+            except DBAPIError:
+                # Базу могла одновременно создать другая реплика
+                if not await conn.scalar(exists_query, {"name": name}):
+                    raise
+    finally:
+        await admin_engine.dispose()
 
 
 async def init_db():
-    async with engine.begin() as conn:
+    await ensure_database(RANK_LOG_DATABASE)
+    async with rank_log_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 
+# Redis с данными постов, опубликованных по схеме claim-check
+REDIS_URL = os.getenv("REDIS_URL")
+redis = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+
+
 # Конфигурация RabbitMQ
 RABBITMQ_USER = os.getenv("RABBITMQ_DEFAULT_USER")
 RABBITMQ_PASS = os.getenv("RABBITMQ_DEFAULT_PASS")
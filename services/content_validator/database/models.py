@@ -4,8 +4,19 @@ Models for the user manager service.
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 
+from services.content_validator.config import Base as ValidatorBase
 from services.user_manager.config import Base
 
 
@@ -37,3 +48,29 @@ class User(Base):
             "antipathy": self.antipathy,
             "is_pro": self.is_pro,
         }
+
+
+class RankLog(ValidatorBase):
+    """
+    Решение предварительного отсева и рейтинг LLM для пары пост-пользователь.
+
+    Используется для офлайн-оценки порогов отсева. Отсеянные пары попадают
+    сюда только из контрольной выборки, которая всё равно оценивается LLM;
+    ``sample_weight`` — величина, обратная доле этой выборки.
+    """
+
+    __tablename__ = "rank_log"
+    rank_log_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    post_link = Column(String(255), nullable=False)
+    user_id = Column(Integer, nullable=False)
+    similarity = Column(Float, nullable=False)
+    antipathy_similarity = Column(Float, nullable=False)
+    prefilter_passed = Column(Boolean, nullable=False)
+    sample_weight = Column(Float, nullable=False, default=1.0)
+    rank = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (Index("ix_rank_log_created_at", "created_at"),)
+
+    def __repr__(self):
+        return f"<RankLog {self.user_id}:{self.rank}>"
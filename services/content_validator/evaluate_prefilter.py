@@ -0,0 +1,61 @@
+"""
+Офлайн-оценка порогов предварительного отсева по журналу оценок LLM.
+
+Запуск: ``python -m services.content_validator.evaluate_prefilter 0.02 0.05 0.1``
+(без аргументов оцениваются пороги по умолчанию). Учитываются записи
+rank_log за последние PREFILTER_EVALUATION_DAYS дней.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from services.content_validator.config import (
+    PREFILTER_SIMILARITY_FLOOR,
+    RELEVANCE_THRESHOLD,
+    init_db,
+    rank_log_session_factory,
+)
+from services.content_validator.database.models import RankLog
+from services.content_validator.prefilter import evaluate_floors
+
+DEFAULT_FLOORS = [0.0, 0.02, 0.05, 0.1, 0.15, 0.2]
+EVALUATION_DAYS = int(os.getenv("PREFILTER_EVALUATION_DAYS", default="30"))
+
+
+async def load_rank_log(days: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    async with rank_log_session_factory() as session:
+        rows = (
+            await session.execute(
+                select(RankLog.similarity, RankLog.rank, RankLog.sample_weight).where(
+                    RankLog.created_at >= datetime.now() - timedelta(days=days)
+                )
+            )
+        ).all()
+    if not rows:
+        return np.zeros(0), np.zeros(0), np.zeros(0)
+    similarities, ranks, weights = (np.array(column, dtype=float) for column in zip(*rows, strict=True))
+    return similarities, ranks, weights
+
+
+async def main(floors: list[float]):
+    await init_db()
+    similarities, ranks, weights = await load_rank_log(EVALUATION_DAYS)
+    print(f"Пар в журнале за {EVALUATION_DAYS} дн.: {len(ranks)}")
+    print(f"Текущий порог: {PREFILTER_SIMILARITY_FLOOR}, порог релевантности: {RELEVANCE_THRESHOLD}")
+    print("порог  отсеяно  полнота  потеряно релевантных")
+    for row in evaluate_floors(
+        similarities, ranks, floors, int(RELEVANCE_THRESHOLD), weights
+    ):
+        print(
+            f"{row['floor']:<6} {row['skipped_share']:>7.1%}  {row['recall']:>7.1%}  "
+            f"{row['lost_relevant']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main([float(floor) for floor in sys.argv[1:]] or DEFAULT_FLOORS))
@@ -1,9 +1,15 @@
 import asyncio
 
+from aio_pika import ExchangeType
 from prometheus_client import start_http_server
 
 from logger_setup import generate_correlation_id, setup_logger
-from services.content_validator.config import get_rabbit_connection, init_db
+from services.content_validator.config import (
+    PROFILE_CHANGED_EXCHANGE,
+    RANK_PREFETCH_COUNT,
+    get_rabbit_connection,
+    init_db,
+)
 from services.content_validator.metrics import content_validator_registry
 from services.content_validator.ranker import Ranker
 
@@ -19,13 +25,25 @@ async def main():
     # Установка соединения с RabbitMQ
     connection = await get_rabbit_connection()
     channel = await connection.channel()
+    # Сообщения подтверждаются после обработки, и реплика получает не больше
+    # RANK_PREFETCH_COUNT неподтверждённых сообщений
+    await channel.set_qos(prefetch_count=RANK_PREFETCH_COUNT)
+    # Релевантные посты отправляются через отдельный канал
+    publish_channel = await connection.channel()
 
     # Объявление очередей
     new_posts_queue = await channel.declare_queue("rss.new_posts", durable=True)
-
-    ranker = Ranker()
+    # Каждая реплика получает все события изменения профилей в свою очередь
+    profile_changed_exchange = await channel.declare_exchange(
+        PROFILE_CHANGED_EXCHANGE, ExchangeType.FANOUT, durable=True
+    )
+    profile_changed_queue = await channel.declare_queue(exclusive=True)
+    await profile_changed_queue.bind(profile_changed_exchange)
+
+    ranker = Ranker(publish_channel)
     # Подписка на очереди
-    await new_posts_queue.consume(ranker.handle_new_posts, no_ack=True)
+    await new_posts_queue.consume(ranker.handle_new_posts)
+    await profile_changed_queue.consume(ranker.handle_profile_changed)
 
     try:
         # Бесконечный цикл для поддержания работы приложения
@@ -28,3 +28,70 @@ ERROR_COUNTER = Counter(
     registry=content_validator_registry,
     labelnames=["error_type"],
 )
+
+RANK_BATCH_SIZE = Histogram(
+    "rank_batch_size",
+    "Количество пользователей, для которых пост оценён одним запросом",
+    registry=content_validator_registry,
+    buckets=[1, 2, 4, 8, 16, 32, 64],
+)
+
+RANK_BATCH_FALLBACKS = Counter(
+    "rank_batch_fallbacks",
+    "Количество пачек, оценённых заново по одному пользователю из-за некорректного ответа",
+    registry=content_validator_registry,
+)
+
+PREFILTER_PAIRS = Counter(
+    "prefilter_pairs",
+    "Количество пар пост-пользователь по решению предварительного отсева",
+    registry=content_validator_registry,
+    labelnames=["decision"],
+)
+
+PREFILTER_SIMILARITY = Histogram(
+    "prefilter_similarity",
+    "Сходство поста с предпочтениями пользователей",
+    registry=content_validator_registry,
+    buckets=[0.01, 0.02, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1],
+)
+
+RANK_CACHE_LOOKUPS = Counter(
+    "rank_cache_lookups",
+    "Количество обращений к кэшу рейтингов",
+    registry=content_validator_registry,
+    labelnames=["result"],
+)
+
+PROFILE_GROUP_SHARE = Histogram(
+    "profile_group_share",
+    "Доля различных профилей среди подписчиков, получивших пост",
+    registry=content_validator_registry,
+    buckets=[0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9, 1],
+)
+
+PROFILE_CACHE_LOOKUPS = Counter(
+    "profile_cache_lookups",
+    "Количество обращений к кэшу профилей пользователей",
+    registry=content_validator_registry,
+    labelnames=["result"],
+)
+
+DUPLICATE_DELIVERIES = Counter(
+    "duplicate_deliveries",
+    "Количество повторных сообщений о посте, не отправленных пользователю снова",
+    registry=content_validator_registry,
+)
+
+RANK_CONCURRENCY_LIMIT = Gauge(
+    "rank_concurrency_limit",
+    "Текущий предел параллельных запросов к LLM",
+    registry=content_validator_registry,
+)
+
+RANK_LLM_OVERLOADS = Counter(
+    "rank_llm_overloads",
+    "Количество ответов LLM, означающих перегрузку провайдера",
+    registry=content_validator_registry,
+    labelnames=["reason"],
+)
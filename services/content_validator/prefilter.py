@@ -0,0 +1,103 @@
+import re
+import zlib
+
+import numpy as np
+
+# Символьные n-граммы слов: устойчивы к словоформам и не требуют словаря
+NGRAM_SIZES = (3, 4, 5)
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def char_ngrams(text: str) -> list[str]:
+    """N-граммы символов слов текста; границы слова отмечаются пробелами."""
+    ngrams = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            ngrams.extend(
+                padded[start : start + size] for start in range(len(padded) - size + 1)
+            )
+    return ngrams
+
+
+def hash_vector(text: str, dimensions: int) -> np.ndarray:
+    """
+    Вектор текста длины ``dimensions``: хэшированные n-граммы символов с
+    логарифмическим весом частоты, нормированный по длине. Пустой текст даёт
+    нулевой вектор.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    ngrams = char_ngrams(text)
+    if not ngrams:
+        return vector
+    # crc32 не зависит от PYTHONHASHSEED, поэтому векторы совпадают между процессами
+    indexes = np.fromiter(
+        (zlib.crc32(ngram.encode()) % dimensions for ngram in ngrams),
+        dtype=np.int64,
+        count=len(ngrams),
+    )
+    np.add.at(vector, indexes, 1)
+    nonzero = vector > 0
+    vector[nonzero] = 1 + np.log(vector[nonzero])
+    return vector / np.linalg.norm(vector)
+
+
+def prefilter(
+    post_vector: np.ndarray,
+    preference_vectors: np.ndarray,
+    antipathy_vectors: np.ndarray,
+    similarity_floor: float,
+    antipathy_ceiling: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Оценивает пост для всех подписчиков одним умножением матрицы на вектор.
+
+    Возвращает маску пар, которые нужно передать LLM, и сходство поста с
+    предпочтениями и антипатиями. Пара отсеивается, если сходство с
+    предпочтениями ниже ``similarity_floor`` или сходство с антипатиями не
+    ниже ``antipathy_ceiling``. Пользователям без предпочтений сходство
+    считается полным: по пустому профилю нельзя судить о нерелевантности.
+    """
+    similarities = np.where(
+        preference_vectors.any(axis=1), preference_vectors @ post_vector, 1.0
+    )
+    antipathy_similarities = antipathy_vectors @ post_vector
+    passed = (similarities >= similarity_floor) & (
+        antipathy_similarities < antipathy_ceiling
+    )
+    return passed, similarities, antipathy_similarities
+
+
+def evaluate_floors(
+    similarities: np.ndarray,
+    ranks: np.ndarray,
+    floors: list[float],
+    relevance_threshold: int,
+    weights: np.ndarray | None = None,
+) -> list[dict]:
+    """
+    Сравнивает решения отсева с рейтингами LLM для нескольких порогов.
+
+    Для каждого порога возвращает долю отсеянных пар, долю релевантных по
+    LLM пар, которые прошли бы отсев (полнота), и оценку числа потерянных
+    релевантных пар. ``weights`` учитывают, что отсеянные пары оцениваются
+    LLM лишь выборочно.
+    """
+    if weights is None:
+        weights = np.ones(len(ranks))
+    relevant = ranks > relevance_threshold
+    total, relevant_total = weights.sum(), weights[relevant].sum()
+    report = []
+    for floor in floors:
+        passed = similarities >= floor
+        lost = weights[relevant & ~passed].sum()
+        report.append(
+            {
+                "floor": floor,
+                "pairs": len(ranks),
+                "skipped_share": float(weights[~passed].sum() / total) if total else 0.0,
+                "recall": float(1 - lost / relevant_total) if relevant_total else 1.0,
+                "lost_relevant": float(lost),
+            }
+        )
+    return report
@@ -0,0 +1,62 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+Profile = tuple[str | None, str | None]
+
+
+class ProfileCache:
+    """
+    LRU-кэш профилей пользователей (интересы и антипатии) со сроком жизни.
+
+    Записи вытесняются по давности использования и устаревают через ``ttl``
+    секунд; событие изменения профиля удаляет запись сразу. Счётчик
+    ``generation`` растёт при каждом удалении, чтобы результат загрузки,
+    начатой до изменения профиля, не вернул в кэш старые данные.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.entries: OrderedDict[int, tuple[float, Profile]] = OrderedDict()
+        self.generation = 0
+
+    def get_many(self, user_ids: list[int]) -> dict[int, Profile]:
+        """Профили из кэша; отсутствующие и устаревшие пропускаются."""
+        now = self.clock()
+        found = {}
+        for user_id in user_ids:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                continue
+            expires_at, profile = entry
+            if expires_at <= now:
+                del self.entries[user_id]
+                continue
+            self.entries.move_to_end(user_id)
+            found[user_id] = profile
+        return found
+
+    def put_many(self, profiles: dict[int, Profile], generation: int):
+        """
+        Сохраняет загруженные профили, если с начала загрузки (``generation``)
+        ни один профиль не изменился.
+        """
+        if generation != self.generation:
+            return
+        expires_at = self.clock() + self.ttl
+        for user_id, profile in profiles.items():
+            self.entries[user_id] = (expires_at, profile)
+            self.entries.move_to_end(user_id)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self.generation += 1
+        self.entries.pop(user_id, None)
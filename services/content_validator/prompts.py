@@ -20,3 +20,26 @@ You are a recommendation system designed to evaluate news for compliance with th
 You perfectly understand the meaning of news and texts, are able to understand the reader's requests and evaluate the content impartially. 
 You always respond in the correct JSON format and return the percentage of compliance of the news with the interests of the reader.
 """
+
+BATCH_RANK_POSTS_PROMPT = """
+You are evaluating the news under the heading «{title}» for several readers at once. Each reader has provided their preferences and a list of subjects they are not interested in or dislike. Rate the text separately for every reader, taking into account only that reader's preferences and aversions. In no case should you give a high rating to a reader for posts related to their aversions.
+
+The readers are:
+{profiles}
+
+The rating should be a number between 0 and 100, with 0 indicating complete disinterest and 100 representing a perfect match. Return exactly one evaluation for every reader number listed above.
+
+Please respond in the format specified: {format_instructions}.
+
+The text you need to evaluate is:
+```
+{content}
+```
+
+Avoid giving high marks to content that does not align with a reader's preferences and needs. If you suspect the post is advertising or spam, assign lower ratings to everyone.
+"""
+
+READER_PROFILE = """Reader {number}. Preferences: «{preferences}». Negative subjects: «{antipathy}»."""
+
+# Версия промптов оценки: входит в ключ кэша рейтингов, повышается при их изменении
+PROMPT_VERSION = "1"
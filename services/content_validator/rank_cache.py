@@ -0,0 +1,99 @@
+import hashlib
+
+from redis import asyncio as aioredis
+
+FINGERPRINT_LENGTH = 32
+
+
+def normalize_text(text: str | None) -> str:
+    """Текст без различий в регистре и пробелах; пустое значение — пустая строка."""
+    return " ".join((text or "").lower().split())
+
+
+def profile_fingerprint(preferences: str | None, antipathy: str | None) -> str:
+    """Отпечаток профиля: одинаков у пользователей с совпадающими интересами."""
+    profile = f"{normalize_text(preferences)}\x1f{normalize_text(antipathy)}"
+    return hashlib.sha256(profile.encode()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def content_hash(title: str, content: str) -> str:
+    """Хэш поста, совпадающий у одной статьи из разных лент."""
+    post = f"{normalize_text(title)}\x1f{normalize_text(content)}"
+    return hashlib.sha256(post.encode()).hexdigest()
+
+
+def group_by_fingerprint(profiles: list[tuple[str, str]]) -> dict[str, list[int]]:
+    """Индексы профилей, сгруппированные по отпечатку, в порядке появления."""
+    groups: dict[str, list[int]] = {}
+    for index, (preferences, antipathy) in enumerate(profiles):
+        groups.setdefault(profile_fingerprint(preferences, antipathy), []).append(index)
+    return groups
+
+
+class RankCache:
+    """
+    Кэш рейтингов постов в Redis.
+
+    Ключ включает хэш поста, отпечаток профиля, модель и версию промпта,
+    поэтому смена модели или промпта не возвращает устаревших оценок.
+    Без Redis кэш пуст.
+    """
+
+    def __init__(
+        self, redis: aioredis.Redis | None, model: str, prompt_version: str, ttl: int
+    ):
+        self.redis = redis
+        self.prefix = f"rank:{model}:{prompt_version}"
+        self.ttl = ttl
+
+    def key(self, post_hash: str, fingerprint: str) -> str:
+        return f"{self.prefix}:{post_hash}:{fingerprint}"
+
+    async def get_many(self, post_hash: str, fingerprints: list[str]) -> list[int | None]:
+        if self.redis is None or not fingerprints:
+            return [None] * len(fingerprints)
+        values = await self.redis.mget(
+            [self.key(post_hash, fingerprint) for fingerprint in fingerprints]
+        )
+        return [None if value is None else int(value) for value in values]
+
+    async def set_many(self, post_hash: str, ranks: dict[str, int]):
+        if self.redis is None or not ranks:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for fingerprint, rank in ranks.items():
+                pipe.set(self.key(post_hash, fingerprint), rank, ex=self.ttl)
+            await pipe.execute()
+
+
+class DeliveryLog:
+    """
+    Отметки о доставке постов в Redis.
+
+    Ретранслятор исходящих сообщений rss_manager может опубликовать сообщение
+    повторно с тем же message_id; отметка на пару (message_id, пользователь)
+    не даёт отправить пользователю тот же пост дважды. Без Redis или без
+    message_id повторы не отбрасываются.
+    """
+
+    def __init__(self, redis: aioredis.Redis | None, ttl: int, prefix: str = "delivered:"):
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def key(self, message_id: str, user_id: int) -> str:
+        return f"{self.prefix}{message_id}:{user_id}"
+
+    async def claim(self, message_id: str | None, user_id: int) -> bool:
+        """Отмечает доставку; False, если пост этому пользователю уже отправлен."""
+        if self.redis is None or message_id is None:
+            return True
+        return bool(
+            await self.redis.set(self.key(message_id, user_id), 1, nx=True, ex=self.ttl)
+        )
+
+    async def release(self, message_id: str | None, user_id: int):
+        """Снимает отметку, если отправить пост не удалось."""
+        if self.redis is None or message_id is None:
+            return
+        await self.redis.delete(self.key(message_id, user_id))
@@ -1,31 +1,98 @@
+import asyncio
 import json
+import random
+import time
 from datetime import datetime, timezone
+from functools import lru_cache, partial
 
 import aio_pika
+import numpy as np
+from aio_pika.abc import AbstractChannel
 from aiolimiter import AsyncLimiter
+from langchain_core.exceptions import OutputParserException
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_together import ChatTogether
 from pydantic import BaseModel, Field
+from sqlalchemy import ARRAY, Integer, any_, bindparam, select
 
+from claim_check import ClaimExpiredError, load_post
 from logger_setup import setup_logger
+from services.content_validator.aimd import (
+    AdaptiveLimiter,
+    AIMDController,
+    is_overload,
+)
+from services.content_validator.batching import (
+    estimate_tokens,
+    parse_batch_ranks,
+    plan_batches,
+)
 from services.content_validator.config import (
+    DELIVERY_LOG_TTL_SECONDS,
+    PREFILTER_ANTIPATHY_CEILING,
+    PREFILTER_DIMENSIONS,
+    PREFILTER_SHADOW_RATE,
+    PREFILTER_SIMILARITY_FLOOR,
+    PROFILE_CACHE_SIZE,
+    PROFILE_CACHE_TTL_SECONDS,
+    PROFILE_VECTOR_CACHE_SIZE,
+    RANK_BATCH_MAX_USERS,
+    RANK_BATCH_OUTPUT_TOKENS_PER_USER,
+    RANK_CACHE_TTL_SECONDS,
+    RANK_INITIAL_CONCURRENCY,
+    RANK_LATENCY_SPIKE_FACTOR,
+    RANK_MAX_CONCURRENCY,
+    RANK_MAX_REQUESTS_PER_SECOND,
+    RANK_MAX_RETRIES,
+    RANK_MIN_CONCURRENCY,
+    RANK_PROMPT_TOKEN_BUDGET,
+    RANK_RETRY_BACKOFF_SECONDS,
     RELEVANCE_THRESHOLD,
     TOGETHER_AI_KEY,
     async_session_factory,
-    get_rabbit_connection,
+    rank_log_session_factory,
+    redis,
 )
-from services.content_validator.database.models import User
+from services.content_validator.database.models import RankLog, User
 from services.content_validator.metrics import (
     AMOUNT_OF_VALIDATED_POSTS,
+    DUPLICATE_DELIVERIES,
     ERROR_COUNTER,
     MEAN_RATING,
+    PREFILTER_PAIRS,
+    PREFILTER_SIMILARITY,
+    PROFILE_CACHE_LOOKUPS,
+    PROFILE_GROUP_SHARE,
+    RANK_BATCH_FALLBACKS,
+    RANK_BATCH_SIZE,
+    RANK_CACHE_LOOKUPS,
+    RANK_CONCURRENCY_LIMIT,
+    RANK_LLM_OVERLOADS,
     TIME_OF_OPERATION,
 )
-from services.content_validator.prompts import RANK_POSTS_PROMPT, SYSTEM_PROMPT
+from services.content_validator.prefilter import hash_vector, prefilter
+from services.content_validator.profiles import Profile, ProfileCache
+from services.content_validator.prompts import (
+    BATCH_RANK_POSTS_PROMPT,
+    PROMPT_VERSION,
+    RANK_POSTS_PROMPT,
+    READER_PROFILE,
+    SYSTEM_PROMPT,
+)
+from services.content_validator.rank_cache import (
+    DeliveryLog,
+    RankCache,
+    content_hash,
+    group_by_fingerprint,
+)
 
 logger = setup_logger(__name__)
 
+MODEL_NAME = "Qwen/Qwen2.5-7B-Instruct-Turbo"
+# Токены ответа совместной оценки сверх оценок отдельных пользователей
+BATCH_OUTPUT_OVERHEAD_TOKENS = 50
+
 
 class Evaluation(BaseModel):
     explaination: str = Field(
@@ -34,13 +101,30 @@ class Evaluation(BaseModel):
     rank: int = Field(description="digit from 0 to 100")
 
 
+class ReaderEvaluation(BaseModel):
+    reader: int = Field(description="number of the reader")
+    rank: int = Field(description="digit from 0 to 100")
+
+
+class BatchEvaluation(BaseModel):
+    evaluations: list[ReaderEvaluation] = Field(
+        description="exactly one evaluation for every reader"
+    )
+
+
 class Ranker:
-    def __init__(self):
+    def __init__(self, channel: AbstractChannel):
+        """
+        :param channel: канал RabbitMQ для отправки релевантных постов
+        """
+        self.channel = channel
+        # Повторы выполняются здесь, чтобы перегрузка провайдера была видна AIMD
         self.llm = ChatTogether(
             api_key=TOGETHER_AI_KEY,
-            model="Qwen/Qwen2.5-7B-Instruct-Turbo",
+            model=MODEL_NAME,
             temperature=0.2,
             max_tokens=300,
+            max_retries=0,
         )
         self.parser = JsonOutputParser(pydantic_object=Evaluation)
         self.prompt = ChatPromptTemplate(
@@ -48,26 +132,118 @@ class Ranker:
         )
         self.chain = self.prompt | self.llm | self.parser
 
-        # Лимитер: не более 5 запросов в секунду
-        self.limiter = AsyncLimiter(max_rate=5, time_period=1)
+        # Совместная оценка поста для нескольких пользователей без пояснений
+        self.batch_llm = ChatTogether(
+            api_key=TOGETHER_AI_KEY,
+            model=MODEL_NAME,
+            temperature=0.2,
+            max_tokens=RANK_BATCH_MAX_USERS * RANK_BATCH_OUTPUT_TOKENS_PER_USER
+            + BATCH_OUTPUT_OVERHEAD_TOKENS,
+            max_retries=0,
+        )
+        self.batch_parser = JsonOutputParser(pydantic_object=BatchEvaluation)
+        self.batch_prompt = ChatPromptTemplate(
+            [("system", SYSTEM_PROMPT), ("human", BATCH_RANK_POSTS_PROMPT)]
+        )
+        self.batch_chain = self.batch_prompt | self.batch_llm | self.batch_parser
 
-    async def user_preferences(self, user_id: int) -> dict:
-        with TIME_OF_OPERATION.labels(request_type="get_user_preferences").time():
-            async with async_session_factory() as session:
-                user = await session.get(User, user_id)
-                return user.preferences
+        self.rank_cache = RankCache(
+            redis, MODEL_NAME, PROMPT_VERSION, RANK_CACHE_TTL_SECONDS
+        )
+        self.delivery_log = DeliveryLog(redis, DELIVERY_LOG_TTL_SECONDS)
+
+        self.profile_cache = ProfileCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_SECONDS)
+
+        # Векторы профилей пересчитываются только при изменении их текста
+        self.profile_vector = lru_cache(maxsize=PROFILE_VECTOR_CACHE_SIZE)(
+            partial(hash_vector, dimensions=PREFILTER_DIMENSIONS)
+        )
 
-    async def user_antipathy(self, user_id: int) -> list[str]:
-        with TIME_OF_OPERATION.labels(request_type="get_user_antipathy").time():
+        # Число одновременных запросов к LLM подбирается по AIMD, а частота
+        # запросов ограничена сверху независимо от него
+        self.concurrency = AIMDController(
+            RANK_MIN_CONCURRENCY,
+            RANK_MAX_CONCURRENCY,
+            RANK_INITIAL_CONCURRENCY,
+            spike_factor=RANK_LATENCY_SPIKE_FACTOR,
+        )
+        self.concurrency_limiter = AdaptiveLimiter(self.concurrency)
+        self.rate_limiter = AsyncLimiter(
+            max_rate=RANK_MAX_REQUESTS_PER_SECOND, time_period=1
+        )
+        RANK_CONCURRENCY_LIMIT.set(self.concurrency.limit)
+
+    async def load_profiles(self, user_ids: list[int]) -> dict[int, Profile]:
+        """
+        Профили подписчиков поста: из кэша, а недостающие — одним запросом.
+        Пользователи, которых нет в базе, пропускаются.
+        """
+        profiles = self.profile_cache.get_many(user_ids)
+        missing = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in profiles]
+        PROFILE_CACHE_LOOKUPS.labels(result="hit").inc(len(profiles))
+        PROFILE_CACHE_LOOKUPS.labels(result="miss").inc(len(missing))
+        if not missing:
+            return profiles
+        generation = self.profile_cache.generation
+        with TIME_OF_OPERATION.labels(request_type="load_profiles").time():
             async with async_session_factory() as session:
-                user = await session.get(User, user_id)
-                return user.antipathy
+                rows = await session.execute(
+                    select(User.user_id, User.preferences, User.antipathy).where(
+                        User.user_id
+                        == any_(bindparam("user_ids", missing, type_=ARRAY(Integer)))
+                    )
+                )
+                loaded = {
+                    user_id: (preferences, antipathy)
+                    for user_id, preferences, antipathy in rows
+                }
+        self.profile_cache.put_many(loaded, generation)
+        profiles.update(loaded)
+        return profiles
+
+    async def handle_profile_changed(self, message: aio_pika.IncomingMessage):
+        """Удаляет изменённый профиль из кэша, чтобы он был загружен заново."""
+        async with message.process():
+            data = json.loads(message.body.decode())
+            self.profile_cache.invalidate(int(data["user_id"]))
+            logger.info(
+                f"Профиль пользователя {data['user_id']} удалён из кэша",
+                correlation_id=data["correlation_id"],
+            )
+
+    async def call_llm(self, chain, inputs: dict):
+        """
+        Вызывает цепочку LLM в пределах адаптивного ограничения. При
+        перегрузке провайдера предел снижается, а запрос повторяется с
+        экспоненциальной задержкой.
+        """
+        for attempt in range(RANK_MAX_RETRIES + 1):
+            async with self.concurrency_limiter, self.rate_limiter:
+                started_at = time.monotonic()
+                try:
+                    result = await chain.ainvoke(inputs)
+                except Exception as e:
+                    if not is_overload(e):
+                        raise
+                    self.concurrency.on_overload()
+                    RANK_LLM_OVERLOADS.labels(reason="error").inc()
+                    RANK_CONCURRENCY_LIMIT.set(self.concurrency.limit)
+                    if attempt == RANK_MAX_RETRIES:
+                        raise
+                else:
+                    if self.concurrency.on_success(time.monotonic() - started_at):
+                        RANK_LLM_OVERLOADS.labels(reason="latency").inc()
+                    RANK_CONCURRENCY_LIMIT.set(self.concurrency.limit)
+                    return result
+            await asyncio.sleep(RANK_RETRY_BACKOFF_SECONDS * 2**attempt)
+        return None  # Недостижимо: последняя попытка возвращает ответ или ошибку
 
     async def rank_post(
         self, title: str, preferences: str, antipathy: str, content: str
     ) -> Evaluation:
         with TIME_OF_OPERATION.labels(request_type="rank_post").time():
-            return await self.chain.ainvoke(
+            return await self.call_llm(
+                self.chain,
                 {
                     "title": title,
                     "preferences": preferences,
@@ -77,69 +253,355 @@ class Ranker:
                 }
             )
 
-    async def handle_new_posts(self, message: aio_pika.IncomingMessage):
-        with TIME_OF_OPERATION.labels(request_type="handle_new_posts").time():
+    async def rank_batch(
+        self, title: str, profiles: list[tuple[str, str]], content: str
+    ) -> list[int] | None:
+        """
+        Оценивает пост для нескольких пользователей одним запросом.
+        Возвращает рейтинги в порядке профилей или None при некорректном ответе.
+        """
+        with TIME_OF_OPERATION.labels(request_type="rank_batch").time():
             try:
-                data = json.loads(message.body.decode())
-                correlation_id = data["correlation_id"]
+                result = await self.call_llm(
+                    self.batch_chain,
+                    {
+                        "title": title,
+                        "profiles": "\n".join(
+                            READER_PROFILE.format(
+                                number=number, preferences=preferences, antipathy=antipathy
+                            )
+                            for number, (preferences, antipathy) in enumerate(profiles, 1)
+                        ),
+                        "content": content,
+                        "format_instructions": self.batch_parser.get_format_instructions(),
+                    },
+                )
+            except OutputParserException:
+                return None
+        return parse_batch_ranks(result, len(profiles))
+
+    async def rank_users(
+        self, data: dict, profiles: list[tuple[str, str]], correlation_id: str
+    ) -> list[int]:
+        """
+        Оценивает пост для всех пользователей. Профили объединяются в пачки
+        по бюджету токенов, так что заголовок и текст поста отправляются один
+        раз на пачку; пачки с некорректным ответом оцениваются по одному.
+        """
+        title, content = data["post_title"], data["post_content"]
+        base_tokens = estimate_tokens(SYSTEM_PROMPT + BATCH_RANK_POSTS_PROMPT + title + content)
+        profile_tokens = [
+            estimate_tokens(READER_PROFILE + f"{preferences}{antipathy}")
+            + RANK_BATCH_OUTPUT_TOKENS_PER_USER
+            for preferences, antipathy in profiles
+        ]
+        batches = plan_batches(
+            base_tokens, profile_tokens, RANK_PROMPT_TOKEN_BUDGET, RANK_BATCH_MAX_USERS
+        )
+        # Пачки оцениваются параллельно в пределах адаптивного ограничения
+        results = await asyncio.gather(
+            *(
+                self.rank_group(title, [profiles[index] for index in batch], content, correlation_id)
+                for batch in batches
+            )
+        )
+        ranks: list[int] = [0] * len(profiles)
+        for batch, batch_ranks in zip(batches, results, strict=True):
+            for index, rank in zip(batch, batch_ranks, strict=True):
+                ranks[index] = rank
+        return ranks
+
+    async def rank_group(
+        self,
+        title: str,
+        profiles: list[tuple[str, str]],
+        content: str,
+        correlation_id: str,
+    ) -> list[int]:
+        """Рейтинги одной пачки; при некорректном ответе — по одному пользователю."""
+        if len(profiles) > 1:
+            ranks = await self.rank_batch(title, profiles, content)
+            if ranks is not None:
+                RANK_BATCH_SIZE.observe(len(profiles))
+                return ranks
+            RANK_BATCH_FALLBACKS.inc()
+            logger.warning(
+                f"Некорректный ответ совместной оценки поста '{title}', "
+                f"оцениваем {len(profiles)} пользователей по одному",
+                correlation_id=correlation_id,
+            )
+        evaluations = await asyncio.gather(
+            *(self.rank_post(title, *profile, content) for profile in profiles)
+        )
+        RANK_BATCH_SIZE.observe(1)
+        return [int(evaluation["rank"]) for evaluation in evaluations]
+
+    def prefilter_users(
+        self, data: dict, users_id: list, profiles: list[tuple[str, str]]
+    ) -> tuple[list[int], list[dict]]:
+        """
+        Отсеивает пары, заведомо нерелевантные по сходству векторов n-грамм.
+
+        Возвращает индексы пользователей, которых нужно оценить LLM, и
+        записи журнала оценок для них. Доля PREFILTER_SHADOW_RATE отсеянных
+        пар всё равно оценивается LLM, чтобы сравнить решения отсева с
+        рейтингами.
+        """
+        if not profiles:
+            return [], []
+        post_vector = hash_vector(
+            f"{data['post_title']} {data['post_content']}", PREFILTER_DIMENSIONS
+        )
+        passed, similarities, antipathy_similarities = prefilter(
+            post_vector,
+            np.stack([self.profile_vector(preferences or "") for preferences, _ in profiles]),
+            np.stack([self.profile_vector(antipathy or "") for _, antipathy in profiles]),
+            PREFILTER_SIMILARITY_FLOOR,
+            PREFILTER_ANTIPATHY_CEILING,
+        )
+        selected, records = [], []
+        for index, is_passed in enumerate(passed.tolist()):
+            PREFILTER_SIMILARITY.observe(float(similarities[index]))
+            shadow = not is_passed and random.random() < PREFILTER_SHADOW_RATE  # noqa: S311
+            PREFILTER_PAIRS.labels(
+                decision="passed" if is_passed else "shadow" if shadow else "skipped"
+            ).inc()
+            if not (is_passed or shadow):
+                continue
+            selected.append(index)
+            records.append(
+                {
+                    "post_link": data["post_link"],
+                    "user_id": int(users_id[index]),
+                    "similarity": float(similarities[index]),
+                    "antipathy_similarity": float(antipathy_similarities[index]),
+                    "prefilter_passed": is_passed,
+                    "sample_weight": 1.0 if is_passed else 1 / PREFILTER_SHADOW_RATE,
+                }
+            )
+        return selected, records
+
+    async def save_rank_log(
+        self, records: list[dict], ranks: list[int], correlation_id: str
+    ):
+        """
+        Сохраняет оценки LLM в журнал для офлайн-оценки отсева. Журнал
+        вспомогательный, поэтому ошибка записи только логируется.
+        """
+        if not records:
+            return
+        try:
+            with TIME_OF_OPERATION.labels(request_type="save_rank_log").time():
+                async with rank_log_session_factory() as session:
+                    session.add_all(
+                        [
+                            RankLog(**record, rank=rank)
+                            for record, rank in zip(records, ranks, strict=True)
+                        ]
+                    )
+                    await session.commit()
+        except Exception as e:
+            ERROR_COUNTER.labels(error_type="save_rank_log").inc()
+            logger.error(
+                f"Ошибка при сохранении журнала оценок: {e}",
+                correlation_id=correlation_id,
+            )
+
+    async def cached_ranks(
+        self,
+        data: dict,
+        profiles: list[tuple[str, str]],
+        fingerprints: list[str],
+        correlation_id: str,
+    ) -> tuple[list[int], list[int]]:
+        """
+        Рейтинги поста для различных профилей: из кэша, а недостающие —
+        оценкой LLM с последующим сохранением в кэш. Возвращает рейтинги и
+        индексы профилей, оценённых LLM.
+        """
+        post_hash = content_hash(data["post_title"], data["post_content"])
+        ranks = await self.rank_cache.get_many(post_hash, fingerprints)
+        missing = [index for index, rank in enumerate(ranks) if rank is None]
+        RANK_CACHE_LOOKUPS.labels(result="hit").inc(len(ranks) - len(missing))
+        RANK_CACHE_LOOKUPS.labels(result="miss").inc(len(missing))
+        if not missing:
+            return ranks, missing
+        fresh_ranks = await self.rank_users(
+            data, [profiles[index] for index in missing], correlation_id
+        )
+        await self.rank_cache.set_many(
+            post_hash,
+            {
+                fingerprints[index]: rank
+                for index, rank in zip(missing, fresh_ranks, strict=True)
+            },
+        )
+        for index, rank in zip(missing, fresh_ranks, strict=True):
+            ranks[index] = rank
+        return ranks, missing
+
+    async def send_relevant_post(
+        self, data: dict, user_id: int, preferences: str, rank: int, correlation_id: str
+    ):
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(
+                body=json.dumps(
+                    {
+                        "feed_url": data["feed_url"],
+                        "post_title": data["post_title"],
+                        "post_link": data["post_link"],
+                        "post_content": data["post_content"],
+                        "user_id": user_id,
+                        "preferences": preferences,
+                        "rank": rank,
+                        "correlation_id": correlation_id,
+                    }
+                ).encode()
+            ),
+            routing_key="rss.relevant_posts",
+        )
+        logger.info(
+            f"Пост '{data['post_title']}' отправлен в очередь релевантных постов для пользователя {user_id}",
+            correlation_id=correlation_id,
+        )
+
+    async def deliver(
+        self,
+        data: dict,
+        user_id: int,
+        preferences: str,
+        rank: int,
+        correlation_id: str,
+        message_id: str | None,
+    ):
+        """Отправляет релевантный пост, если он ещё не отправлен по этому сообщению."""
+        if not await self.delivery_log.claim(message_id, int(user_id)):
+            DUPLICATE_DELIVERIES.inc()
+            logger.info(
+                f"Пост '{data['post_title']}' уже отправлен пользователю {user_id}",
+                correlation_id=correlation_id,
+            )
+            return
+        try:
+            await self.send_relevant_post(data, user_id, preferences, rank, correlation_id)
+        except Exception:
+            # Без отметки повтор сообщения после сбоя отправит пост
+            await self.delivery_log.release(message_id, int(user_id))
+            raise
+
+    async def load_message(self, message: dict) -> tuple[dict, list]:
+        """
+        Возвращает пост и подписчиков из сообщения. Сообщение claim-check
+        содержит только ссылки, и данные поста загружаются из Redis.
+        """
+        if "subscribers_key" not in message:
+            return message, list(message["feed_subscribers"])
+        with TIME_OF_OPERATION.labels(request_type="load_claim").time():
+            return await load_post(redis, message)
+
+    async def rank_subscribers(
+        self,
+        data: dict,
+        users_id: list,
+        profiles: list[tuple[str, str]],
+        correlation_id: str,
+        message_id: str | None = None,
+    ):
+        """
+        Оценивает пост для подписчиков и отправляет его тем, кому он
+        релевантен. Подписчики с одинаковым профилем оцениваются один раз,
+        а повторное сообщение с тем же ``message_id`` не отправляет пост
+        пользователю снова.
+        """
+        groups = group_by_fingerprint(profiles)
+        if profiles:
+            PROFILE_GROUP_SHARE.observe(len(groups) / len(profiles))
+        fingerprints = list(groups)
+        selected, records = self.prefilter_users(
+            data,
+            [users_id[members[0]] for members in groups.values()],
+            [profiles[members[0]] for members in groups.values()],
+        )
+        ranks, fresh = await self.cached_ranks(
+            data,
+            [profiles[groups[fingerprints[index]][0]] for index in selected],
+            [fingerprints[index] for index in selected],
+            correlation_id,
+        )
+        for index, rank in zip(selected, ranks, strict=True):
+            for member in groups[fingerprints[index]]:
+                user_id, preferences = users_id[member], profiles[member][0]
+                AMOUNT_OF_VALIDATED_POSTS.inc()
+                MEAN_RATING.set(rank)
                 logger.info(
-                    "Получено новое сообщение о новом посте", correlation_id=correlation_id
+                    f"Пост '{data['post_title']}' оценён рейтингом {rank}% для пользователя {user_id}",
+                    correlation_id=correlation_id,
                 )
-                published_at = datetime.fromisoformat(data["published_at"])
-                current_time = datetime.now(timezone.utc)
-                
-                # Make published_at timezone-aware if it isn't already
-                if published_at.tzinfo is None:
-                    published_at = published_at.replace(tzinfo=timezone.utc)
-                
-                # Проверяем, что пост вышел в этот день
-                if published_at.date() != current_time.date():
-                    logger.info(
-                        f"Пост '{data['post_title']}' не релевантен, так как он был опубликован в другой день",
-                        correlation_id=correlation_id,
+                if rank > int(RELEVANCE_THRESHOLD):
+                    await self.deliver(
+                        data, user_id, preferences, rank, correlation_id, message_id
                     )
-                    return
-                    
-                users_id = list(data["feed_subscribers"])
-                for user_id in users_id:
-                    # Гарантируем, что не превысим лимит запросов
-                    async with self.limiter:
-                        preferences = await self.user_preferences(int(user_id))
-                        antipathy = await self.user_antipathy(int(user_id))
-                        rank = await self.rank_post(
-                            data["post_title"], preferences, antipathy, data["post_content"]
-                        )
-                        AMOUNT_OF_VALIDATED_POSTS.inc()
-                        MEAN_RATING.set(rank["rank"])
-                        logger.info(
-                            f"Пост '{data['post_title']}' оценён рейтингом {rank['rank']}%",
-                            correlation_id=correlation_id,
-                        )
-                        if rank["rank"] > int(RELEVANCE_THRESHOLD):
-                            connection = await get_rabbit_connection()
-                            channel = await connection.channel()
-                            await channel.default_exchange.publish(
-                                aio_pika.Message(
-                                    body=json.dumps(
-                                        {
-                                            "feed_url": data["feed_url"],
-                                            "post_title": data["post_title"],
-                                            "post_link": data["post_link"],
-                                            "post_content": data["post_content"],
-                                            "user_id": user_id,
-                                            "preferences": preferences,
-                                            "rank": rank["rank"],
-                                            "correlation_id": correlation_id,
-                                        }
-                                    ).encode()
-                                ),
-                                routing_key="rss.relevant_posts",
-                            )
-                            await connection.close()
-                            logger.info(
-                                f"Пост '{data['post_title']}' отправлен в очередь релевантных постов для пользователя {user_id}",
-                                correlation_id=correlation_id,
-                            )
-            except Exception:
+        # Журнал пишется после доставки и не задерживает её
+        await self.save_rank_log(
+            [records[index] for index in fresh],
+            [ranks[index] for index in fresh],
+            correlation_id,
+        )
+
+    async def handle_new_posts(self, message: aio_pika.IncomingMessage):
+        """
+        Обрабатывает сообщение о новом посте и подтверждает его только после
+        обработки. Сообщение, не обработанное из-за перегрузки провайдера LLM,
+        возвращается в очередь один раз.
+        """
+        with TIME_OF_OPERATION.labels(request_type="handle_new_posts").time():
+            try:
+                await self.process_new_post(message)
+            except Exception as e:
                 ERROR_COUNTER.labels(error_type="handle_new_posts").inc()
+                await message.reject(requeue=is_overload(e) and not message.redelivered)
                 raise
+            await message.ack()
+
+    async def process_new_post(self, message: aio_pika.IncomingMessage):
+        message_data = json.loads(message.body.decode())
+        correlation_id = message_data["correlation_id"]
+        logger.info(
+            "Получено новое сообщение о новом посте", correlation_id=correlation_id
+        )
+        try:
+            data, users_id = await self.load_message(message_data)
+        except ClaimExpiredError:
+            ERROR_COUNTER.labels(error_type="claim_expired").inc()
+            logger.error(
+                f"Данные поста {message_data['post_id']} не найдены в Redis",
+                correlation_id=correlation_id,
+            )
+            return
+        published_at = datetime.fromisoformat(data["published_at"])
+        current_time = datetime.now(timezone.utc)
+        
+        # Make published_at timezone-aware if it isn't already
+        if published_at.tzinfo is None:
+            published_at = published_at.replace(tzinfo=timezone.utc)
+        
+        # Проверяем, что пост вышел в этот день
+        if published_at.date() != current_time.date():
+            logger.info(
+                f"Пост '{data['post_title']}' не релевантен, так как он был опубликован в другой день",
+                correlation_id=correlation_id,
+            )
+            return
+            
+        loaded = await self.load_profiles([int(user_id) for user_id in users_id])
+        unknown = [user_id for user_id in users_id if int(user_id) not in loaded]
+        if unknown:
+            logger.warning(
+                f"Подписчики {unknown} не найдены в базе пользователей",
+                correlation_id=correlation_id,
+            )
+        users_id = [user_id for user_id in users_id if int(user_id) in loaded]
+        profiles = [loaded[int(user_id)] for user_id in users_id]
+        await self.rank_subscribers(
+            data, users_id, profiles, correlation_id, message.message_id
+        )
@@ -1,15 +1,109 @@
 # config.py
 import os
+from datetime import datetime
 
 from aio_pika import connect_robust
 from dotenv import load_dotenv
+from redis import asyncio as aioredis
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from services.rss_manager.database.migrations import apply_migrations
+from services.rss_manager.database.partitions import ensure_partitions
+from services.rss_manager.utils.partitions import add_months, month_start
+
 load_dotenv()
 
 MINUTES_BETWEEN_RSS_CHECKS = os.getenv("MINUTES_BETWEEN_RSS_CHECKS", default=3)
 
+# Параметры адаптивного планировщика опросов RSS
+MIN_MINUTES_BETWEEN_RSS_CHECKS = float(os.getenv("MIN_MINUTES_BETWEEN_RSS_CHECKS", default=2))
+MAX_MINUTES_BETWEEN_RSS_CHECKS = float(os.getenv("MAX_MINUTES_BETWEEN_RSS_CHECKS", default=360))
+MAX_CONCURRENT_RSS_POLLS = int(os.getenv("MAX_CONCURRENT_RSS_POLLS", default=10))
+RSS_POLL_JITTER = float(os.getenv("RSS_POLL_JITTER", default=0.1))
+SECONDS_BETWEEN_FEED_SYNCS = float(os.getenv("SECONDS_BETWEEN_FEED_SYNCS", default=60))
+
+# Ограничения запросов к одному хосту
+HOST_MAX_CONCURRENT_REQUESTS = int(os.getenv("HOST_MAX_CONCURRENT_REQUESTS", default=2))
+HOST_RATE_LIMIT = float(os.getenv("HOST_RATE_LIMIT", default=2))
+HOST_RATE_PERIOD_SECONDS = float(os.getenv("HOST_RATE_PERIOD_SECONDS", default=1))
+# Ограничения хоста без запросов дольше этого срока забываются
+HOST_IDLE_SECONDS = float(os.getenv("HOST_IDLE_SECONDS", default=600))
+
+# Экспоненциальная пауза для лент, которые не удаётся получить
+FEED_BACKOFF_BASE_SECONDS = float(os.getenv("FEED_BACKOFF_BASE_SECONDS", default=300))
+FEED_BACKOFF_MAX_SECONDS = float(os.getenv("FEED_BACKOFF_MAX_SECONDS", default=24 * 3600))
+
+# Пул браузера Playwright для загрузки динамических страниц
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", default=3))
+BROWSER_PAGE_MAX_USES = int(os.getenv("BROWSER_PAGE_MAX_USES", default=20))
+BROWSER_RESTART_AFTER_PAGES = int(os.getenv("BROWSER_RESTART_AFTER_PAGES", default=500))
+BROWSER_RESTART_AFTER_SECONDS = float(os.getenv("BROWSER_RESTART_AFTER_SECONDS", default=3600))
+
+# Кэш текста статей в Redis (отключается, если REDIS_URL не задан)
+REDIS_URL = os.getenv("REDIS_URL")
+redis = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+ARTICLE_CACHE_TTL = int(os.getenv("ARTICLE_CACHE_TTL", default=7 * 24 * 3600))
+# Неудачная загрузка кэшируется ненадолго: запись остаётся необработанной,
+# и следующий опрос ленты после истечения срока повторит попытку
+ARTICLE_CACHE_NEGATIVE_TTL = int(os.getenv("ARTICLE_CACHE_NEGATIVE_TTL", default=300))
+ARTICLE_CACHE_MAX_TEXT_LENGTH = int(os.getenv("ARTICLE_CACHE_MAX_TEXT_LENGTH", default=100_000))
+
+# Количество процессов для извлечения текста статей
+ARTICLE_EXTRACTOR_PROCESSES = int(os.getenv("ARTICLE_EXTRACTOR_PROCESSES", default=2))
+
+# Распределение лент между репликами: идентификатор воркера и аренда
+RSS_WORKER_ID = os.getenv("RSS_WORKER_ID")
+WORKER_HEARTBEAT_SECONDS = float(os.getenv("WORKER_HEARTBEAT_SECONDS", default=10))
+WORKER_LEASE_SECONDS = float(os.getenv("WORKER_LEASE_SECONDS", default=30))
+
+# Количество процессов для разбора RSS-лент
+RSS_PARSER_PROCESSES = int(os.getenv("RSS_PARSER_PROCESSES", default=2))
+
+# Число обработчиков стадий конвейера RSS и размер очереди каждой стадии
+PIPELINE_FETCH_WORKERS = int(os.getenv("PIPELINE_FETCH_WORKERS", default=MAX_CONCURRENT_RSS_POLLS))
+PIPELINE_PARSE_WORKERS = int(os.getenv("PIPELINE_PARSE_WORKERS", default=RSS_PARSER_PROCESSES))
+PIPELINE_FILTER_WORKERS = int(os.getenv("PIPELINE_FILTER_WORKERS", default=4))
+PIPELINE_ENRICH_WORKERS = int(os.getenv("PIPELINE_ENRICH_WORKERS", default=8))
+PIPELINE_PERSIST_WORKERS = int(os.getenv("PIPELINE_PERSIST_WORKERS", default=4))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", default=100))
+
+# Push-доставка WebSub (отключена, если WEBSUB_CALLBACK_URL не задан).
+# WEBSUB_CALLBACK_URL — внешний адрес, по которому хабы достигают порта WEBSUB_PORT
+WEBSUB_CALLBACK_URL = os.getenv("WEBSUB_CALLBACK_URL")
+WEBSUB_PORT = int(os.getenv("WEBSUB_PORT", default=8805))
+WEBSUB_LEASE_SECONDS = int(os.getenv("WEBSUB_LEASE_SECONDS", default=10 * 24 * 3600))
+WEBSUB_RENEW_BEFORE_SECONDS = float(os.getenv("WEBSUB_RENEW_BEFORE_SECONDS", default=24 * 3600))
+WEBSUB_RETRY_SECONDS = float(os.getenv("WEBSUB_RETRY_SECONDS", default=3600))
+WEBSUB_RENEWAL_CHECK_SECONDS = float(os.getenv("WEBSUB_RENEWAL_CHECK_SECONDS", default=300))
+# Ленты с активной подпиской опрашиваются только как страховка от потерянных уведомлений
+WEBSUB_POLL_MINUTES = float(os.getenv("WEBSUB_POLL_MINUTES", default=12 * 60))
+
+# Записи старше окна свежести не дополняются текстом статьи и не публикуются
+POST_FRESHNESS_HOURS = float(os.getenv("POST_FRESHNESS_HOURS", default=24))
+
+# Пачки постов больше этого размера вставляются через COPY
+POSTS_COPY_THRESHOLD = int(os.getenv("POSTS_COPY_THRESHOLD", default=500))
+
+# Хранение постов: месячные секции rss_posts старше POST_RETENTION_MONTHS
+# выгружаются в POSTS_ARCHIVE_DIR (если задан) и удаляются, ключи записей
+# для дедупликации живут ENTRY_KEY_RETENTION_DAYS
+POST_RETENTION_MONTHS = int(os.getenv("POST_RETENTION_MONTHS", default=3))
+ENTRY_KEY_RETENTION_DAYS = int(os.getenv("ENTRY_KEY_RETENTION_DAYS", default=365))
+POSTS_ARCHIVE_DIR = os.getenv("POSTS_ARCHIVE_DIR")
+PARTITIONS_AHEAD_MONTHS = int(os.getenv("PARTITIONS_AHEAD_MONTHS", default=2))
+SECONDS_BETWEEN_RETENTION_RUNS = float(os.getenv("SECONDS_BETWEEN_RETENTION_RUNS", default=6 * 3600))
+
+# Изменения подписок рассылаются всем репликам: ленту опрашивает её владелец,
+# а сообщение о подписке получает произвольная реплика
+SUBSCRIPTIONS_CHANGED_EXCHANGE = "rss.subscriptions.changed"
+
+# Период сверки индекса подписок в памяти с базой данных
+SECONDS_BETWEEN_SUBSCRIPTION_RECONCILIATIONS = float(
+    os.getenv("SECONDS_BETWEEN_SUBSCRIPTION_RECONCILIATIONS", default=300)
+)
+
 # Конфигурация базы данных
 POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
@@ -35,7 +129,13 @@ async_session_factory = sessionmaker(
 
 async def init_db():
     async with engine.begin() as conn:
+        fresh = not await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).has_table("rss_feeds")
+        )
         await conn.run_sync(Base.metadata.create_all)
+        await apply_migrations(conn, fresh=fresh)
+        now = month_start(datetime.now())
+        await ensure_partitions(conn, now, add_months(now, PARTITIONS_AHEAD_MONTHS))
 
 
 # Конфигурация RabbitMQ
@@ -48,6 +148,15 @@ if not all([RABBITMQ_USER, RABBITMQ_PASS, RABBITMQ_HOST]):
     raise ValueError("Переменные окружения для RabbitMQ установлены некорректно.")
 
 
+# Размер пула каналов долгоживущего издателя RabbitMQ
+RABBITMQ_PUBLISHER_CHANNELS = int(os.getenv("RABBITMQ_PUBLISHER_CHANNELS", default=4))
+
+# Ретранслятор исходящих сообщений: размер пачки и период проверки таблицы,
+# если о новых сообщениях не сообщили
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", default=200))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", default=5))
+
+
 async def get_rabbit_connection():
     """Устанавливает соединение с RabbitMQ"""
     return await connect_robust(
@@ -0,0 +1,59 @@
+"""
+Пакетная запись постов сервиса rss manager.
+
+Ключи новых записей сначала занимаются в ``rss_entry_keys`` одним запросом
+``INSERT ... ON CONFLICT DO NOTHING RETURNING``, и записываются только посты,
+ключи которых действительно вставлены. Крупные пачки постов затем передаются
+в секционированную ``rss_posts`` через ``COPY`` asyncpg, у которого нет ни
+ограничения на число параметров, ни обмена с сервером на каждую строку.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.rss_manager.database.models import RssEntryKey
+
+POST_COLUMNS = [
+    "post_id",
+    "feed_id",
+    "entry_key",
+    "title",
+    "content",
+    "link",
+    "published_at",
+]
+
+
+async def claim_entry_keys(
+    session: AsyncSession, feed_id, keys: list[str]
+) -> set[str]:
+    """Сохраняет ключи записей и возвращает те, которых ещё не было."""
+    if not keys:
+        return set()
+    now = datetime.now()
+    result = await session.execute(
+        insert(RssEntryKey)
+        .values(
+            [{"feed_id": feed_id, "entry_key": key, "first_seen_at": now} for key in keys]
+        )
+        .on_conflict_do_nothing(index_elements=["feed_id", "entry_key"])
+        .returning(RssEntryKey.entry_key)
+    )
+    return set(result.scalars().all())
+
+
+async def copy_posts(session: AsyncSession, rows: list[dict]):
+    """
+    Записывает посты через COPY; PostgreSQL сам распределяет строки по
+    секциям. Вызывается внутри транзакции сессии, которая затем фиксируется.
+    """
+    # Транзакцию в драйвере уже открыл claim_entry_keys, COPY выполняется в ней
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        "rss_posts",
+        records=[tuple(row[column] for column in POST_COLUMNS) for row in rows],
+        columns=POST_COLUMNS,
+    )
@@ -0,0 +1,204 @@
+"""
+Версионные миграции схемы сервиса rss manager.
+
+``Base.metadata.create_all`` создаёт только отсутствующие таблицы, поэтому
+изменения существующих таблиц применяются здесь. Каждая миграция выполняется
+один раз; применённые версии записываются в ``schema_migrations``. Шаг
+миграции — SQL-запрос или асинхронная функция, получающая соединение.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from services.rss_manager.database.partitions import ensure_partitions
+from services.rss_manager.utils.entries import normalize_link
+
+# Номер блокировки, под которой реплики по очереди применяют миграции
+MIGRATIONS_LOCK_ID = 4_710_001
+
+
+async def backfill_normalized_urls(conn):
+    """
+    Заполняет нормализованный адрес лент. Ленты, совпавшие после
+    нормализации, объединяются: подписки переносятся на самую раннюю.
+    """
+    rows = (
+        await conn.execute(
+            text("SELECT feed_id, url FROM rss_feeds ORDER BY created_at")
+        )
+    ).all()
+    kept = {}
+    for feed_id, url in rows:
+        normalized = normalize_link(url)
+        if normalized not in kept:
+            kept[normalized] = feed_id
+            await conn.execute(
+                text("UPDATE rss_feeds SET normalized_url = :url WHERE feed_id = :id"),
+                {"url": normalized, "id": feed_id},
+            )
+            continue
+        await conn.execute(
+            text(
+                "UPDATE subscriptions SET feed_id = :kept WHERE feed_id = :duplicate"
+            ),
+            {"kept": kept[normalized], "duplicate": feed_id},
+        )
+        await conn.execute(
+            text("DELETE FROM rss_feeds WHERE feed_id = :id"), {"id": feed_id}
+        )
+
+
+async def partition_posts(conn):
+    """
+    Переводит rss_posts на секционирование по месяцам публикации.
+
+    Уникальный индекс секционированной таблицы обязан включать ключ
+    секционирования, поэтому дедупликация записей перенесена в rss_entry_keys.
+    """
+    relkind = (
+        await conn.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = 'rss_posts'")
+        )
+    ).scalar()
+    if relkind == "p":
+        return  # Таблица уже секционирована
+
+    for statement in [
+        "ALTER TABLE rss_posts RENAME TO rss_posts_legacy",
+        "ALTER TABLE rss_posts_legacy RENAME CONSTRAINT rss_posts_pkey TO rss_posts_legacy_pkey",
+        "DROP INDEX IF EXISTS uq_rss_posts_feed_entry_key",
+        "DROP INDEX IF EXISTS ix_rss_posts_feed_published",
+        "CREATE TABLE rss_posts ("
+        "post_id UUID NOT NULL, "
+        "feed_id UUID REFERENCES rss_feeds (feed_id) ON DELETE CASCADE, "
+        "title TEXT NOT NULL, "
+        "content TEXT, "
+        "link VARCHAR(255) NOT NULL, "
+        "published_at TIMESTAMP NOT NULL, "
+        "entry_key VARCHAR(64), "
+        "PRIMARY KEY (post_id, published_at)"
+        ") PARTITION BY RANGE (published_at)",
+        "CREATE INDEX ix_rss_posts_feed_published ON rss_posts (feed_id, published_at)",
+    ]:
+        await conn.execute(text(statement))
+
+    oldest, newest = (
+        await conn.execute(
+            text("SELECT min(published_at), max(published_at) FROM rss_posts_legacy")
+        )
+    ).one()
+    now = datetime.now()
+    await ensure_partitions(conn, min(oldest or now, now), max(newest or now, now))
+    await conn.execute(
+        text(
+            "INSERT INTO rss_posts "
+            "(post_id, feed_id, title, content, link, published_at, entry_key) "
+            "SELECT post_id, feed_id, title, content, link, published_at, entry_key "
+            "FROM rss_posts_legacy"
+        )
+    )
+    await conn.execute(text("DROP TABLE rss_posts_legacy"))
+
+
+MIGRATIONS = [
+    (
+        1,
+        "http validators, circuit breaker, entry keys and websub",
+        [
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS etag VARCHAR(255)",
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS last_modified VARCHAR(64)",
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS failure_count INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS last_failure_at TIMESTAMP",
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS next_retry_at TIMESTAMP",
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS websub_hub VARCHAR(255)",
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS websub_topic VARCHAR(255)",
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS websub_secret VARCHAR(64)",
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS websub_requested_at TIMESTAMP",
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS websub_lease_expires_at TIMESTAMP",
+            "ALTER TABLE rss_posts ADD COLUMN IF NOT EXISTS entry_key VARCHAR(64)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_rss_posts_feed_entry_key ON rss_posts (feed_id, entry_key)",
+        ],
+    ),
+    (
+        2,
+        "lookup indexes and unique feed urls and subscriptions",
+        [
+            "ALTER TABLE rss_feeds ADD COLUMN IF NOT EXISTS normalized_url VARCHAR(255)",
+            backfill_normalized_urls,
+            "ALTER TABLE rss_feeds ALTER COLUMN normalized_url SET NOT NULL",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_rss_feeds_normalized_url ON rss_feeds (normalized_url)",
+            # Повторные подписки могли накопиться до появления уникального индекса
+            "DELETE FROM subscriptions a USING subscriptions b "
+            "WHERE a.user_id = b.user_id AND a.feed_id = b.feed_id "
+            "AND a.subscription_id > b.subscription_id",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_subscriptions_user_feed ON subscriptions (user_id, feed_id)",
+            "CREATE INDEX IF NOT EXISTS ix_subscriptions_feed_id ON subscriptions (feed_id)",
+            "CREATE INDEX IF NOT EXISTS ix_rss_posts_feed_published ON rss_posts (feed_id, published_at)",
+        ],
+    ),
+    (
+        3,
+        "monthly partitions of rss_posts and long-lived entry keys",
+        [
+            "CREATE TABLE IF NOT EXISTS rss_entry_keys ("
+            "feed_id UUID NOT NULL REFERENCES rss_feeds (feed_id) ON DELETE CASCADE, "
+            "entry_key VARCHAR(64) NOT NULL, "
+            "first_seen_at TIMESTAMP NOT NULL DEFAULT now(), "
+            "PRIMARY KEY (feed_id, entry_key))",
+            "CREATE INDEX IF NOT EXISTS ix_rss_entry_keys_first_seen_at ON rss_entry_keys (first_seen_at)",
+            "INSERT INTO rss_entry_keys (feed_id, entry_key, first_seen_at) "
+            "SELECT feed_id, entry_key, min(published_at) FROM rss_posts "
+            "WHERE feed_id IS NOT NULL AND entry_key IS NOT NULL "
+            "GROUP BY feed_id, entry_key ON CONFLICT DO NOTHING",
+            partition_posts,
+        ],
+    ),
+    (
+        4,
+        "transactional outbox of new posts",
+        [
+            "CREATE TABLE IF NOT EXISTS rss_outbox ("
+            "message_id BIGSERIAL PRIMARY KEY, "
+            "routing_key VARCHAR(255) NOT NULL, "
+            "payload JSONB NOT NULL, "
+            "created_at TIMESTAMP NOT NULL DEFAULT now())",
+        ],
+    ),
+]
+
+
+async def apply_migrations(conn, fresh: bool = False):
+    """
+    Применяет ещё не применённые миграции в порядке версий.
+
+    Для новой базы, схему которой только что создал create_all по моделям,
+    миграции лишь отмечаются применёнными.
+    """
+    await conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+            "applied_at TIMESTAMP NOT NULL DEFAULT now())"
+        )
+    )
+    # Реплики стартуют одновременно: миграции применяет только одна из них
+    await conn.execute(
+        text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATIONS_LOCK_ID}
+    )
+    applied = set(
+        (await conn.execute(text("SELECT version FROM schema_migrations"))).scalars()
+    )
+    for version, name, steps in MIGRATIONS:
+        if version in applied:
+            continue
+        for step in [] if fresh else steps:
+            if callable(step):
+                await step(conn)
+            else:
+                await conn.execute(text(step))
+        await conn.execute(
+            text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+            {"v": version, "n": name},
+        )
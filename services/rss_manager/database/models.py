@@ -5,7 +5,18 @@ Models for the rss manager service.
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import UUID, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from services.rss_manager.config import Base
@@ -17,8 +28,24 @@ class RssFeed(Base):
     __tablename__ = "rss_feeds"
     feed_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     url = Column(String(255), nullable=False)
+    # Канонический адрес ленты (normalize_link), уникален среди лент
+    normalized_url = Column(String(255), nullable=False)
     created_at = Column(DateTime, nullable=False, default=datetime.now)
     last_post_date = Column(DateTime, nullable=True)
+    # Валидаторы HTTP-кэша и хэш последнего тела ленты для условных запросов
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    # Состояние предохранителя: неудачи подряд и время следующей попытки
+    failure_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_failure_at = Column(DateTime, nullable=True)
+    next_retry_at = Column(DateTime, nullable=True)
+    # Подписка WebSub: хаб, каноничный адрес ленты, секрет подписи и аренда
+    websub_hub = Column(String(255), nullable=True)
+    websub_topic = Column(String(255), nullable=True)
+    websub_secret = Column(String(64), nullable=True)
+    websub_requested_at = Column(DateTime, nullable=True)
+    websub_lease_expires_at = Column(DateTime, nullable=True)
     posts = relationship("RssPost", back_populates="feed", cascade="all, delete-orphan")
     subscriptions = relationship(
         "Subscription",
@@ -27,20 +54,54 @@ class RssFeed(Base):
         passive_deletes=True,
     )
 
+    __table_args__ = (
+        Index("uq_rss_feeds_normalized_url", "normalized_url", unique=True),
+    )
+
     def __repr__(self):
         return f"<RssFeed {self.url}:{self.feed_id}>"
 
+    def breaker_state(self, now: datetime) -> str:
+        """closed — лента здорова, open — пауза после неудач, half_open — пробный опрос."""
+        if not self.failure_count:
+            return "closed"
+        if self.next_retry_at is not None and self.next_retry_at > now:
+            return "open"
+        return "half_open"
+
+    def push_active(self, now: datetime) -> bool:
+        """Хаб подтвердил подписку, и её аренда ещё не истекла."""
+        return (
+            self.websub_lease_expires_at is not None
+            and self.websub_lease_expires_at > now
+        )
+
     def to_dict(self):
         return {
             "feed_id": self.feed_id,
             "url": self.url,
+            "normalized_url": self.normalized_url,
             "created_at": self.created_at,
             "last_post_date": self.last_post_date,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "content_hash": self.content_hash,
+            "failure_count": self.failure_count,
+            "last_failure_at": self.last_failure_at,
+            "next_retry_at": self.next_retry_at,
+            "websub_hub": self.websub_hub,
+            "websub_topic": self.websub_topic,
+            "websub_lease_expires_at": self.websub_lease_expires_at,
         }
 
 
 class RssPost(Base):
-    """Модель RSS-поста."""
+    """
+    Модель RSS-поста.
+
+    Таблица секционирована по месяцам published_at, поэтому дата публикации
+    входит в первичный ключ, а повторы записей отсекает RssEntryKey.
+    """
 
     __tablename__ = "rss_posts"
     post_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
@@ -50,9 +111,16 @@ class RssPost(Base):
     title = Column(Text, nullable=False)
     content = Column(Text, nullable=True)
     link = Column(String(255), nullable=False)
-    published_at = Column(DateTime, nullable=False)
+    published_at = Column(DateTime, primary_key=True)
+    # Ключ записи ленты: хэш GUID, нормализованной ссылки или содержимого
+    entry_key = Column(String(64), nullable=True)
     feed = relationship("RssFeed", back_populates="posts")
 
+    __table_args__ = (
+        Index("ix_rss_posts_feed_published", "feed_id", "published_at"),
+        {"postgresql_partition_by": "RANGE (published_at)"},
+    )
+
     def __repr__(self):
         return f"<RssPost {self.title}:{self.post_id}>"
 
@@ -64,9 +132,33 @@ class RssPost(Base):
             "content": self.content,
             "link": self.link,
             "published_at": self.published_at,
+            "entry_key": self.entry_key,
         }
 
 
+class RssEntryKey(Base):
+    """
+    Ключ уже встречавшейся записи ленты.
+
+    Хранится дольше текста постов: после удаления старых секций rss_posts
+    записи, всё ещё присутствующие в ленте, не публикуются повторно.
+    """
+
+    __tablename__ = "rss_entry_keys"
+    feed_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("rss_feeds.feed_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    entry_key = Column(String(64), primary_key=True)
+    first_seen_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (Index("ix_rss_entry_keys_first_seen_at", "first_seen_at"),)
+
+    def __repr__(self):
+        return f"<RssEntryKey {self.feed_id}:{self.entry_key}>"
+
+
 class Subscription(Base):
     """Подписка пользователя на RSS-поток."""
 
@@ -79,6 +171,11 @@ class Subscription(Base):
     )
     feed = relationship("RssFeed", back_populates="subscriptions")
 
+    __table_args__ = (
+        Index("uq_subscriptions_user_feed", "user_id", "feed_id", unique=True),
+        Index("ix_subscriptions_feed_id", "feed_id"),
+    )
+
     def __repr__(self):
         return f"<Subscription {self.user_id}:{self.subscription_id}>"
 
@@ -89,3 +186,32 @@ class Subscription(Base):
             "created_at": self.created_at,
             "feed_id": self.feed_id,
         }
+
+
+class RssWorker(Base):
+    """Аренда реплики rss_manager, опрашивающей RSS-потоки."""
+
+    __tablename__ = "rss_workers"
+    worker_id = Column(String(255), primary_key=True)
+    heartbeat_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<RssWorker {self.worker_id}:{self.heartbeat_at}>"
+
+
+class OutboxMessage(Base):
+    """
+    Сообщение, ожидающее публикации в RabbitMQ.
+
+    Записывается в одной транзакции с постами и удаляется ретранслятором
+    только после подтверждения брокера.
+    """
+
+    __tablename__ = "rss_outbox"
+    message_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    routing_key = Column(String(255), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<OutboxMessage {self.message_id}:{self.routing_key}>"
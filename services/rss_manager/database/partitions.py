@@ -0,0 +1,75 @@
+"""
+Помесячные секции ``rss_posts``.
+
+Посты секционируются по ``published_at``. Строки, для месяца которых секции
+ещё нет, попадают в ``rss_posts_default``; при создании секции их месяца они
+переносятся в неё до присоединения секции.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from services.rss_manager.utils.partitions import (
+    add_months,
+    months_between,
+    partition_name,
+)
+
+DEFAULT_PARTITION = "rss_posts_default"
+
+
+async def list_partitions(conn) -> list[str]:
+    """Имена секций, присоединённых к rss_posts."""
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'rss_posts'"
+        )
+    )
+    return list(result.scalars())
+
+
+async def create_partition(conn, month: datetime):
+    """
+    Создаёт секцию месяца. Строки этого месяца, успевшие попасть в секцию
+    по умолчанию, переносятся в новую секцию до её присоединения.
+    """
+    name = partition_name(month)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    await conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {name} "
+            f"(LIKE rss_posts INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    await conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "  # noqa: S608
+            f"WHERE published_at >= :start AND published_at < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    await conn.execute(
+        text(
+            f"ALTER TABLE rss_posts ATTACH PARTITION {name} FOR VALUES "
+            f"FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+        )
+    )
+
+
+async def ensure_partitions(conn, start: datetime, end: datetime):
+    """Создаёт секцию по умолчанию и недостающие секции месяцев от start до end."""
+    await conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+            f"PARTITION OF rss_posts DEFAULT"
+        )
+    )
+    existing = set(await list_partitions(conn))
+    for month in months_between(start, end):
+        if partition_name(month) not in existing:
+            await create_partition(conn, month)
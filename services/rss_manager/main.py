@@ -1,27 +1,51 @@
 import asyncio
 
+from aio_pika import ExchangeType
 from prometheus_client import start_http_server
 
+from http_client import close_http_session
 from logger_setup import generate_correlation_id, setup_logger
 from services.rss_manager.config import (
-    MINUTES_BETWEEN_RSS_CHECKS,
+    SUBSCRIPTIONS_CHANGED_EXCHANGE,
+    WEBSUB_CALLBACK_URL,
     get_rabbit_connection,
     init_db,
+    redis,
 )
 from services.rss_manager.managers import RssFeedManager
 from services.rss_manager.metrics import rss_manager_registry
+from services.rss_manager.outbox import OutboxRelay
+from services.rss_manager.publisher import RabbitPublisher
+from services.rss_manager.retention import PostRetention
 from services.rss_manager.rss_listener import RSSListener
+from services.rss_manager.scheduler import FeedScheduler
+from services.rss_manager.sharding import FeedSharding
+from services.rss_manager.subscription_index import SubscriptionIndex
+from services.rss_manager.utils.web_parser import browser_pool, extraction_pool
+from services.rss_manager.websub import WebSubSubscriber
 
 logger = setup_logger(__name__)
 MONITORING_PORT = 8803 # Порт для мониторинга
 
-async def run_listener(listener: RSSListener):
-    correlation_id = generate_correlation_id()
-    logger.info("Запуск слушателя", correlation_id=correlation_id)
-    while True:
-        await listener.check_feeds()
-        logger.info("Проверка RSS-каналов", correlation_id=correlation_id)
-        await asyncio.sleep(60 * float(MINUTES_BETWEEN_RSS_CHECKS))
+async def bind_subscription_changes(channel):
+    """Привязывает собственную очередь реплики к обменнику изменений подписок."""
+    exchange = await channel.declare_exchange(
+        SUBSCRIPTIONS_CHANGED_EXCHANGE, ExchangeType.FANOUT, durable=True
+    )
+    queue = await channel.declare_queue(exclusive=True)
+    await queue.bind(exchange)
+    return exchange, queue
+
+
+async def close_resources(publisher: RabbitPublisher, listener: RSSListener):
+    """Закрывает издателя, конвейер и общие пулы соединений и процессов."""
+    await close_http_session()
+    await publisher.close()
+    await listener.close()
+    await browser_pool.close()
+    extraction_pool.shutdown(wait=False, cancel_futures=True)
+    if redis is not None:
+        await redis.aclose()
 
 
 async def main():
@@ -38,25 +62,61 @@ async def main():
         "user.rss.subscriptions", durable=True
     )
     delete_queue = await channel.declare_queue("rss.feed.unsubscribe", durable=True)
+    # Очередь привязывается до загрузки индекса: изменения, сделанные во
+    # время загрузки, будут применены после неё
+    subscriptions_changed_exchange, subscriptions_changed_queue = (
+        await bind_subscription_changes(channel)
+    )
+
+    # Загрузка индекса подписок в память
+    subscription_index = SubscriptionIndex()
+    await subscription_index.load()
+
+    # Долгоживущий издатель и ретранслятор сообщений о новых постах
+    publisher = RabbitPublisher()
+    await publisher.start()
+    outbox = OutboxRelay(publisher)
 
     # Объявление менеджеров
-    feed_manager = RssFeedManager()
-    listener = RSSListener()
+    feed_manager = RssFeedManager(subscription_index, subscriptions_changed_exchange)
+    listener = RSSListener(subscription_index, outbox)
+    listener.start()
+    sharding = FeedSharding()
+    await sharding.heartbeat()
+    scheduler = FeedScheduler(listener, sharding)
+    # Push-доставка WebSub для лент, объявивших хаб
+    websub = WebSubSubscriber(listener, sharding) if WEBSUB_CALLBACK_URL else None
+    if websub is not None:
+        await websub.start()
 
     # Подписка на очереди
     await feed_queue.consume(feed_manager.handle_add_message)
     await subscriptions_queue.consume(feed_manager.handle_get_subscriptions)
     await delete_queue.consume(feed_manager.handle_delete_message)
+    await subscriptions_changed_queue.consume(
+        feed_manager.handle_subscriptions_changed
+    )
 
     logger.info("Запуск менеджера RSS потоков", correlation_id=correlation_id)
 
-    # Запуск слушателя
-    asyncio.create_task(run_listener(listener))
+    # Запуск аренды воркера, планировщика опросов, сверки индекса подписок,
+    # ретранслятора исходящих сообщений и обслуживания секций постов
+    asyncio.create_task(sharding.run())
+    asyncio.create_task(scheduler.run())
+    asyncio.create_task(subscription_index.run_reconciliation())
+    asyncio.create_task(outbox.run())
+    asyncio.create_task(PostRetention().run())
+    if websub is not None:
+        asyncio.create_task(websub.run_renewals())
 
     try:
         # Бесконечный цикл для поддержания работы приложения
         await asyncio.Future()
     finally:
+        if websub is not None:
+            await websub.close()
+        await sharding.leave()
+        await close_resources(publisher, listener)
         await connection.close()
         logger.info(
             "Завершение работы менеджера RSS потоков", correlation_id=correlation_id
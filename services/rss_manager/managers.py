@@ -1,90 +1,220 @@
 import json
 from uuid import UUID
 
-from aio_pika import IncomingMessage, Message
-from sqlalchemy import delete, func
+from aio_pika import Exchange, IncomingMessage, Message
+from sqlalchemy import literal_column, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.future import select
 
+from http_client import get_http_session
 from logger_setup import setup_logger
-from services.rss_manager.config import async_session_factory, get_rabbit_connection
+from services.rss_manager.config import (
+    WEBSUB_CALLBACK_URL,
+    async_session_factory,
+    get_rabbit_connection,
+)
 from services.rss_manager.database.models import RssFeed, Subscription
 from services.rss_manager.metrics import (
     AMOUNT_OF_ADDED_RSS_FEEDS,
     ERROR_COUNTER,
     TIME_OF_OPERATION,
 )
+from services.rss_manager.subscription_index import SubscriptionIndex
+from services.rss_manager.utils.entries import normalize_link
+from services.rss_manager.utils.subscriptions import subscription_items
+from services.rss_manager.utils.websub import callback_url, request_subscription
 
 logger = setup_logger(__name__)
 
+# Удаление подписок и осиротевших лент одним запросом. Подзапрос к
+# subscriptions видит снимок до удаления, поэтому удаляемые строки исключены явно
+DELETE_SUBSCRIPTIONS = text(
+    """
+    WITH input AS (
+        SELECT *
+        FROM unnest(CAST(:user_ids AS bigint[]), CAST(:urls AS text[]))
+            AS input(user_id, normalized_url)
+    ),
+    removed AS (
+        DELETE FROM subscriptions s
+        USING rss_feeds f, input i
+        WHERE s.feed_id = f.feed_id
+            AND f.normalized_url = i.normalized_url
+            AND s.user_id = i.user_id
+        RETURNING s.feed_id, s.user_id
+    ),
+    orphaned AS (
+        DELETE FROM rss_feeds f
+        WHERE f.feed_id IN (SELECT feed_id FROM removed)
+            AND NOT EXISTS (
+                SELECT 1 FROM subscriptions s
+                WHERE s.feed_id = f.feed_id
+                    AND (s.feed_id, s.user_id) NOT IN (
+                        SELECT feed_id, user_id FROM removed
+                    )
+            )
+        RETURNING f.feed_id, f.websub_hub, f.websub_topic
+    )
+    SELECT r.feed_id, r.user_id, o.feed_id IS NOT NULL AS feed_deleted,
+        o.websub_hub, o.websub_topic
+    FROM removed r
+    LEFT JOIN orphaned o ON o.feed_id = r.feed_id
+    """
+)
+
 
 class RssFeedManager:
-    async def add_feed(self, feed_url: str, correlation_id: str) -> RssFeed:
-        with TIME_OF_OPERATION.labels(request_type="add_feed").time():
-            async with async_session_factory() as session:
-                result = await session.execute(
-                    select(RssFeed).where(RssFeed.url == feed_url)
-                )
-                feed = result.scalar_one_or_none()
-                if not feed:
-                    new_feed = RssFeed(url=feed_url)
-                    session.add(new_feed)
-                    await session.commit()
-                    AMOUNT_OF_ADDED_RSS_FEEDS.inc()
-                    logger.info(
-                        f"RSS-поток {feed_url} добавлен.", correlation_id=correlation_id
-                    )
-                else:
-                    logger.info(
-                        f"RSS-поток {feed_url} уже существует.",
-                        correlation_id=correlation_id,
-                    )
+    def __init__(
+        self, subscription_index: SubscriptionIndex, subscriptions_changed: Exchange
+    ):
+        """
+        :param subscription_index: индекс подписчиков RSS-лент в памяти
+        :param subscriptions_changed: fanout-обменник изменений подписок,
+            к которому привязаны все реплики
+        """
+        self.subscription_index = subscription_index
+        self.subscriptions_changed = subscriptions_changed
 
-                result = await session.execute(
-                    select(RssFeed).where(RssFeed.url == feed_url)
-                )
-                feed = result.scalar_one_or_none()
-                return feed
+    @staticmethod
+    async def reject_malformed(
+        message: IncomingMessage, error: ValueError, correlation_id: str
+    ):
+        """Отклоняет сообщение без возврата в очередь: повтор его не исправит."""
+        ERROR_COUNTER.labels(error_type="malformed_subscription_message").inc()
+        logger.error(
+            f"Отклонено некорректное сообщение о подписках: {error}",
+            correlation_id=correlation_id,
+        )
+        await message.reject()
 
-    async def add_subscription(self, user_id: int, feed_id: int, correlation_id: str):
-        with TIME_OF_OPERATION.labels(request_type="add_subscription").time():
-            async with async_session_factory() as session:
-                result = await session.execute(
-                    select(Subscription).where(
-                        Subscription.user_id == user_id, Subscription.feed_id == feed_id
-                    )
+    async def add_subscriptions(
+        self, items: list[tuple[int, str]], correlation_id: str
+    ) -> list[tuple[UUID, int]]:
+        """
+        Добавляет ленты и подписки пачкой в одной транзакции.
+
+        Ленты вставляются запросом INSERT ... ON CONFLICT DO UPDATE RETURNING,
+        который возвращает ID и новых, и уже существующих лент, а подписки —
+        INSERT ... ON CONFLICT DO NOTHING RETURNING. Возвращает пары
+        (feed_id, user_id) действительно добавленных подписок.
+        """
+        urls = {}
+        for _, feed_url in items:
+            urls.setdefault(normalize_link(feed_url), feed_url)
+        with TIME_OF_OPERATION.labels(request_type="add_subscriptions").time():
+            async with async_session_factory() as session, session.begin():
+                # Единый порядок строк исключает взаимоблокировки параллельных пачек
+                feeds_insert = insert(RssFeed).values(
+                    [
+                        {"url": feed_url, "normalized_url": normalized_url}
+                        for normalized_url, feed_url in sorted(urls.items())
+                    ]
                 )
-                subscription = result.scalar_one_or_none()
-                if not subscription:
-                    new_subscription = Subscription(user_id=user_id, feed_id=feed_id)
-                    session.add(new_subscription)
-                    await session.commit()
-                    logger.info(
-                        f"Подписка на RSS-поток {feed_id} для пользователя {user_id} добавлена.",
-                        correlation_id=correlation_id,
+                feeds = (
+                    await session.execute(
+                        # Обновление без изменений возвращает ID уже существующих
+                        # лент и блокирует их строки до конца транзакции
+                        feeds_insert.on_conflict_do_update(
+                            index_elements=["normalized_url"],
+                            set_={"normalized_url": feeds_insert.excluded.normalized_url},
+                        ).returning(
+                            RssFeed.feed_id,
+                            RssFeed.normalized_url,
+                            literal_column("xmax = 0").label("inserted"),
+                        )
                     )
-                else:
-                    logger.info(
-                        f"Подписка на RSS-поток {feed_id} для пользователя {user_id} уже существует.",
-                        correlation_id=correlation_id,
+                ).all()
+                feed_ids = {feed.normalized_url: feed.feed_id for feed in feeds}
+                result = await session.execute(
+                    insert(Subscription)
+                    .values(
+                        [
+                            {
+                                "user_id": user_id,
+                                "feed_id": feed_ids[normalize_link(feed_url)],
+                            }
+                            for user_id, feed_url in items
+                        ]
                     )
+                    .on_conflict_do_nothing(index_elements=["user_id", "feed_id"])
+                    .returning(Subscription.feed_id, Subscription.user_id)
+                )
+                added = [tuple(row) for row in result.all()]
+
+        AMOUNT_OF_ADDED_RSS_FEEDS.inc(sum(feed.inserted for feed in feeds))
+        logger.info(
+            f"Добавлено подписок: {len(added)} из {len(items)}, "
+            f"новых RSS-потоков: {sum(feed.inserted for feed in feeds)}",
+            correlation_id=correlation_id,
+        )
+        return added
 
     async def handle_add_message(self, message: IncomingMessage):
         with TIME_OF_OPERATION.labels(request_type="handle_add_message").time():
             try:
                 data = json.loads(message.body.decode())
                 correlation_id = data["correlation_id"]
-                feed_url = data["feed_url"]
+                try:
+                    items = subscription_items(data)
+                except ValueError as e:
+                    await self.reject_malformed(message, e, correlation_id)
+                    return
                 logger.info(
-                    f"Получено сообщение о добавлении RSS-потока: {feed_url}",
+                    f"Получено сообщение о добавлении RSS-потоков: "
+                    f"{', '.join(feed_url for _, feed_url in items)}",
                     correlation_id=correlation_id,
                 )
-                feed = await self.add_feed(feed_url, correlation_id)
-                await self.add_subscription(data["user_id"], feed.feed_id, correlation_id)
+                added = await self.add_subscriptions(items, correlation_id)
+                await self.publish_changes(
+                    [("add", feed_id, user_id) for feed_id, user_id in added],
+                    correlation_id,
+                )
                 await message.ack()
             except Exception:
                 ERROR_COUNTER.labels(error_type="handle_add_message").inc()
                 raise
 
+    async def publish_changes(
+        self, changes: list[tuple[str, UUID, int | None]], correlation_id: str
+    ):
+        """
+        Применяет изменения подписок к своему индексу и рассылает их всем
+        репликам: новые посты ленты публикует реплика, которая ею владеет.
+        """
+        if not changes:
+            return
+        self.subscription_index.apply_changes(changes)
+        await self.subscriptions_changed.publish(
+            Message(
+                body=json.dumps(
+                    {
+                        "changes": [
+                            [operation, str(feed_id), user_id]
+                            for operation, feed_id, user_id in changes
+                        ],
+                        "correlation_id": correlation_id,
+                    }
+                ).encode()
+            ),
+            routing_key="",
+        )
+
+    async def handle_subscriptions_changed(self, message: IncomingMessage):
+        """Применяет к индексу изменения подписок, разосланные репликами."""
+        async with message.process():
+            data = json.loads(message.body.decode())
+            # Повторное применение своих же изменений ничего не меняет
+            self.subscription_index.apply_changes(
+                [
+                    (operation, UUID(feed_id), user_id)
+                    for operation, feed_id, user_id in data["changes"]
+                ]
+            )
+            logger.info(
+                f"Применено изменений подписок: {len(data['changes'])}",
+                correlation_id=data["correlation_id"],
+            )
+
     async def get_subscription_urls(self, user_id: int) -> list[str]:
         with TIME_OF_OPERATION.labels(request_type="get_subscription_urls").time():
             async with async_session_factory() as session:
@@ -127,87 +257,105 @@ class RssFeedManager:
                 ERROR_COUNTER.labels(error_type="handle_get_subscriptions").inc()
                 raise
 
-    async def get_feed_by_url(self, feed_url: str) -> RssFeed:
-        with TIME_OF_OPERATION.labels(request_type="get_feed_by_url").time():
-            async with async_session_factory() as session:
-                result = await session.execute(
-                    select(RssFeed).where(RssFeed.url == feed_url)
-                )
-                feed = result.scalar_one_or_none()
-                return feed
+    async def delete_subscriptions(
+        self, items: list[tuple[int, str]], correlation_id: str
+    ) -> tuple[list[tuple[UUID, int, bool]], dict[UUID, tuple[str, str]]]:
+        """
+        Удаляет подписки пачкой и в той же транзакции удаляет ленты, у которых
+        не осталось подписчиков.
 
-    async def delete_feed(self, feed_url: str, correlation_id: str):
-        with TIME_OF_OPERATION.labels(request_type="delete_feed").time():
-            async with async_session_factory() as session:
-                await session.execute(delete(RssFeed).where(RssFeed.url == feed_url))
-                await session.commit()
-                logger.info(f"RSS-поток {feed_url} удален.", correlation_id=correlation_id)
+        Строки лент сначала блокируются: одновременная подписка на ту же ленту
+        либо завершится раньше и будет видна запросу удаления, либо дождётся
+        его и создаст ленту заново.
 
-    async def get_amount_of_subscriptions(self, feed_id: UUID) -> int:
-        with TIME_OF_OPERATION.labels(request_type="get_amount_of_subscriptions").time():
-            async with async_session_factory() as session:
+        Возвращает тройки (feed_id, user_id, лента удалена) и хабы WebSub
+        удалённых лент в виде {feed_id: (хаб, топик)}.
+        """
+        with TIME_OF_OPERATION.labels(request_type="delete_subscriptions").time():
+            urls = [normalize_link(feed_url) for _, feed_url in items]
+            async with async_session_factory() as session, session.begin():
+                await session.execute(
+                    select(RssFeed.feed_id)
+                    .where(RssFeed.normalized_url.in_(set(urls)))
+                    .order_by(RssFeed.feed_id)
+                    .with_for_update()
+                )
                 result = await session.execute(
-                    select(func.count(Subscription.subscription_id)).where(
-                        Subscription.feed_id == feed_id
-                    )
+                    DELETE_SUBSCRIPTIONS,
+                    {"user_ids": [user_id for user_id, _ in items], "urls": urls},
                 )
-                amount = result.scalar_one_or_none()
-                return amount
+                rows = result.all()
+        removed = [(row.feed_id, row.user_id, row.feed_deleted) for row in rows]
+        hubs = {
+            row.feed_id: (row.websub_hub, row.websub_topic)
+            for row in rows
+            if row.feed_deleted and row.websub_hub
+        }
 
-    async def delete_subscription(
-        self, user_id: int, feed_url: str, correlation_id: str
-    ):
-        with TIME_OF_OPERATION.labels(request_type="delete_subscription").time():
-            async with async_session_factory() as session:
-                feed = await self.get_feed_by_url(feed_url)
-                if not feed:
-                    ERROR_COUNTER.labels(error_type="feed_not_found").inc()
-                    logger.error(
-                        f"RSS-поток с URL {feed_url} не найден.",
-                        correlation_id=correlation_id,
-                    )
-                    return  # Выход из метода, так как поток не существует
+        logger.info(
+            f"Удалено подписок: {len(removed)} из {len(items)}, RSS-потоков: "
+            f"{len({feed_id for feed_id, _, deleted in removed if deleted})}",
+            correlation_id=correlation_id,
+        )
+        return removed, hubs
 
-                subscription = await session.execute(
-                    select(Subscription).where(
-                        Subscription.user_id == user_id,
-                        Subscription.feed_id == feed.feed_id,
-                    )
+    async def unsubscribe_from_hubs(
+        self, hubs: dict[UUID, tuple[str, str]], correlation_id: str
+    ):
+        """
+        Отписывает удалённые ленты от хабов WebSub, чтобы те перестали слать
+        уведомления. Ошибка отписки не мешает удалению: хаб сам прекратит
+        доставку по истечении аренды или после ответа 410.
+        """
+        if not WEBSUB_CALLBACK_URL:
+            return
+        for feed_id, (hub_url, topic) in hubs.items():
+            try:
+                accepted = await request_subscription(
+                    get_http_session(),
+                    hub_url,
+                    topic,
+                    callback_url(WEBSUB_CALLBACK_URL, feed_id),
+                    mode="unsubscribe",
+                )
+            except Exception as e:
+                ERROR_COUNTER.labels(error_type="websub_unsubscribe_error").inc()
+                logger.error(
+                    f"Ошибка при отписке от хаба {hub_url}: {e}",
+                    correlation_id=correlation_id,
+                )
+                continue
+            if not accepted:
+                ERROR_COUNTER.labels(error_type="websub_unsubscribe_error").inc()
+                logger.warning(
+                    f"Хаб {hub_url} не принял отписку от {topic}",
+                    correlation_id=correlation_id,
                 )
-                if subscription.scalar_one_or_none():
-                    await session.execute(
-                        delete(Subscription).where(
-                            Subscription.user_id == user_id,
-                            Subscription.feed_id == feed.feed_id,
-                        )
-                    )
-                    await session.commit()
-                    logger.info(
-                        f"Подписка на RSS-поток {feed_url} для пользователя {user_id} удалена.",
-                        correlation_id=correlation_id,
-                    )
-                else:
-                    logger.info(
-                        f"Подписка на RSS-поток {feed_url} для пользователя {user_id} не найдена.",
-                        correlation_id=correlation_id,
-                    )
-
-                # Проверка, остались ли подписки на поток
-                if await self.get_amount_of_subscriptions(feed.feed_id) == 0:
-                    await self.delete_feed(feed_url, correlation_id)
 
     async def handle_delete_message(self, message: IncomingMessage):
         with TIME_OF_OPERATION.labels(request_type="handle_delete_message").time():
             try:
                 data = json.loads(message.body.decode())
-                feed_url = data["feed_url"]
-                user_id = data["user_id"]
                 correlation_id = data["correlation_id"]
-                await self.delete_subscription(user_id, feed_url, correlation_id)
-                logger.info(
-                    f"Подписка на RSS-поток {feed_url} для пользователя {user_id} удалена.",
-                    correlation_id=correlation_id,
+                try:
+                    items = subscription_items(data)
+                except ValueError as e:
+                    await self.reject_malformed(message, e, correlation_id)
+                    return
+                removed, hubs = await self.delete_subscriptions(items, correlation_id)
+                await self.publish_changes(
+                    [
+                        ("drop", feed_id, None) if feed_deleted else ("remove", feed_id, user_id)
+                        for feed_id, user_id, feed_deleted in removed
+                    ],
+                    correlation_id,
                 )
+                await self.unsubscribe_from_hubs(hubs, correlation_id)
+                for user_id, feed_url in items:
+                    logger.info(
+                        f"Подписка на RSS-поток {feed_url} для пользователя {user_id} удалена.",
+                        correlation_id=correlation_id,
+                    )
                 await message.ack()
             except Exception:
                 ERROR_COUNTER.labels(error_type="handle_delete_message").inc()
@@ -1,4 +1,4 @@
-from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
 
 rss_manager_registry = CollectorRegistry()
 
@@ -14,6 +14,12 @@ AMOUNT_OF_ADDED_RSS_FEEDS = Counter(
     registry=rss_manager_registry,
 )
 
+NOT_MODIFIED_FEEDS = Counter(
+    "not_modified_feeds",
+    "Количество проверок RSS-каналов без изменений",
+    registry=rss_manager_registry,
+)
+
 TIME_OF_OPERATION = Histogram(
     "time_of_operation",
     "Время выполнения запроса",
@@ -28,3 +34,110 @@ ERROR_COUNTER = Counter(
     registry=rss_manager_registry,
     labelnames=["error_type"],
 )
+
+SCHEDULED_FEEDS = Gauge(
+    "scheduled_feeds",
+    "Количество RSS-каналов в расписании опросов",
+    registry=rss_manager_registry,
+)
+
+FEED_POLL_INTERVAL = Histogram(
+    "feed_poll_interval_seconds",
+    "Интервал до следующего опроса RSS-канала",
+    registry=rss_manager_registry,
+    buckets=[60, 120, 300, 600, 900, 1800, 3600, 7200, 14400, 21600, 43200, 86400],
+)
+
+INDEXED_SUBSCRIPTIONS = Gauge(
+    "indexed_subscriptions",
+    "Количество подписок в индексе в памяти",
+    registry=rss_manager_registry,
+)
+
+ARTICLE_CACHE_HITS = Counter(
+    "article_cache_hits",
+    "Количество попаданий в кэш текста статей",
+    registry=rss_manager_registry,
+    labelnames=["result"],
+)
+
+ARTICLE_CACHE_MISSES = Counter(
+    "article_cache_misses",
+    "Количество промахов кэша текста статей",
+    registry=rss_manager_registry,
+)
+
+LIVE_WORKERS = Gauge(
+    "live_workers",
+    "Количество живых реплик, опрашивающих RSS-каналы",
+    registry=rss_manager_registry,
+)
+
+FEEDS_IN_BACKOFF = Gauge(
+    "feeds_in_backoff",
+    "Количество RSS-каналов с открытым или полуоткрытым предохранителем",
+    registry=rss_manager_registry,
+    labelnames=["state"],
+)
+
+WEBSUB_NOTIFICATIONS = Counter(
+    "websub_notifications",
+    "Количество уведомлений WebSub по результату обработки",
+    registry=rss_manager_registry,
+    labelnames=["result"],
+)
+
+PUSH_SUBSCRIBED_FEEDS = Gauge(
+    "push_subscribed_feeds",
+    "Количество RSS-каналов с активной подпиской WebSub",
+    registry=rss_manager_registry,
+)
+
+POST_PARTITIONS_REMOVED = Counter(
+    "post_partitions_removed",
+    "Количество удалённых месячных секций постов",
+    registry=rss_manager_registry,
+    labelnames=["action"],
+)
+
+PIPELINE_STAGE_DURATION = Histogram(
+    "pipeline_stage_duration",
+    "Время обработки элемента на стадии конвейера RSS",
+    registry=rss_manager_registry,
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120],
+    labelnames=["stage"],
+)
+
+PIPELINE_QUEUE_WAIT = Histogram(
+    "pipeline_queue_wait",
+    "Время ожидания элемента в очереди стадии конвейера RSS",
+    registry=rss_manager_registry,
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120],
+    labelnames=["stage"],
+)
+
+PIPELINE_QUEUE_SIZE = Gauge(
+    "pipeline_queue_size",
+    "Количество элементов в очереди стадии конвейера RSS",
+    registry=rss_manager_registry,
+    labelnames=["stage"],
+)
+
+STALE_ENTRIES = Counter(
+    "stale_entries",
+    "Количество записей RSS старше окна свежести, сохранённых только для дедупликации",
+    registry=rss_manager_registry,
+)
+
+OUTBOX_PUBLISHED = Counter(
+    "outbox_published_messages",
+    "Количество сообщений, опубликованных ретранслятором исходящих сообщений",
+    registry=rss_manager_registry,
+)
+
+OUTBOX_DELAY = Histogram(
+    "outbox_delay_seconds",
+    "Время от записи сообщения в таблицу исходящих до подтверждения брокера",
+    buckets=[0.1, 0.5, 1, 2, 5, 10, 30, 60, 300],
+    registry=rss_manager_registry,
+)
@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import delete, select
+
+from claim_check import store_post
+from logger_setup import generate_correlation_id, setup_logger
+from services.rss_manager.config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_POLL_SECONDS,
+    async_session_factory,
+    redis,
+)
+from services.rss_manager.database.models import OutboxMessage
+from services.rss_manager.metrics import (
+    ERROR_COUNTER,
+    OUTBOX_DELAY,
+    OUTBOX_PUBLISHED,
+    TIME_OF_OPERATION,
+)
+from services.rss_manager.publisher import RabbitPublisher
+
+logger = setup_logger(__name__)
+
+NEW_POSTS_ROUTING_KEY = "rss.new_posts"
+# Поля сообщения о новом посте, которые хранятся в Redis один раз на пост
+POST_FIELDS = ["published_at", "feed_url", "post_title", "post_link", "post_content"]
+
+
+class OutboxRelay:
+    """
+    Ретранслятор таблицы исходящих сообщений rss_outbox в RabbitMQ.
+
+    Сообщения пачки блокируются через FOR UPDATE SKIP LOCKED, поэтому
+    реплики разбирают таблицу параллельно, не пересекаясь. Строки удаляются
+    той же транзакцией только после подтверждения брокера; при сбое между
+    подтверждением и фиксацией сообщение будет опубликовано повторно с тем же
+    message_id, по которому content_validator отбрасывает повтор.
+
+    Если Redis доступен, сообщение о новом посте публикуется по схеме
+    claim-check: пост сохраняется в Redis один раз, подписчики — частями
+    фиксированного размера, а в RabbitMQ уходит по сообщению на часть,
+    содержащему только идентификатор поста и ключ части подписчиков.
+    """
+
+    def __init__(
+        self,
+        publisher: RabbitPublisher,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_SECONDS,
+    ):
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.session_factory = async_session_factory
+        self.redis = redis
+        self.wakeup = asyncio.Event()
+
+    def notify(self):
+        """Сообщает, что в таблице появились новые сообщения."""
+        self.wakeup.set()
+
+    async def prepare(self, message: OutboxMessage) -> list[tuple[dict, str]]:
+        """Сообщения брокера с их идентификаторами для одной строки таблицы."""
+        payload = message.payload
+        if message.routing_key != NEW_POSTS_ROUTING_KEY or self.redis is None:
+            return [(payload, str(message.message_id))]
+        keys = await store_post(
+            self.redis,
+            payload["post_id"],
+            {field: payload[field] for field in POST_FIELDS},
+            payload["feed_subscribers"],
+        )
+        return [
+            (
+                {
+                    "post_id": payload["post_id"],
+                    "subscribers_key": key,
+                    "correlation_id": payload["correlation_id"],
+                },
+                f"{message.message_id}:{index}",
+            )
+            for index, key in enumerate(keys)
+        ]
+
+    async def relay_batch(self) -> int:
+        """Публикует одну пачку сообщений и возвращает её размер."""
+        async with self.session_factory() as session:
+            messages = (
+                await session.execute(
+                    select(OutboxMessage)
+                    .order_by(OutboxMessage.message_id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            ).scalars().all()
+            if not messages:
+                return 0
+            with TIME_OF_OPERATION.labels(request_type="relay_outbox").time():
+                by_routing_key: dict[str, list[tuple[dict, str]]] = {}
+                for message in messages:
+                    by_routing_key.setdefault(message.routing_key, []).extend(
+                        await self.prepare(message)
+                    )
+                for routing_key, batch in by_routing_key.items():
+                    await self.publisher.publish_batch(
+                        routing_key,
+                        [payload for payload, _ in batch],
+                        [message_id for _, message_id in batch],
+                    )
+                await session.execute(
+                    delete(OutboxMessage).where(
+                        OutboxMessage.message_id.in_(
+                            [message.message_id for message in messages]
+                        )
+                    )
+                )
+                await session.commit()
+        now = datetime.now()
+        for message in messages:
+            OUTBOX_DELAY.observe((now - message.created_at).total_seconds())
+        OUTBOX_PUBLISHED.inc(len(messages))
+        return len(messages)
+
+    async def run(self):
+        """Разбирает таблицу, пока в ней есть сообщения, затем ждёт новых."""
+        while True:
+            # Сбрасываем до разбора: сообщения, записанные во время разбора,
+            # разбудят ретранслятор сразу
+            self.wakeup.clear()
+            try:
+                while await self.relay_batch() == self.batch_size:
+                    pass
+            except Exception as e:
+                ERROR_COUNTER.labels(error_type="outbox_relay_error").inc()
+                logger.error(
+                    f"Ошибка при публикации исходящих сообщений: {e}",
+                    correlation_id=generate_correlation_id(),
+                )
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,68 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from services.rss_manager.metrics import (
+    ERROR_COUNTER,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_QUEUE_WAIT,
+    PIPELINE_STAGE_DURATION,
+)
+
+
+class Stage:
+    """
+    Стадия конвейера: ограниченная очередь и фиксированное число обработчиков.
+
+    Заполненная очередь останавливает предыдущую стадию, поэтому медленная
+    стадия не накапливает неограниченную работу. Время ожидания в очереди и
+    время обработки учитываются отдельно, чтобы было видно, где теряется время.
+    Ошибка обработчика передаётся в асинхронный ``on_error`` вместе с
+    элементом, чтобы владелец конвейера завершил связанную с ним работу.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[object], Awaitable[None]],
+        concurrency: int,
+        queue_size: int,
+        on_error: Callable[[object, Exception], Awaitable[None]],
+    ):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.on_error = on_error
+        self.queue: asyncio.Queue[tuple[float, object]] = asyncio.Queue(queue_size)
+        self.workers: list[asyncio.Task] = []
+
+    async def put(self, item):
+        await self.queue.put((time.monotonic(), item))
+        PIPELINE_QUEUE_SIZE.labels(stage=self.name).set(self.queue.qsize())
+
+    def start(self):
+        self.workers = [
+            asyncio.create_task(self.work()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def work(self):
+        while True:
+            queued_at, item = await self.queue.get()
+            PIPELINE_QUEUE_SIZE.labels(stage=self.name).set(self.queue.qsize())
+            PIPELINE_QUEUE_WAIT.labels(stage=self.name).observe(
+                time.monotonic() - queued_at
+            )
+            try:
+                with PIPELINE_STAGE_DURATION.labels(stage=self.name).time():
+                    await self.handler(item)
+            except Exception as e:
+                ERROR_COUNTER.labels(error_type=f"{self.name}_stage_error").inc()
+                await self.on_error(item, e)
+            finally:
+                self.queue.task_done()
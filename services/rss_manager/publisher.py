@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import aio_pika
+from aio_pika.abc import AbstractRobustChannel, AbstractRobustConnection
+from aio_pika.pool import Pool
+
+from logger_setup import setup_logger
+from services.rss_manager.config import (
+    RABBITMQ_PUBLISHER_CHANNELS,
+    get_rabbit_connection,
+)
+from services.rss_manager.metrics import ERROR_COUNTER, TIME_OF_OPERATION
+
+logger = setup_logger(__name__)
+
+
+class RabbitPublisher:
+    """
+    Долгоживущий издатель RabbitMQ.
+
+    Использует одно устойчивое соединение и небольшой пул каналов с
+    подтверждениями публикации. Сообщения пачки публикуются параллельно,
+    поэтому брокер подтверждает их вместе.
+    """
+
+    def __init__(self, pool_size: int = RABBITMQ_PUBLISHER_CHANNELS):
+        self.pool_size = pool_size
+        self.connection: AbstractRobustConnection | None = None
+        self.channels: Pool[AbstractRobustChannel] | None = None
+        self.declared_queues: set[str] = set()
+        self.declare_lock = asyncio.Lock()
+
+    async def start(self):
+        self.connection = await get_rabbit_connection()
+        self.channels = Pool(self._create_channel, max_size=self.pool_size)
+
+    async def _create_channel(self) -> AbstractRobustChannel:
+        return await self.connection.channel(publisher_confirms=True)
+
+    async def declare_queue(self, channel: AbstractRobustChannel, routing_key: str):
+        """Объявляет очередь один раз за время жизни издателя."""
+        async with self.declare_lock:
+            if routing_key not in self.declared_queues:
+                await channel.declare_queue(routing_key, durable=True)
+                self.declared_queues.add(routing_key)
+
+    async def publish_batch(
+        self,
+        routing_key: str,
+        payloads: list[dict],
+        message_ids: list[str] | None = None,
+    ):
+        """
+        Публикует пачку сообщений и ждёт подтверждения брокера для всех.
+        Идентификаторы сообщений позволяют получателям отсеять повторы.
+        """
+        if not payloads:
+            return
+        with TIME_OF_OPERATION.labels(request_type="publish_batch").time():
+            async with self.channels.acquire() as channel:
+                await self.declare_queue(channel, routing_key)
+                results = await asyncio.gather(
+                    *(
+                        channel.default_exchange.publish(
+                            aio_pika.Message(
+                                body=json.dumps(payload).encode(),
+                                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                                message_id=message_id,
+                            ),
+                            routing_key=routing_key,
+                        )
+                        for payload, message_id in zip(
+                            payloads, message_ids or [None] * len(payloads), strict=True
+                        )
+                    ),
+                    return_exceptions=True,
+                )
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            ERROR_COUNTER.labels(error_type="publish_error").inc(len(errors))
+            raise errors[0]
+
+    async def publish(self, routing_key: str, payload: dict):
+        await self.publish_batch(routing_key, [payload])
+
+    async def close(self):
+        if self.channels is not None:
+            await self.channels.close()
+        if self.connection is not None:
+            await self.connection.close()
@@ -0,0 +1,208 @@
+import asyncio
+import gzip
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, text
+
+from logger_setup import generate_correlation_id, setup_logger
+from services.rss_manager.config import (
+    ENTRY_KEY_RETENTION_DAYS,
+    PARTITIONS_AHEAD_MONTHS,
+    POST_RETENTION_MONTHS,
+    POSTS_ARCHIVE_DIR,
+    SECONDS_BETWEEN_RETENTION_RUNS,
+    engine,
+)
+from services.rss_manager.database.migrations import MIGRATIONS_LOCK_ID
+from services.rss_manager.database.models import RssEntryKey
+from services.rss_manager.database.partitions import (
+    DEFAULT_PARTITION,
+    ensure_partitions,
+    list_partitions,
+)
+from services.rss_manager.metrics import (
+    ERROR_COUNTER,
+    POST_PARTITIONS_REMOVED,
+    TIME_OF_OPERATION,
+)
+from services.rss_manager.utils.partitions import (
+    add_months,
+    expired_partitions,
+    month_start,
+)
+
+logger = setup_logger(__name__)
+
+
+class PostRetention:
+    """
+    Обслуживание секций rss_posts.
+
+    Заранее создаёт секции будущих месяцев, выгружает секции старше срока
+    хранения и такие же посты секции по умолчанию в сжатые CSV-файлы (если
+    задан каталог архива) и удаляет их, а также удаляет устаревшие ключи
+    записей.
+    """
+
+    def __init__(
+        self,
+        retention_months: int = POST_RETENTION_MONTHS,
+        key_retention_days: int = ENTRY_KEY_RETENTION_DAYS,
+        archive_dir: str | None = POSTS_ARCHIVE_DIR,
+        months_ahead: int = PARTITIONS_AHEAD_MONTHS,
+    ):
+        self.retention_months = retention_months
+        self.key_retention = timedelta(days=key_retention_days)
+        self.archive_dir = archive_dir
+        self.months_ahead = months_ahead
+        self.engine = engine
+
+    async def archive(self, connection, name: str, query: str, *args) -> str:
+        """
+        Выгружает результат запроса в gzip-файл CSV с именем ``name`` и
+        возвращает путь к нему. Сжатие и запись выполняются в потоке, чтобы
+        не блокировать цикл событий.
+        """
+        await asyncio.to_thread(os.makedirs, self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{name}.csv.gz")
+        # Файл появляется под итоговым именем только после полной выгрузки
+        partial_path = f"{path}.part"
+        raw_connection = await connection.get_raw_connection()
+        archive = await asyncio.to_thread(gzip.open, partial_path, "wb")
+        try:
+
+            async def write(chunk: bytes):
+                await asyncio.to_thread(archive.write, chunk)
+
+            await raw_connection.driver_connection.copy_from_query(
+                query, *args, output=write, format="csv", header=True
+            )
+        finally:
+            await asyncio.to_thread(archive.close)
+        await asyncio.to_thread(os.replace, partial_path, path)
+        return path
+
+    async def archive_partition(self, connection, name: str) -> str:
+        """Выгружает секцию в gzip-файл CSV и возвращает путь к нему."""
+        return await self.archive(connection, name, f"SELECT * FROM {name}")  # noqa: S608
+
+    async def purge_default_partition(
+        self, connection, cutoff: datetime, now: datetime, correlation_id: str
+    ):
+        """
+        Удаляет из секции по умолчанию посты старше ``cutoff``. Если задан
+        каталог архива, строки выгружаются тем же запросом DELETE ... RETURNING,
+        поэтому удаляется ровно то, что попало в архив.
+        """
+        params = {"cutoff": cutoff}
+        if not self.archive_dir:
+            await connection.execute(
+                text(f"DELETE FROM {DEFAULT_PARTITION} WHERE published_at < :cutoff"),  # noqa: S608
+                params,
+            )
+            return
+        expired = (
+            await connection.execute(
+                text(
+                    f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "  # noqa: S608
+                    "WHERE published_at < :cutoff)"
+                ),
+                params,
+            )
+        ).scalar()
+        # Выгрузка идёт вне транзакции SQLAlchemy и фиксируется сама
+        await connection.commit()
+        if not expired:
+            return
+        path = await self.archive(
+            connection,
+            f"{DEFAULT_PARTITION}_{now:%Y%m%d%H%M%S}",
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE published_at < $1 RETURNING *",  # noqa: S608
+            cutoff,
+        )
+        logger.info(
+            f"Устаревшие посты секции {DEFAULT_PARTITION} выгружены в {path}",
+            correlation_id=correlation_id,
+        )
+
+    async def remove_partition(self, connection, name: str, correlation_id: str):
+        action = "dropped"
+        if self.archive_dir:
+            path = await self.archive_partition(connection, name)
+            action = "archived"
+            logger.info(
+                f"Секция {name} выгружена в {path}", correlation_id=correlation_id
+            )
+        await connection.execute(
+            text(f"ALTER TABLE rss_posts DETACH PARTITION {name}")
+        )
+        await connection.execute(text(f"DROP TABLE {name}"))
+        await connection.commit()
+        POST_PARTITIONS_REMOVED.labels(action=action).inc()
+        logger.info(f"Секция {name} удалена", correlation_id=correlation_id)
+
+    async def run_once(self):
+        correlation_id = generate_correlation_id()
+        with TIME_OF_OPERATION.labels(request_type="post_retention").time():
+            # Отдельное соединение нужно, чтобы блокировка уровня сеанса
+            # снималась на том же соединении, где была взята
+            async with self.engine.connect() as connection:
+                # Та же блокировка, что и у миграций: секции меняет одна реплика
+                locked = (
+                    await connection.execute(
+                        text("SELECT pg_try_advisory_lock(:id)"),
+                        {"id": MIGRATIONS_LOCK_ID},
+                    )
+                ).scalar()
+                await connection.commit()
+                if not locked:
+                    return  # Обслуживанием занята другая реплика
+                try:
+                    await self.maintain(connection, correlation_id)
+                finally:
+                    await connection.rollback()
+                    await connection.execute(
+                        text("SELECT pg_advisory_unlock(:id)"),
+                        {"id": MIGRATIONS_LOCK_ID},
+                    )
+                    await connection.commit()
+
+    async def maintain(self, connection, correlation_id: str):
+        now = datetime.now()
+        month = month_start(now)
+        await ensure_partitions(
+            connection, month, add_months(month, self.months_ahead)
+        )
+        await connection.commit()
+
+        # Каждая секция удаляется отдельной транзакцией, чтобы не держать
+        # блокировку rss_posts дольше необходимого
+        partitions = await list_partitions(connection)
+        for name in expired_partitions(partitions, now, self.retention_months):
+            await self.remove_partition(connection, name, correlation_id)
+
+        await self.purge_default_partition(
+            connection, add_months(month, -self.retention_months), now, correlation_id
+        )
+        result = await connection.execute(
+            delete(RssEntryKey).where(RssEntryKey.first_seen_at < now - self.key_retention)
+        )
+        await connection.commit()
+        logger.info(
+            f"Удалено устаревших ключей записей: {result.rowcount}",
+            correlation_id=correlation_id,
+        )
+
+    async def run(self, interval: float = SECONDS_BETWEEN_RETENTION_RUNS):
+        """Периодически обслуживает секции постов."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                ERROR_COUNTER.labels(error_type="post_retention_error").inc()
+                logger.error(
+                    f"Ошибка при обслуживании секций постов: {e}",
+                    correlation_id=generate_correlation_id(),
+                )
+            await asyncio.sleep(interval)
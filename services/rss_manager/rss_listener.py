@@ -1,185 +1,602 @@
 import asyncio
-import json
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
 
-import aio_pika
 import aiohttp
-import feedparser
-from sqlalchemy import select
+from sqlalchemy import exists, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from http_client import get_http_session, request_timeout
 from logger_setup import generate_correlation_id, setup_logger
-from services.rss_manager.config import async_session_factory, get_rabbit_connection
-from services.rss_manager.database.models import RssFeed, RssPost, Subscription
+from services.rss_manager.config import (
+    FEED_BACKOFF_BASE_SECONDS,
+    FEED_BACKOFF_MAX_SECONDS,
+    PIPELINE_ENRICH_WORKERS,
+    PIPELINE_FETCH_WORKERS,
+    PIPELINE_FILTER_WORKERS,
+    PIPELINE_PARSE_WORKERS,
+    PIPELINE_PERSIST_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+    POST_FRESHNESS_HOURS,
+    POSTS_COPY_THRESHOLD,
+    RSS_PARSER_PROCESSES,
+    async_session_factory,
+)
+from services.rss_manager.database.bulk import claim_entry_keys, copy_posts
+from services.rss_manager.database.models import (
+    OutboxMessage,
+    RssEntryKey,
+    RssFeed,
+    RssPost,
+)
 from services.rss_manager.metrics import (
     AMOUNT_OF_POSTS,
     ERROR_COUNTER,
+    NOT_MODIFIED_FEEDS,
+    STALE_ENTRIES,
     TIME_OF_OPERATION,
 )
+from services.rss_manager.outbox import NEW_POSTS_ROUTING_KEY, OutboxRelay
+from services.rss_manager.pipeline import Stage
+from services.rss_manager.subscription_index import SubscriptionIndex
+from services.rss_manager.utils.entries import is_fresh
+from services.rss_manager.utils.feed_parser import ParsedEntry, ParsedFeed, parse_feed
+from services.rss_manager.utils.host_limiter import host_limiter
+from services.rss_manager.utils.polling import (
+    CACHE_VALIDATORS,
+    NOT_MODIFIED_STATUS_CODE,
+    FeedResponse,
+    compare_response,
+    conditional_headers,
+    failure_backoff,
+    parse_max_age,
+    parse_retry_after,
+    parse_ttl,
+)
 from services.rss_manager.utils.web_parser import fetch_article_text
 
 logger = setup_logger(__name__)
 
+try:
+    import brotli  # noqa: F401
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:  # aiohttp распаковывает br только при установленном brotli
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Записи с более коротким описанием дополняются текстом статьи
+MIN_CONTENT_LENGTH = 150
+
+
+@dataclass
+class PollResult:
+    """Сведения об опросе ленты, по которым планировщик выбирает следующий опрос."""
+
+    changed: bool
+    entry_dates: list[datetime] = field(default_factory=list)
+    ttl: int | None = None
+    max_age: int | None = None
+    # Пауза до следующей попытки, если лента недоступна
+    retry_after: float | None = None
+    # Новые записи доставляет хаб WebSub, опрос нужен лишь как страховка
+    push_active: bool = False
+
+
+@dataclass
+class FeedJob:
+    """Лента, проходящая через конвейер, и данные, накопленные его стадиями."""
+
+    feed_id: UUID
+    feed_url: str
+    correlation_id: str
+    done: asyncio.Future
+    body: bytes | None = None
+    last_post_date: datetime | None = None
+    # Изменения полей ленты, которые сохраняются вместе с постами
+    updates: dict = field(default_factory=dict)
+    result: PollResult = field(default_factory=lambda: PollResult(changed=True))
+    entries: list[ParsedEntry] = field(default_factory=list)
+    rows: list[dict] = field(default_factory=list)
+    # Ключи записей, которые запоминаются только для дедупликации
+    dedup_keys: list[str] = field(default_factory=list)
+    # Записи, ожидающие загрузки текста статьи
+    pending: int = 0
+    # Записи, для которых не удалось загрузить текст статьи
+    failed: int = 0
+
 
 class RSSListener:
-    def __init__(self, max_concurrent=5):
+    """
+    Конвейер обработки RSS-лент.
+
+    Стадии fetch → parse → filter → enrich → persist связаны
+    ограниченными очередями, у каждой своё число обработчиков. Загрузка
+    текстов статей идёт параллельно по записям всех лент, а сессия базы
+    данных для записи открывается только на стадии persist.
+    """
+
+    def __init__(
+        self,
+        subscription_index: SubscriptionIndex,
+        outbox: OutboxRelay,
+    ):
         """
-        :param session_factory: фабрика асинхронных сессий (async_sessionmaker)
-        :param max_concurrent: максимальное число одновременных запросов к RSS
+        :param subscription_index: индекс подписчиков RSS-лент в памяти
+        :param outbox: ретранслятор исходящих сообщений о новых постах
         """
         self.session_factory = async_session_factory
-        self.subscribers_ids = {}
-        self.semaphore = asyncio.Semaphore(max_concurrent)
-
-    async def get_subscribers(self, feed_url: str) -> list[int]:
-        """Получает список ID пользователей, подписанных на RSS-ленту."""
-        with TIME_OF_OPERATION.labels(request_type="get_subscribers").time():
-            async with self.session_factory() as session:
-                result = await session.execute(
-                    select(Subscription.user_id)
-                    .join(RssFeed, Subscription.feed_id == RssFeed.feed_id)
-                    .where(RssFeed.url == feed_url)
-                )
-                return result.scalars().all()
+        self.subscription_index = subscription_index
+        self.outbox = outbox
+        # Разбор лент нагружает CPU, поэтому выполняется вне цикла событий
+        self.parser_pool = ProcessPoolExecutor(max_workers=RSS_PARSER_PROCESSES)
+        self.freshness_window = timedelta(hours=POST_FRESHNESS_HOURS)
+        self.stages = {
+            name: Stage(name, handler, workers, PIPELINE_QUEUE_SIZE, self.fail_job)
+            for name, handler, workers in [
+                ("fetch", self.fetch_stage, PIPELINE_FETCH_WORKERS),
+                ("parse", self.parse_stage, PIPELINE_PARSE_WORKERS),
+                ("filter", self.filter_stage, PIPELINE_FILTER_WORKERS),
+                ("enrich", self.enrich_stage, PIPELINE_ENRICH_WORKERS),
+                ("persist", self.persist_stage, PIPELINE_PERSIST_WORKERS),
+            ]
+        }
+
+    def start(self):
+        for stage in self.stages.values():
+            stage.start()
+
+    async def close(self):
+        for stage in self.stages.values():
+            await stage.stop()
+        self.parser_pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def finish(job: FeedJob, result: PollResult | None):
+        if not job.done.done():
+            job.done.set_result(result)
+
+    async def fail_job(self, item, error: Exception):
+        """
+        Завершает обработку ленты после ошибки стадии. Сбой разбора или
+        записи учитывается предохранителем так же, как сбой загрузки, иначе
+        битая лента опрашивалась бы без паузы.
+        """
+        job = item[0] if isinstance(item, tuple) else item
+        if job.done.done():
+            return
+        logger.error(
+            f"Ошибка при обработке RSS-потока {job.feed_url}: {error}",
+            correlation_id=job.correlation_id,
+        )
+        try:
+            job.result.retry_after = await self.record_feed_failure(
+                job.feed_id, error, datetime.now()
+            )
+        except Exception as e:
+            ERROR_COUNTER.labels(error_type="record_failure_error").inc()
+            logger.error(
+                f"Не удалось зафиксировать сбой RSS-потока {job.feed_url}: {e}",
+                correlation_id=job.correlation_id,
+            )
+            job.done.set_exception(error)
+            return
+        job.result.changed = False
+        self.finish(job, job.result)
+
+    async def parse_feed(self, body: bytes) -> ParsedFeed:
+        """Разбирает ленту в пуле процессов."""
+        with TIME_OF_OPERATION.labels(request_type="parse_feed").time():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.parser_pool, parse_feed, body)
+
+    async def fetch_rss_content(
+        self, url: str, etag: str | None = None, last_modified: str | None = None
+    ) -> FeedResponse:
+        """
+        Асинхронно скачивает содержимое RSS по URL.
+
+        Передаёт сохранённые ETag и Last-Modified, чтобы сервер мог ответить
+        304 без тела, если лента не изменилась.
+        """
+        headers = {
+            "Accept-Encoding": ACCEPT_ENCODING,
+            **conditional_headers(etag, last_modified),
+        }
 
-    async def fetch_rss_content(self, url: str) -> str:
-        """Асинхронно скачивает содержимое RSS по URL."""
         with TIME_OF_OPERATION.labels(request_type="fetch_rss_content").time():
-            async with self.semaphore:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=30) as response:
-                        response.raise_for_status()
-                        self.subscribers_ids[url] = await self.get_subscribers(url)
-                        return await response.text()
-
-    async def fetch_and_update_feed(self, feed: RssFeed):
-        """
-        Забирает RSS поток, парсит его и добавляет новые посты в базу данных,
-        если они новее последнего зафиксированного поста.
-        """
-        correlation_id = generate_correlation_id()
-        connection = await get_rabbit_connection()
-        channel = await connection.channel()
-        await channel.declare_queue("rss.new_posts", durable=True)
-        logger.info(f"Проверка RSS-потока {feed.url}", correlation_id=correlation_id)
+            async with host_limiter.limit(url):
+                session = get_http_session()
+                async with session.get(
+                    url, headers=headers, timeout=request_timeout(30)
+                ) as response:
+                    cache_control = response.headers.get("Cache-Control")
+                    if response.status == NOT_MODIFIED_STATUS_CODE:
+                        return FeedResponse(
+                            status=response.status, cache_control=cache_control
+                        )
+                    response.raise_for_status()
+                    return FeedResponse(
+                        status=response.status,
+                        body=await response.read(),
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified"),
+                        cache_control=cache_control,
+                    )
+
+    @staticmethod
+    def record_failure(db_feed: RssFeed, error: Exception, now: datetime) -> float:
+        """
+        Фиксирует неудачный опрос и открывает предохранитель на время
+        экспоненциальной паузы (не меньше Retry-After сервера).
+        """
+        db_feed.failure_count = (db_feed.failure_count or 0) + 1
+        backoff = failure_backoff(
+            db_feed.failure_count, FEED_BACKOFF_BASE_SECONDS, FEED_BACKOFF_MAX_SECONDS
+        )
+        if isinstance(error, aiohttp.ClientResponseError) and error.headers:
+            backoff = max(backoff, parse_retry_after(error.headers.get("Retry-After")) or 0)
+        db_feed.last_failure_at = now
+        db_feed.next_retry_at = now + timedelta(seconds=backoff)
+        return backoff
+
+    async def record_feed_failure(
+        self, feed_id: UUID, error: Exception, now: datetime
+    ) -> float | None:
+        """
+        Фиксирует сбой в отдельной транзакции. Возвращает паузу до пробного
+        опроса или None, если лента удалена.
+        """
         async with self.session_factory() as session:
-            # Получаем актуальный feed из БД (на случай изменения пока шёл запрос)
-            db_feed = await session.get(RssFeed, feed.feed_id)
+            db_feed = await session.get(RssFeed, feed_id)
             if db_feed is None:
-                logger.info(
-                    f"RSS-поток {feed.url} не найден", correlation_id=correlation_id
-                )
-                return  # Лента могла быть удалена
-
-            try:
-                content = await self.fetch_rss_content(db_feed.url)
-            except Exception as e:
-                ERROR_COUNTER.labels(error_type="fetch_rss_error").inc()
-                logger.error(
-                    f"Ошибка при получении RSS-потока {feed.url}: {e}",
-                    correlation_id=correlation_id,
-                )
-                return
+                return None
+            backoff = self.record_failure(db_feed, error, now)
+            await session.commit()
+            return backoff
 
-            parsed = feedparser.parse(content)
-            if not parsed.entries:
-                logger.info(
-                    f"RSS-поток {feed.url} не содержит записей",
-                    correlation_id=correlation_id,
+    @staticmethod
+    def is_feed_unchanged(
+        db_feed: RssFeed, response: FeedResponse, job: FeedJob
+    ) -> bool:
+        """
+        Сравнивает ответ сервера с сохранённым состоянием ленты и готовит
+        новые валидаторы кэша. Возвращает True, если разбирать ленту не нужно.
+        """
+        unchanged, updates = compare_response(db_feed.content_hash, response)
+        job.updates.update(updates)
+        if not unchanged:
+            return False
+        NOT_MODIFIED_FEEDS.inc()
+        if response.not_modified:
+            message = f"RSS-поток {db_feed.url} не изменился (304)"
+        else:
+            message = f"Содержимое RSS-потока {db_feed.url} не изменилось"
+        logger.info(message, correlation_id=job.correlation_id)
+        return True
+
+    async def update_feed(self, feed_id: UUID, values: dict):
+        """Короткая транзакция для изменения полей ленты без новых постов."""
+        async with self.session_factory() as session:
+            await session.execute(
+                update(RssFeed).where(RssFeed.feed_id == feed_id).values(**values)
+            )
+            await session.commit()
+
+    async def fetch_stage(self, job: FeedJob):
+        """Условный запрос ленты с учётом предохранителя."""
+        async with self.session_factory() as session:
+            # Актуальное состояние ленты (на случай изменения с момента загрузки)
+            db_feed = await session.get(RssFeed, job.feed_id)
+        if db_feed is None:
+            logger.info(
+                f"RSS-поток {job.feed_url} не найден", correlation_id=job.correlation_id
+            )
+            self.finish(job, None)  # Лента могла быть удалена
+            return
+
+        now = datetime.now()
+        job.last_post_date = db_feed.last_post_date
+        job.result.push_active = db_feed.push_active(now)
+        if db_feed.breaker_state(now) == "open":
+            # Предохранитель открыт: ждём назначенного времени пробного опроса
+            job.result.changed = False
+            job.result.retry_after = (db_feed.next_retry_at - now).total_seconds()
+            self.finish(job, job.result)
+            return
+
+        try:
+            response = await self.fetch_rss_content(
+                db_feed.url, db_feed.etag, db_feed.last_modified
+            )
+        except Exception as e:
+            ERROR_COUNTER.labels(error_type="fetch_rss_error").inc()
+            job.result.retry_after = await self.record_feed_failure(job.feed_id, e, now)
+            logger.error(
+                f"Ошибка при получении RSS-потока {job.feed_url} "
+                f"(неудач подряд: {(db_feed.failure_count or 0) + 1}): {e}",
+                correlation_id=job.correlation_id,
+            )
+            job.result.changed = False
+            self.finish(job, job.result)
+            return
+
+        # Успешный ответ закрывает предохранитель
+        job.updates.update(failure_count=0, next_retry_at=None)
+        job.result.max_age = parse_max_age(response.cache_control)
+        if self.is_feed_unchanged(db_feed, response, job):
+            await self.update_feed(job.feed_id, job.updates)
+            job.result.changed = False
+            self.finish(job, job.result)
+            return
+        job.body = response.body
+        await self.stages["parse"].put(job)
+
+    async def parse_stage(self, job: FeedJob):
+        parsed = await self.parse_feed(job.body)
+        job.body = None
+        if parsed.hub_url:
+            # Лента объявила хаб WebSub: подписку оформит фоновое продление
+            job.updates["websub_hub"] = parsed.hub_url
+            job.updates["websub_topic"] = parsed.self_url or job.feed_url
+        if not parsed.entries:
+            logger.info(
+                f"RSS-поток {job.feed_url} не содержит записей",
+                correlation_id=job.correlation_id,
+            )
+            await self.stages["persist"].put(job)  # Нет записей в ленте
+            return
+
+        job.result.entry_dates = [
+            entry.published_at for entry in parsed.entries if entry.published_at
+        ]
+        job.result.ttl = parse_ttl(parsed.ttl)
+
+        # Устаревшие записи не дополняются и не публикуются: их ключи
+        # запоминаются, чтобы не рассматривать записи повторно
+        now = datetime.now()
+        for entry in parsed.entries:
+            if is_fresh(entry.published_at, now, self.freshness_window):
+                job.entries.append(entry)
+            else:
+                job.dedup_keys.append(entry.key)
+        if job.dedup_keys:
+            STALE_ENTRIES.inc(len(job.dedup_keys))
+        if not job.entries:
+            await self.stages["persist"].put(job)
+            return
+        await self.stages["filter"].put(job)
+
+    async def get_known_entry_keys(
+        self, session: AsyncSession, feed_id: UUID, keys: list[str]
+    ) -> set[str]:
+        """Возвращает ключи записей ленты, которые уже есть в базе данных."""
+        with TIME_OF_OPERATION.labels(request_type="get_known_entry_keys").time():
+            result = await session.execute(
+                select(RssEntryKey.entry_key).where(
+                    RssEntryKey.feed_id == feed_id, RssEntryKey.entry_key.in_(keys)
                 )
-                return  # Нет записей в ленте
-
-            last_post_date = db_feed.last_post_date or datetime.min
-            new_posts = []
-
-            for entry in parsed.entries:
-                # Извлекаем дату публикации
-                # feedparser поддерживает published_parsed, проверим его
-                published_dt = None
-                if (
-                    hasattr(entry, "published_parsed")
-                    and entry.published_parsed is not None
-                ):
-                    published_dt = datetime(*entry.published_parsed[:6])
-                elif (
-                    hasattr(entry, "updated_parsed")
-                    and entry.updated_parsed is not None
-                ):
-                    published_dt = datetime(*entry.updated_parsed[:6])
-
-                if published_dt is None:
-                    continue
-
-                # Проверяем, новее ли пост
-                if published_dt > last_post_date:
-                    # Собираем данные поста
-                    title = entry.title if hasattr(entry, "title") else "No Title"
-                    link = entry.link if hasattr(entry, "link") else ""
-                    content = entry.summary if hasattr(entry, "summary") else ""
-                    MIN_CONTENT_LENGTH = 150
-                    if len(content.split()) < MIN_CONTENT_LENGTH:
-                        content = await fetch_article_text(link)
-                        if not content:
-                            ERROR_COUNTER.labels(error_type="fetch_article_error").inc()
-                            continue
-
-                    content = content.replace("\n", " ")
-
-                    # Создаём новый объект RssPost
-                    new_post = RssPost(
-                        feed_id=db_feed.feed_id,
-                        title=title,
-                        content=content,
-                        link=link,
-                        published_at=published_dt,
-                    )
-                    new_posts.append(new_post)
-                    AMOUNT_OF_POSTS.inc()
-                    logger.info(
-                        f"Новый пост '{new_post.title}' добавлен в базу данных",
-                        correlation_id=correlation_id,
-                    )
-                    await channel.default_exchange.publish(
-                        aio_pika.Message(
-                            body=json.dumps(
-                                {
-                                    "published_at": published_dt.isoformat(),
-                                    "feed_url": feed.url,
-                                    "post_title": new_post.title,
-                                    "post_link": new_post.link,
-                                    "post_content": new_post.content,
-                                    "feed_subscribers": self.subscribers_ids[feed.url],
-                                    "correlation_id": correlation_id,
-                                }
-                            ).encode()
-                        ),
-                        routing_key="rss.new_posts",
-                    )
+            )
+            return set(result.scalars().all())
+
+    async def has_entry_keys(self, session: AsyncSession, feed_id: UUID) -> bool:
+        """Проверяет, сохранялись ли для ленты ключи записей."""
+        result = await session.execute(
+            select(exists().where(RssEntryKey.feed_id == feed_id))
+        )
+        return result.scalar()
+
+    @staticmethod
+    def post_row(job: FeedJob, entry: ParsedEntry, content: str) -> dict:
+        return {
+            "post_id": uuid4(),
+            "feed_id": job.feed_id,
+            "entry_key": entry.key,
+            "title": entry.title,
+            "content": content.replace("\n", " "),
+            "link": entry.link,
+            # Записи без даты получают время обнаружения
+            "published_at": entry.published_at or datetime.now(),
+        }
+
+    async def filter_stage(self, job: FeedJob):
+        """
+        Отбирает записи ленты, которых ещё нет в базе данных. Записи с кратким
+        описанием отправляются за полным текстом статьи.
+
+        Для лент, посты которых сохранены до появления ключей записей, записи
+        не новее last_post_date только запоминаются, чтобы не публиковать их
+        повторно.
+        """
+        candidates = {}
+        for entry in job.entries:
+            candidates.setdefault(entry.key, entry)
+        job.entries = []
+
+        async with self.session_factory() as session:
+            known_keys = await self.get_known_entry_keys(
+                session, job.feed_id, list(candidates)
+            )
+            watermark = None
+            if (
+                not known_keys
+                and job.last_post_date is not None
+                and not await self.has_entry_keys(session, job.feed_id)
+            ):
+                watermark = job.last_post_date
+
+        to_enrich = []
+        for key, entry in candidates.items():
+            if key in known_keys:
+                continue
+            if watermark is not None and (entry.published_at or datetime.now()) <= watermark:
+                job.dedup_keys.append(key)
+            elif len(entry.summary.split()) < MIN_CONTENT_LENGTH:
+                to_enrich.append(entry)
+            else:
+                job.rows.append(self.post_row(job, entry, entry.summary))
 
-            if new_posts:
-                session.add_all(new_posts)
+        if not to_enrich:
+            await self.stages["persist"].put(job)
+            return
+        job.pending = len(to_enrich)
+        for entry in to_enrich:
+            await self.stages["enrich"].put((job, entry))
+
+    async def enrich_stage(self, item: tuple[FeedJob, ParsedEntry]):
+        """Загружает полный текст статьи для записи с кратким описанием."""
+        job, entry = item
+        try:
+            content = await fetch_article_text(entry.link)
+        except Exception:
+            content = None
+        try:
+            if content:
+                job.rows.append(self.post_row(job, entry, content))
+            else:
+                # Запись без текста не сохраняется и будет обработана снова
+                ERROR_COUNTER.labels(error_type="fetch_article_error").inc()
+                job.failed += 1
+        finally:
+            job.pending -= 1
+            if job.pending == 0:
+                await self.stages["persist"].put(job)
+
+    async def insert_posts(
+        self,
+        session: AsyncSession,
+        feed_id: UUID,
+        rows: list[dict],
+        dedup_keys: list[str],
+    ) -> list[dict]:
+        """
+        Сохраняет ключи записей и вставляет только посты с новыми ключами.
+        Возвращает вставленные строки. Крупные пачки идут через COPY.
+        """
+        if not rows and not dedup_keys:
+            return []
+        with TIME_OF_OPERATION.labels(request_type="insert_posts").time():
+            new_keys = await claim_entry_keys(
+                session,
+                feed_id,
+                list(dict.fromkeys([row["entry_key"] for row in rows] + dedup_keys)),
+            )
+            rows = [row for row in rows if row["entry_key"] in new_keys]
+            if len(rows) > POSTS_COPY_THRESHOLD:
+                await copy_posts(session, rows)
+            elif rows:
+                await session.execute(insert(RssPost).values(rows))
+            return rows
+
+    def outbox_message(self, job: FeedJob, post: dict, subscribers) -> OutboxMessage:
+        return OutboxMessage(
+            routing_key=NEW_POSTS_ROUTING_KEY,
+            payload={
+                "post_id": str(post["post_id"]),
+                "published_at": post["published_at"].isoformat(),
+                "feed_url": job.feed_url,
+                "post_title": post["title"],
+                "post_link": post["link"],
+                "post_content": post["content"],
+                "feed_subscribers": subscribers,
+                "correlation_id": job.correlation_id,
+            },
+        )
+
+    async def persist_stage(self, job: FeedJob):
+        """
+        Сохраняет посты, состояние ленты и сообщения о новых постах одной
+        короткой транзакцией. Сообщения публикует ретранслятор, поэтому
+        сбой после фиксации не теряет их, а сбой до неё — не дублирует.
+        """
+        async with self.session_factory() as session:
+            db_feed = await session.get(RssFeed, job.feed_id)
+            if db_feed is None:
+                self.finish(job, None)  # Лента удалена, пока шла обработка
+                return
+            if job.failed:
+                # Иначе неизменившееся тело ленты не будет разобрано снова
+                # и пропущенные записи не получат повторной попытки
+                for name in CACHE_VALIDATORS:
+                    job.updates.pop(name, None)
+            for name, value in job.updates.items():
+                setattr(db_feed, name, value)
+            inserted = await self.insert_posts(
+                session, job.feed_id, job.rows, job.dedup_keys
+            )
+            job.rows, job.dedup_keys = [], []
+            if inserted:
                 # Обновляем last_post_date
                 # Находим максимальную дату из новых постов
-                max_date = max(post.published_at for post in new_posts)
-                db_feed.last_post_date = max_date
-                await session.commit()
+                max_date = max(post["published_at"] for post in inserted)
+                db_feed.last_post_date = max(
+                    max_date, db_feed.last_post_date or datetime.min
+                )
+                subscribers = self.subscription_index.get(job.feed_id)
+                session.add_all(
+                    [self.outbox_message(job, post, subscribers) for post in inserted]
+                )
                 logger.info(
-                    f"RSS-поток {feed.url} обновлён", correlation_id=correlation_id
+                    f"RSS-поток {job.feed_url} обновлён",
+                    correlation_id=job.correlation_id,
                 )
+            # Фиксируем новые валидаторы и хэш даже без новых постов,
+            # если все записи ленты обработаны
+            await session.commit()
+        if inserted:
+            AMOUNT_OF_POSTS.inc(len(inserted))
+            for post in inserted:
+                logger.info(
+                    f"Новый пост '{post['title']}' добавлен в базу данных",
+                    correlation_id=job.correlation_id,
+                )
+            self.outbox.notify()
+        self.finish(job, job.result)
 
-    async def check_feeds(self):
-        """
-        Проверяет все RssFeed в базе данных, асинхронно обновляет их.
+    async def submit(self, feed: RssFeed) -> asyncio.Future:
         """
-        with TIME_OF_OPERATION.labels(request_type="check_feeds").time():
-            async with self.session_factory() as session:
-                feeds = (await session.execute(select(RssFeed))).scalars().all()
+        Ставит ленту в конвейер: он забирает RSS поток, парсит его и добавляет
+        в базу данных посты, ключей которых (GUID, ссылка или хэш содержимого)
+        там ещё нет.
 
-            # Запускаем таски для всех лент
-            tasks = [
-                asyncio.create_task(self.fetch_and_update_feed(feed)) for feed in feeds
-            ]
-            await asyncio.gather(*tasks)
+        Ждёт места в очереди стадии fetch, поэтому вызывающий не опережает
+        конвейер. Возвращает future со сведениями для планировщика опросов
+        или None, если лента удалена.
+        """
+        job = FeedJob(
+            feed_id=feed.feed_id,
+            feed_url=feed.url,
+            correlation_id=generate_correlation_id(),
+            done=asyncio.get_running_loop().create_future(),
+        )
+        logger.info(f"Проверка RSS-потока {feed.url}", correlation_id=job.correlation_id)
+        await self.stages["fetch"].put(job)
+        return job.done
 
+    async def ingest_pushed_feed(self, feed_id: UUID, body: bytes):
+        """
+        Обрабатывает содержимое, доставленное хабом WebSub, тем же конвейером,
+        что и опрос, начиная со стадии разбора. Повторно доставленные записи
+        отсекаются по ключам.
+        """
+        async with self.session_factory() as session:
+            db_feed = await session.get(RssFeed, feed_id)
+        if db_feed is None:
+            return  # Лента удалена, пока хаб доставлял уведомление
+        job = FeedJob(
+            feed_id=feed_id,
+            feed_url=db_feed.url,
+            correlation_id=generate_correlation_id(),
+            done=asyncio.get_running_loop().create_future(),
+            body=body,
+            last_post_date=db_feed.last_post_date,
+        )
+        logger.info(
+            f"Получено push-уведомление для RSS-потока {db_feed.url}",
+            correlation_id=job.correlation_id,
+        )
+        await self.stages["parse"].put(job)
+        await job.done
 
-if __name__ == "__main__":
-    listener = RSSListener()
@@ -0,0 +1,177 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import select
+
+from logger_setup import generate_correlation_id, setup_logger
+from services.rss_manager.config import (
+    MAX_MINUTES_BETWEEN_RSS_CHECKS,
+    MIN_MINUTES_BETWEEN_RSS_CHECKS,
+    MINUTES_BETWEEN_RSS_CHECKS,
+    RSS_POLL_JITTER,
+    SECONDS_BETWEEN_FEED_SYNCS,
+    WEBSUB_POLL_MINUTES,
+    async_session_factory,
+)
+from services.rss_manager.database.models import RssFeed
+from services.rss_manager.metrics import (
+    ERROR_COUNTER,
+    FEED_POLL_INTERVAL,
+    FEEDS_IN_BACKOFF,
+    PUSH_SUBSCRIBED_FEEDS,
+    SCHEDULED_FEEDS,
+    TIME_OF_OPERATION,
+)
+from services.rss_manager.rss_listener import RSSListener
+from services.rss_manager.sharding import FeedSharding
+from services.rss_manager.utils.poll_queue import PollQueue
+from services.rss_manager.utils.polling import next_poll_interval, with_jitter
+
+logger = setup_logger(__name__)
+
+
+class FeedScheduler:
+    """
+    Планировщик опросов RSS-лент на основе кучи.
+
+    У каждой ленты своё время следующего опроса, которое подстраивается под
+    частоту её публикаций. Параллелизм ограничивают стадии конвейера
+    ``RSSListener``: планировщик ждёт места в очереди стадии fetch и не
+    извлекает новые ленты, пока она заполнена. Планируются только ленты,
+    которыми владеет текущая реплика.
+    """
+
+    def __init__(
+        self,
+        listener: RSSListener,
+        sharding: FeedSharding,
+        jitter: float = RSS_POLL_JITTER,
+    ):
+        self.listener = listener
+        self.sharding = sharding
+        self.sharding_version = -1
+        self.session_factory = async_session_factory
+        self.default_interval = 60 * float(MINUTES_BETWEEN_RSS_CHECKS)
+        self.min_interval = 60 * MIN_MINUTES_BETWEEN_RSS_CHECKS
+        self.max_interval = 60 * MAX_MINUTES_BETWEEN_RSS_CHECKS
+        self.push_interval = 60 * WEBSUB_POLL_MINUTES
+        self.jitter = jitter
+        self.queue = PollQueue()
+        self.feeds: dict[UUID, RssFeed] = {}
+        self.intervals: dict[UUID, float] = {}
+        self.tasks: set[asyncio.Task] = set()
+
+    async def sync_feeds(self):
+        """
+        Добавляет в расписание новые ленты этой реплики и забывает удалённые
+        или переехавшие к другим репликам.
+        """
+        sharding_version = self.sharding.version
+        with TIME_OF_OPERATION.labels(request_type="sync_feeds").time():
+            async with self.session_factory() as session:
+                feeds = (await session.execute(select(RssFeed))).scalars().all()
+
+        current = {
+            feed.feed_id: feed for feed in feeds if self.sharding.owns(feed.feed_id)
+        }
+        self.sharding_version = sharding_version
+        for feed_id in self.feeds.keys() - current.keys():
+            del self.feeds[feed_id]
+            self.queue.discard(feed_id)
+            self.intervals.pop(feed_id, None)
+        for feed_id, feed in current.items():
+            if feed_id not in self.feeds:
+                # Новые ленты равномерно распределяются по интервалу опроса
+                self.intervals[feed_id] = self.default_interval
+                self.queue.schedule(feed_id, random.uniform(0, self.default_interval))  # noqa: S311
+            self.feeds[feed_id] = feed
+        SCHEDULED_FEEDS.set(len(self.feeds))
+
+        now = datetime.now()
+        states = Counter(feed.breaker_state(now) for feed in current.values())
+        for state in ("open", "half_open"):
+            FEEDS_IN_BACKOFF.labels(state=state).set(states[state])
+        PUSH_SUBSCRIBED_FEEDS.set(
+            sum(feed.push_active(now) for feed in current.values())
+        )
+
+    async def poll(self, feed: RssFeed, done: asyncio.Future):
+        """Дожидается результата опроса ленты и назначает следующий опрос."""
+        try:
+            result = await done
+        except Exception as e:
+            ERROR_COUNTER.labels(error_type="poll_feed_error").inc()
+            logger.error(
+                f"Ошибка при опросе RSS-потока {feed.url}: {e}",
+                correlation_id=generate_correlation_id(),
+            )
+            result = None
+
+        if feed.feed_id not in self.feeds:
+            return  # Лента удалена, пока шёл опрос
+
+        previous = self.intervals.get(feed.feed_id, self.default_interval)
+        if result is None:
+            interval = next_poll_interval(
+                previous, self.min_interval, self.max_interval, changed=False
+            )
+        else:
+            interval = next_poll_interval(
+                previous,
+                self.min_interval,
+                self.max_interval,
+                entry_dates=result.entry_dates,
+                changed=result.changed,
+                ttl=result.ttl,
+                max_age=result.max_age,
+            )
+        self.intervals[feed.feed_id] = interval
+        FEED_POLL_INTERVAL.observe(interval)
+        delay = with_jitter(interval, self.jitter)
+        if result is not None and result.retry_after:
+            # Пауза предохранителя может быть длиннее обычного интервала
+            delay = max(delay, result.retry_after)
+        if result is not None and result.push_active:
+            # Записи доставляет хаб WebSub, редкий опрос ловит потерянные уведомления
+            delay = max(delay, with_jitter(self.push_interval, self.jitter))
+        self.queue.schedule(feed.feed_id, delay)
+
+    async def run(self):
+        """Бесконечно запускает опросы лент по мере наступления их времени."""
+        correlation_id = generate_correlation_id()
+        logger.info("Запуск планировщика RSS-потоков", correlation_id=correlation_id)
+        next_sync = 0.0
+        while True:
+            now = time.monotonic()
+            # Изменение состава реплик требует немедленного перераспределения
+            if now >= next_sync or self.sharding.version != self.sharding_version:
+                try:
+                    await self.sync_feeds()
+                except Exception as e:
+                    ERROR_COUNTER.labels(error_type="sync_feeds_error").inc()
+                    logger.error(
+                        f"Ошибка при загрузке RSS-потоков: {e}",
+                        correlation_id=correlation_id,
+                    )
+                next_sync = now + SECONDS_BETWEEN_FEED_SYNCS
+
+            deadline = self.queue.next_deadline()
+            if deadline is not None and deadline <= time.monotonic():
+                feed = self.feeds.get(self.queue.pop_due())
+                if feed is None:
+                    continue
+                # Заполненная очередь fetch задерживает извлечение следующих лент
+                done = await self.listener.submit(feed)
+                task = asyncio.create_task(self.poll(feed, done))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+                continue
+
+            wake_at = next_sync
+            if deadline is not None:
+                wake_at = min(wake_at, deadline)
+            await asyncio.sleep(max(wake_at - time.monotonic(), 0))
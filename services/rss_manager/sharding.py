@@ -0,0 +1,107 @@
+import asyncio
+import os
+import socket
+from datetime import timedelta
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from logger_setup import generate_correlation_id, setup_logger
+from services.rss_manager.config import (
+    RSS_WORKER_ID,
+    WORKER_HEARTBEAT_SECONDS,
+    WORKER_LEASE_SECONDS,
+    async_session_factory,
+)
+from services.rss_manager.database.models import RssWorker
+from services.rss_manager.metrics import ERROR_COUNTER, LIVE_WORKERS, TIME_OF_OPERATION
+from services.rss_manager.utils.rendezvous import rendezvous_owner
+
+logger = setup_logger(__name__)
+
+# Через сколько сроков аренды запись о пропавшем воркере удаляется
+STALE_WORKER_LEASES = 10
+
+
+class FeedSharding:
+    """
+    Распределение RSS-лент между репликами rss_manager.
+
+    Каждая реплика периодически продлевает аренду (heartbeat) в таблице
+    rss_workers. Лента принадлежит живому воркеру с наибольшим весом
+    rendezvous-хэширования, поэтому при падении реплики её ленты
+    автоматически переходят к остальным после истечения аренды.
+    """
+
+    def __init__(
+        self,
+        worker_id: str | None = RSS_WORKER_ID,
+        heartbeat_interval: float = WORKER_HEARTBEAT_SECONDS,
+        lease: float = WORKER_LEASE_SECONDS,
+    ):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+        self.heartbeat_interval = heartbeat_interval
+        self.lease = lease
+        self.session_factory = async_session_factory
+        self.workers: list[str] = [self.worker_id]
+        # Увеличивается при каждом изменении состава воркеров
+        self.version = 0
+
+    def owns(self, feed_id: UUID) -> bool:
+        return rendezvous_owner(str(feed_id), self.workers) == self.worker_id
+
+    async def heartbeat(self):
+        """Продлевает аренду воркера и обновляет список живых воркеров."""
+        with TIME_OF_OPERATION.labels(request_type="worker_heartbeat").time():
+            async with self.session_factory() as session:
+                await session.execute(
+                    insert(RssWorker)
+                    .values(worker_id=self.worker_id, heartbeat_at=func.now())
+                    .on_conflict_do_update(
+                        index_elements=["worker_id"],
+                        set_={"heartbeat_at": func.now()},
+                    )
+                )
+                await session.execute(
+                    delete(RssWorker).where(
+                        RssWorker.heartbeat_at
+                        < func.now() - timedelta(seconds=self.lease * STALE_WORKER_LEASES)
+                    )
+                )
+                result = await session.execute(
+                    select(RssWorker.worker_id).where(
+                        RssWorker.heartbeat_at > func.now() - timedelta(seconds=self.lease)
+                    )
+                )
+                await session.commit()
+
+        workers = sorted(set(result.scalars().all()) | {self.worker_id})
+        if workers != self.workers:
+            logger.info(
+                f"Состав воркеров RSS изменился: {', '.join(workers)}",
+                correlation_id=generate_correlation_id(),
+            )
+            self.workers = workers
+            self.version += 1
+        LIVE_WORKERS.set(len(self.workers))
+
+    async def run(self):
+        while True:
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                ERROR_COUNTER.labels(error_type="worker_heartbeat_error").inc()
+                logger.error(
+                    f"Ошибка продления аренды воркера {self.worker_id}: {e}",
+                    correlation_id=generate_correlation_id(),
+                )
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def leave(self):
+        """Удаляет аренду при штатной остановке, чтобы ленты переехали сразу."""
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(RssWorker).where(RssWorker.worker_id == self.worker_id)
+            )
+            await session.commit()
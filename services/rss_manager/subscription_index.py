@@ -0,0 +1,68 @@
+import asyncio
+from uuid import UUID
+
+from sqlalchemy import select
+
+from logger_setup import generate_correlation_id, setup_logger
+from services.rss_manager.config import (
+    SECONDS_BETWEEN_SUBSCRIPTION_RECONCILIATIONS,
+    async_session_factory,
+)
+from services.rss_manager.database.models import Subscription
+from services.rss_manager.metrics import (
+    ERROR_COUNTER,
+    INDEXED_SUBSCRIPTIONS,
+    TIME_OF_OPERATION,
+)
+from services.rss_manager.utils.subscriptions import SubscriberMap
+
+logger = setup_logger(__name__)
+
+
+class SubscriptionIndex(SubscriberMap):
+    """
+    Индекс подписок в памяти: feed_id -> множество ID подписчиков.
+
+    Загружается одним запросом при старте, обновляется изменениями подписок,
+    которые менеджер подписок рассылает всем репликам, и периодически
+    сверяется с базой данных.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.session_factory = async_session_factory
+
+    def _apply(self, operation: str, feed_id: UUID, user_id: int | None):
+        super()._apply(operation, feed_id, user_id)
+        INDEXED_SUBSCRIPTIONS.set(self.size())
+
+    async def load(self):
+        """Перестраивает индекс по базе данных одним запросом."""
+        with TIME_OF_OPERATION.labels(request_type="load_subscription_index").time():
+            self.begin_reload()
+            try:
+                async with self.session_factory() as session:
+                    result = await session.execute(
+                        select(Subscription.feed_id, Subscription.user_id)
+                    )
+                    rows = result.all()
+            except Exception:
+                self.abort_reload()
+                raise
+            self.finish_reload(rows)
+        INDEXED_SUBSCRIPTIONS.set(self.size())
+
+    async def run_reconciliation(
+        self, interval: float = SECONDS_BETWEEN_SUBSCRIPTION_RECONCILIATIONS
+    ):
+        """Периодически сверяет индекс с базой данных."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load()
+            except Exception as e:
+                ERROR_COUNTER.labels(error_type="subscription_index_error").inc()
+                logger.error(
+                    f"Ошибка при сверке индекса подписок: {e}",
+                    correlation_id=generate_correlation_id(),
+                )
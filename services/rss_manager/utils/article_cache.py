@@ -0,0 +1,65 @@
+import hashlib
+
+from redis.asyncio import Redis
+
+from services.rss_manager.metrics import ARTICLE_CACHE_HITS, ARTICLE_CACHE_MISSES
+from services.rss_manager.utils.entries import normalize_link
+
+# Префиксы значений: найденный текст и отрицательный результат
+FOUND_MARKER = b"1"
+MISSING_MARKER = b"0"
+
+
+class ArticleCache:
+    """
+    Кэш извлечённого текста статей в Redis.
+
+    Ключ — хэш канонической ссылки без трекинговых параметров. Неудачные
+    загрузки кэшируются на короткое время ``negative_ttl``, чтобы частые
+    опросы ленты не повторяли их каждый раз; отрицательный ответ кэша
+    означает, что текста нет, и запись не считается обработанной. Все ключи
+    создаются с TTL, поэтому при политике volatile-lru Redis вытесняет их при
+    нехватке памяти. Ошибки Redis передаются вызывающему.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None,
+        ttl: int,
+        negative_ttl: int,
+        max_text_length: int,
+        prefix: str = "article_text:",
+    ):
+        self.redis = redis
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_text_length = max_text_length
+        self.prefix = prefix
+
+    def key(self, url: str) -> str:
+        return self.prefix + hashlib.sha256(normalize_link(url).encode()).hexdigest()
+
+    async def get(self, url: str) -> tuple[bool, str | None]:
+        """Возвращает признак попадания в кэш и сохранённый текст (или None)."""
+        if self.redis is None:
+            return False, None
+        value = await self.redis.get(self.key(url))
+        if value is None:
+            ARTICLE_CACHE_MISSES.inc()
+            return False, None
+        if value.startswith(MISSING_MARKER):
+            ARTICLE_CACHE_HITS.labels(result="negative").inc()
+            return True, None
+        ARTICLE_CACHE_HITS.labels(result="text").inc()
+        return True, value[len(FOUND_MARKER) :].decode()
+
+    async def set(self, url: str, text: str | None):
+        if self.redis is None:
+            return
+        if text:
+            value = FOUND_MARKER + text[: self.max_text_length].encode()
+            ttl = self.ttl
+        else:
+            value = MISSING_MARKER
+            ttl = self.negative_ttl
+        await self.redis.set(self.key(url), value, ex=ttl)
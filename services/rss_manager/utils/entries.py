@@ -0,0 +1,62 @@
+import hashlib
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Параметры ссылок, которые не влияют на содержимое страницы
+TRACKING_PARAM_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "mc_cid", "mc_eid", "_openstat"}
+DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def normalize_link(link: str) -> str:
+    """
+    Приводит ссылку к каноническому виду: схема и хост в нижнем регистре,
+    без порта по умолчанию, фрагмента, завершающего слэша и трекинговых
+    параметров; оставшиеся параметры отсортированы.
+    """
+    parts = urlsplit(link.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = DEFAULT_PORTS.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[: -len(default_port)]
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not is_tracking_param(name)
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def entry_key(entry) -> str:
+    """
+    Возвращает уникальный в пределах ленты ключ записи.
+
+    Используется GUID записи, при его отсутствии — нормализованная ссылка,
+    а для записей без ссылки — хэш заголовка и содержимого.
+    """
+    guid = (entry.get("id") or "").strip()
+    link = (entry.get("link") or "").strip()
+    if guid:
+        source = f"guid:{guid}"
+    elif link:
+        source = f"link:{normalize_link(link)}"
+    else:
+        source = f"content:{entry.get('title', '')}\n{entry.get('summary', '')}"
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def is_fresh(published_at: datetime | None, now: datetime, window: timedelta) -> bool:
+    """
+    Запись свежая, если опубликована не раньше ``window`` до ``now``.
+    Записи без даты получают время обнаружения и считаются свежими.
+    """
+    return published_at is None or published_at >= now - window
@@ -0,0 +1,201 @@
+import re
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+import lxml.html
+from lxml import etree
+
+# Теги, которые никогда не содержат текст статьи
+NOISE_TAGS = [
+    "script", "style", "noscript", "header", "footer", "nav", "form",
+    "aside", "iframe", "svg", "button", "template",
+]
+UNLIKELY_CANDIDATES = re.compile(
+    r"comment|share|social|related|promo|sidebar|footer|header|menu|nav|cookie|"
+    r"subscribe|advert|banner|popup|modal|breadcrumb|pagination|sponsor",
+    re.IGNORECASE,
+)
+POSITIVE_CLASSES = re.compile(
+    r"article|body|content|entry|main|post|story|text|blog", re.IGNORECASE
+)
+NEGATIVE_CLASSES = re.compile(
+    r"comment|meta|footer|footnote|sidebar|widget|related|share|promo|ad-",
+    re.IGNORECASE,
+)
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "li", "pre", "blockquote", "td",
+    "h1", "h2", "h3", "h4", "h5", "h6", "br",
+}
+PARAGRAPH_TAGS = ("p", "pre", "td", "blockquote")
+# Подсказки разметки в порядке приоритета
+HINT_XPATHS = [
+    "//*[@itemprop='articleBody']",
+    "//article",
+    "//*[@role='main']",
+    "//main",
+]
+MIN_PARAGRAPH_LENGTH = 25
+MIN_HINT_WORDS = 50
+CLASS_WEIGHT = 25
+
+
+class Extraction(NamedTuple):
+    text: str
+    selector: str | None
+
+
+def element_text(element) -> str:
+    """Текст элемента с переводами строк между блоками."""
+    parts = []
+    for node in element.iter():
+        if not isinstance(node.tag, str):
+            continue
+        if node.tag in BLOCK_TAGS:
+            parts.append("\n")
+        if node.text:
+            parts.append(node.text)
+        if node is not element and node.tail:
+            parts.append(node.tail)
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def class_weight(element) -> int:
+    weight = 0
+    for attribute in (element.get("class"), element.get("id")):
+        if not attribute:
+            continue
+        if NEGATIVE_CLASSES.search(attribute):
+            weight -= CLASS_WEIGHT
+        if POSITIVE_CLASSES.search(attribute):
+            weight += CLASS_WEIGHT
+    return weight
+
+
+def link_density(element) -> float:
+    text_length = len(element.text_content())
+    if not text_length:
+        return 1.0
+    link_length = sum(len(link.text_content()) for link in element.iter("a"))
+    return link_length / text_length
+
+
+def element_xpath(element) -> str | None:
+    """Устойчивый XPath элемента по id или первому классу."""
+    element_id = element.get("id")
+    if element_id:
+        return f"//{element.tag}[@id='{element_id}']"
+    classes = (element.get("class") or "").split()
+    if classes and "'" not in classes[0]:
+        return (
+            f"//{element.tag}[contains(concat(' ', normalize-space(@class), ' '), "
+            f"' {classes[0]} ')]"
+        )
+    return None
+
+
+def remove_noise(document):
+    for element in document.xpath("//" + " | //".join(NOISE_TAGS)):
+        element.drop_tree()
+    for element in list(document.iter()):
+        if not isinstance(element.tag, str) or element.tag in ("html", "body"):
+            continue
+        attributes = f"{element.get('class', '')} {element.get('id', '')}"
+        if UNLIKELY_CANDIDATES.search(attributes) and not POSITIVE_CLASSES.search(
+            attributes
+        ):
+            element.drop_tree()
+
+
+def best_hinted_element(document, xpaths: list[str]):
+    for xpath in xpaths:
+        try:
+            elements = document.xpath(xpath)
+        except etree.XPathError:
+            continue
+        elements = [element for element in elements if isinstance(element.tag, str)]
+        if not elements:
+            continue
+        element = max(elements, key=lambda item: len(item.text_content()))
+        if len(element.text_content().split()) >= MIN_HINT_WORDS:
+            return element
+    return None
+
+
+def best_scored_element(document):
+    """Выбирает блок с наибольшей плотностью текста (по мотивам readability)."""
+    scores = defaultdict(float)
+    for paragraph in document.iter(*PARAGRAPH_TAGS):
+        text = paragraph.text_content().strip()
+        if len(text) < MIN_PARAGRAPH_LENGTH:
+            continue
+        score = 1 + text.count(",") + min(len(text) / 100, 3)
+        parent = paragraph.getparent()
+        if parent is None:
+            continue
+        scores[parent] += score
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] += score / 2
+
+    if not scores:
+        return None
+    return max(
+        scores,
+        key=lambda element: (scores[element] + class_weight(element))
+        * (1 - link_density(element)),
+    )
+
+
+def extract_article(html: str, selector_hint: str | None = None) -> Extraction:
+    """
+    Извлекает основной текст статьи из HTML.
+
+    Сначала пробует выученный для домена селектор, затем подсказки разметки
+    (schema.org articleBody, <article>, <main>), затем оценку плотности текста.
+    Возвращает текст и XPath выбранного блока для обучения селекторов.
+    """
+    if not html or not html.strip():
+        return Extraction("", None)
+    try:
+        document = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return Extraction("", None)
+    remove_noise(document)
+
+    hints = [selector_hint] if selector_hint else []
+    element = best_hinted_element(document, hints + HINT_XPATHS)
+    if element is None:
+        element = best_scored_element(document)
+    if element is None:
+        body = document.find("body")
+        return Extraction(element_text(body if body is not None else document), None)
+    return Extraction(element_text(element), element_xpath(element))
+
+
+class DomainSelectors:
+    """
+    Выученные селекторы основного контента по доменам.
+
+    Селектор становится подсказкой после ``min_hits`` успешных извлечений.
+    """
+
+    def __init__(self, min_hits: int = 3, max_domains: int = 5000):
+        self.min_hits = min_hits
+        self.max_domains = max_domains
+        self.hits: dict[str, Counter] = {}
+
+    def hint(self, domain: str) -> str | None:
+        counter = self.hits.get(domain)
+        if not counter:
+            return None
+        selector, hits = counter.most_common(1)[0]
+        return selector if hits >= self.min_hits else None
+
+    def learn(self, domain: str, selector: str | None):
+        if not selector:
+            return
+        if domain not in self.hits and len(self.hits) >= self.max_domains:
+            # Забываем самый старый домен, чтобы память оставалась ограниченной
+            self.hits.pop(next(iter(self.hits)))
+        self.hits.setdefault(domain, Counter())[selector] += 1
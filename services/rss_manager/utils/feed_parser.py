@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import NamedTuple
+
+import feedparser
+
+from services.rss_manager.utils.entries import entry_key
+
+
+class ParsedEntry(NamedTuple):
+    """Компактное представление записи ленты для передачи между процессами."""
+
+    key: str
+    title: str
+    link: str
+    summary: str
+    published_at: datetime | None
+
+
+class ParsedFeed(NamedTuple):
+    ttl: str | None
+    entries: list[ParsedEntry]
+    # Ссылки WebSub: хаб и каноничный адрес ленты (rel="hub" и rel="self")
+    hub_url: str | None = None
+    self_url: str | None = None
+
+
+def entry_published_at(entry) -> datetime | None:
+    """Извлекает дату публикации записи (published, затем updated)."""
+    # feedparser поддерживает published_parsed, проверим его
+    if getattr(entry, "published_parsed", None) is not None:
+        return datetime(*entry.published_parsed[:6])
+    if getattr(entry, "updated_parsed", None) is not None:
+        return datetime(*entry.updated_parsed[:6])
+    return None
+
+
+def feed_link(feed, rel: str) -> str | None:
+    """Первая ссылка ленты с указанным rel."""
+    for link in feed.get("links", []):
+        if link.get("rel") == rel and link.get("href"):
+            return link["href"]
+    return None
+
+
+def parse_feed(body: bytes) -> ParsedFeed:
+    """
+    Разбирает тело RSS-ленты и нормализует даты записей.
+
+    Выполняется в пуле процессов, поэтому возвращает только кортежи с нужными
+    полями, а не объекты feedparser.
+    """
+    parsed = feedparser.parse(body)
+    entries = [
+        ParsedEntry(
+            key=entry_key(entry),
+            title=entry.get("title", "No Title"),
+            link=entry.get("link", ""),
+            summary=entry.get("summary", ""),
+            published_at=entry_published_at(entry),
+        )
+        for entry in parsed.entries
+    ]
+    return ParsedFeed(
+        ttl=parsed.feed.get("ttl"),
+        entries=entries,
+        hub_url=feed_link(parsed.feed, "hub"),
+        self_url=feed_link(parsed.feed, "self"),
+    )
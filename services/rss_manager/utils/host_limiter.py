@@ -0,0 +1,92 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from aiolimiter import AsyncLimiter
+
+from services.rss_manager.config import (
+    HOST_IDLE_SECONDS,
+    HOST_MAX_CONCURRENT_REQUESTS,
+    HOST_RATE_LIMIT,
+    HOST_RATE_PERIOD_SECONDS,
+)
+
+
+@dataclass
+class HostState:
+    semaphore: asyncio.Semaphore
+    limiter: AsyncLimiter
+    # Запросы к хосту, которые ещё выполняются
+    active: int = 0
+    last_used: float = 0.0
+
+
+class HostLimiter:
+    """
+    Ограничения вежливости для каждого хоста: число одновременных запросов
+    и частота запросов.
+
+    Хосты хранятся в порядке последнего использования; хост без выполняющихся
+    запросов, к которому не обращались дольше ``idle_seconds``, забывается.
+    Срок не меньше периода частоты, поэтому к этому времени его ограничения
+    полностью восстановлены и ничего не теряется.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = HOST_MAX_CONCURRENT_REQUESTS,
+        rate: float = HOST_RATE_LIMIT,
+        period: float = HOST_RATE_PERIOD_SECONDS,
+        idle_seconds: float = HOST_IDLE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.period = period
+        self.idle_seconds = max(idle_seconds, period)
+        self.clock = clock
+        self.hosts: OrderedDict[str, HostState] = OrderedDict()
+
+    def evict_idle(self, now: float):
+        # Давно использованные хосты в начале: проверяем, пока не встретится
+        # недавний или занятый
+        while self.hosts:
+            host, state = next(iter(self.hosts.items()))
+            if state.active or now - state.last_used < self.idle_seconds:
+                return
+            del self.hosts[host]
+
+    def touch(self, host: str) -> HostState:
+        now = self.clock()
+        self.evict_idle(now)
+        state = self.hosts.get(host)
+        if state is None:
+            state = HostState(
+                asyncio.Semaphore(self.max_concurrent),
+                AsyncLimiter(self.rate, self.period),
+            )
+            self.hosts[host] = state
+        state.last_used = now
+        self.hosts.move_to_end(host)
+        return state
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        state = self.touch(host)
+        state.active += 1
+        try:
+            async with state.semaphore, state.limiter:
+                yield
+        finally:
+            state.active -= 1
+            state.last_used = self.clock()
+            if host in self.hosts:
+                self.hosts.move_to_end(host)
+
+
+host_limiter = HostLimiter()
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+PARTITION_PREFIX = "rss_posts_y"
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Первое число месяца, отстоящего от ``month`` на ``months`` месяцев."""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    """Имя месячной секции rss_posts, например rss_posts_y2024m05."""
+    return f"{PARTITION_PREFIX}{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> datetime | None:
+    """Месяц секции по её имени или None для посторонних таблиц."""
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX) :], "%Ym%m")
+    except ValueError:
+        return None
+
+
+def months_between(start: datetime, end: datetime) -> list[datetime]:
+    """Месяцы от месяца ``start`` до месяца ``end`` включительно."""
+    months = []
+    month = month_start(start)
+    while month <= end:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def expired_partitions(
+    names: list[str], now: datetime, retention_months: int
+) -> list[str]:
+    """
+    Секции, все строки которых старше срока хранения: секция месяца M
+    содержит посты до начала M+1, поэтому удаляется, когда этот момент
+    выходит за срок хранения.
+    """
+    cutoff = add_months(month_start(now), -retention_months)
+    expired = []
+    for name in names:
+        month = partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            expired.append(name)
+    return sorted(expired)
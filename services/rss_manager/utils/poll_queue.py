@@ -0,0 +1,60 @@
+import heapq
+import itertools
+import time
+from collections.abc import Callable
+from uuid import UUID
+
+
+class PollQueue:
+    """
+    Куча моментов следующего опроса лент.
+
+    Каждая запись хранит номер поколения; у ленты действительна только
+    запись последнего ``schedule``. Повторное планирование или ``discard``
+    делают прежние записи устаревшими, и они отбрасываются при извлечении,
+    поэтому лента, снятая с реплики и возвращённая ей, опрашивается одной
+    цепочкой, а не двумя.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        # Тройки (момент опроса, поколение, feed_id); поколение уникально,
+        # поэтому до сравнения feed_id дело не доходит
+        self.heap: list[tuple[float, int, UUID]] = []
+        self.generations: dict[UUID, int] = {}
+        self.counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.generations)
+
+    def schedule(self, feed_id: UUID, delay: float):
+        """Назначает опрос ленты через ``delay`` секунд взамен прежнего."""
+        generation = next(self.counter)
+        self.generations[feed_id] = generation
+        heapq.heappush(self.heap, (self.clock() + delay, generation, feed_id))
+
+    def discard(self, feed_id: UUID):
+        """Отменяет запланированный опрос ленты."""
+        self.generations.pop(feed_id, None)
+
+    def drop_stale(self):
+        while self.heap:
+            _, generation, feed_id = self.heap[0]
+            if self.generations.get(feed_id) == generation:
+                return
+            heapq.heappop(self.heap)
+
+    def next_deadline(self) -> float | None:
+        """Момент ближайшего действительного опроса или None, если их нет."""
+        self.drop_stale()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self) -> UUID | None:
+        """Извлекает ленту, время опроса которой наступило."""
+        deadline = self.next_deadline()
+        if deadline is None or deadline > self.clock():
+            return None
+        _, _, feed_id = heapq.heappop(self.heap)
+        # До следующего schedule у ленты нет записи в куче
+        del self.generations[feed_id]
+        return feed_id
@@ -0,0 +1,162 @@
+import hashlib
+import random
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from statistics import median
+
+MAX_AGE_PATTERN = re.compile(r"(?:s-maxage|max-age)\s*=\s*(\d+)", re.IGNORECASE)
+# Сколько последних записей учитывать при оценке частоты публикаций
+RECENT_ENTRIES_WINDOW = 10
+# Во сколько раз опрашивать чаще средней частоты публикаций
+POLLS_PER_PUBLICATION = 2
+# Множитель роста интервала для лент, которые не изменились
+IDLE_BACKOFF_FACTOR = 1.5
+NOT_MODIFIED_STATUS_CODE = 304
+# Поля ленты, по которым следующий опрос признаёт её неизменившейся
+CACHE_VALIDATORS = ("etag", "last_modified", "content_hash")
+
+
+@dataclass
+class FeedResponse:
+    """Результат условного запроса RSS-ленты."""
+
+    status: int
+    body: bytes | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    cache_control: str | None = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == NOT_MODIFIED_STATUS_CODE
+
+    @property
+    def content_hash(self) -> str | None:
+        if self.body is None:
+            return None
+        return hashlib.sha256(self.body).hexdigest()
+
+
+def conditional_headers(etag: str | None, last_modified: str | None) -> dict:
+    """
+    Заголовки условного запроса по сохранённым ETag и Last-Modified, чтобы
+    сервер мог ответить 304 без тела, если лента не изменилась.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def compare_response(
+    content_hash: str | None, response: FeedResponse
+) -> tuple[bool, dict]:
+    """
+    Сравнивает ответ сервера с сохранённым хэшем тела ленты.
+
+    Возвращает признак того, что разбирать ленту не нужно, и новые значения
+    полей CACHE_VALIDATORS. Валидаторы обновляются при любом ответе с телом:
+    сервер мог выдать новые для того же содержимого.
+    """
+    if response.not_modified:
+        return True, {}
+    updates = {"etag": response.etag, "last_modified": response.last_modified}
+    if response.content_hash == content_hash:
+        return True, updates
+    updates["content_hash"] = response.content_hash
+    return False, updates
+
+
+def parse_max_age(cache_control: str | None) -> int | None:
+    """Возвращает max-age (в секундах) из заголовка Cache-Control."""
+    if not cache_control:
+        return None
+    if "no-store" in cache_control.lower():
+        return None
+    values = [int(value) for value in MAX_AGE_PATTERN.findall(cache_control)]
+    return max(values) if values else None
+
+
+def parse_ttl(ttl: str | int | None) -> int | None:
+    """Возвращает значение элемента RSS <ttl> в секундах."""
+    try:
+        minutes = int(ttl)
+    except (TypeError, ValueError):
+        return None
+    return minutes * 60 if minutes > 0 else None
+
+
+def publication_interval(entry_dates: list[datetime]) -> float | None:
+    """Медианный промежуток (в секундах) между последними публикациями ленты."""
+    dates = sorted(entry_dates, reverse=True)[:RECENT_ENTRIES_WINDOW]
+    gaps = [
+        (newer - older).total_seconds()
+        for newer, older in zip(dates, dates[1:], strict=False)
+        if newer > older
+    ]
+    return median(gaps) if gaps else None
+
+
+def next_poll_interval(
+    previous: float,
+    min_interval: float,
+    max_interval: float,
+    entry_dates: list[datetime] | None = None,
+    changed: bool = True,
+    ttl: int | None = None,
+    max_age: int | None = None,
+) -> float:
+    """
+    Вычисляет интервал (в секундах) до следующего опроса ленты.
+
+    Частые публикации сокращают интервал, неизменная лента увеличивает его.
+    RSS <ttl> и Cache-Control max-age задают нижнюю границу, а весь результат
+    ограничивается отрезком [min_interval, max_interval].
+    """
+    interval = previous
+    if changed and entry_dates:
+        gap = publication_interval(entry_dates)
+        if gap is not None:
+            interval = gap / POLLS_PER_PUBLICATION
+    elif not changed:
+        interval = previous * IDLE_BACKOFF_FACTOR
+
+    server_hint = max(ttl or 0, max_age or 0)
+    interval = max(interval, server_hint)
+    return min(max(interval, min_interval), max_interval)
+
+
+def with_jitter(
+    interval: float, jitter: float, rng: random.Random | None = None
+) -> float:
+    """Случайно растягивает или сжимает интервал на долю ``jitter``."""
+    rng = rng or random
+    return interval * rng.uniform(1 - jitter, 1 + jitter)
+
+
+def failure_backoff(failure_count: int, base: float, maximum: float) -> float:
+    """Экспоненциальная пауза (в секундах) после ``failure_count`` неудач подряд."""
+    if failure_count <= 0:
+        return 0.0
+    return min(base * 2 ** (failure_count - 1), maximum)
+
+
+def parse_retry_after(value: str | None, now: datetime | None = None) -> float | None:
+    """Возвращает паузу из заголовка Retry-After (секунды или HTTP-дата)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max((retry_at - now).total_seconds(), 0.0)
@@ -0,0 +1,18 @@
+import hashlib
+
+
+def rendezvous_weight(worker_id: str, key: str) -> int:
+    digest = hashlib.blake2b(f"{worker_id}:{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def rendezvous_owner(key: str, workers: list[str]) -> str | None:
+    """
+    Выбирает владельца ключа хэшированием с наибольшим весом (HRW).
+
+    При появлении или уходе воркера переезжают только ключи, которыми он
+    владеет, а остальные распределения не меняются.
+    """
+    if not workers:
+        return None
+    return max(workers, key=lambda worker_id: rendezvous_weight(worker_id, key))
@@ -0,0 +1,100 @@
+from collections.abc import Iterable
+from uuid import UUID
+
+
+class SubscriberMap:
+    """
+    Подписчики лент в памяти: feed_id -> множество ID пользователей.
+
+    Пока идёт перезагрузка, изменения запоминаются и повторяются поверх
+    новой выборки: выборка могла быть сделана до них, и без повтора они
+    пропали бы из индекса до следующей сверки.
+    """
+
+    def __init__(self):
+        self.subscribers: dict[UUID, set[int]] = {}
+        # Изменения, пришедшие во время перезагрузки индекса
+        self.pending: list[tuple[str, UUID, int | None]] | None = None
+
+    def get(self, feed_id: UUID) -> list[int]:
+        return list(self.subscribers.get(feed_id, ()))
+
+    def size(self) -> int:
+        return sum(len(users) for users in self.subscribers.values())
+
+    def add(self, feed_id: UUID, user_id: int):
+        self._apply("add", feed_id, user_id)
+
+    def remove(self, feed_id: UUID, user_id: int):
+        self._apply("remove", feed_id, user_id)
+
+    def drop_feed(self, feed_id: UUID):
+        self._apply("drop", feed_id, None)
+
+    def apply_changes(self, changes: list[tuple[str, UUID, int | None]]):
+        """Применяет изменения (операция, feed_id, ID пользователя)."""
+        for operation, feed_id, user_id in changes:
+            self._apply(operation, feed_id, user_id)
+
+    def begin_reload(self):
+        """Начинает запоминать изменения до вызова ``finish_reload``."""
+        self.pending = []
+
+    def finish_reload(self, rows: Iterable[tuple[UUID, int]]):
+        """Заменяет индекс выборкой пар (feed_id, ID пользователя)."""
+        subscribers: dict[UUID, set[int]] = {}
+        for feed_id, user_id in rows:
+            subscribers.setdefault(feed_id, set()).add(user_id)
+        # Повторяем изменения, которых могло не быть в выборке
+        for operation, feed_id, user_id in self.pending or ():
+            self._apply_to(subscribers, operation, feed_id, user_id)
+        self.subscribers = subscribers
+        self.pending = None
+
+    def abort_reload(self):
+        """Прекращает запоминать изменения, оставляя индекс прежним."""
+        self.pending = None
+
+    def _apply(self, operation: str, feed_id: UUID, user_id: int | None):
+        if self.pending is not None:
+            self.pending.append((operation, feed_id, user_id))
+        self._apply_to(self.subscribers, operation, feed_id, user_id)
+
+    @staticmethod
+    def _apply_to(
+        subscribers: dict[UUID, set[int]],
+        operation: str,
+        feed_id: UUID,
+        user_id: int | None,
+    ):
+        if operation == "add":
+            subscribers.setdefault(feed_id, set()).add(user_id)
+        elif operation == "remove":
+            users = subscribers.get(feed_id)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del subscribers[feed_id]
+        else:
+            subscribers.pop(feed_id, None)
+
+
+def subscription_items(data: dict) -> list[tuple[int, str]]:
+    """
+    Пары (ID пользователя, URL ленты) из сообщения без повторов.
+
+    Сообщение содержит либо одну подписку (поля user_id и feed_url), либо
+    пачку подписок в поле items. Неполная подписка делает всё сообщение
+    некорректным: выбрасывается ValueError.
+    """
+    items = data.get("items") or [data]
+    if not isinstance(items, list):
+        raise ValueError("Поле items должно быть списком подписок")
+    pairs = []
+    for item in items:
+        user_id = item.get("user_id") if isinstance(item, dict) else None
+        feed_url = item.get("feed_url") if isinstance(item, dict) else None
+        if not isinstance(user_id, int) or not isinstance(feed_url, str) or not feed_url:
+            raise ValueError(f"Некорректная подписка в сообщении: {item!r}")
+        pairs.append((user_id, feed_url))
+    return list(dict.fromkeys(pairs))
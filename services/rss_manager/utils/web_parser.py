@@ -1,54 +1,266 @@
-import aiohttp
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+from playwright.async_api import Browser, Page, Playwright, Route, async_playwright
+from redis.exceptions import RedisError
+
+from http_client import get_http_session, request_timeout
+from logger_setup import generate_correlation_id, setup_logger
+from services.rss_manager.config import (
+    ARTICLE_CACHE_MAX_TEXT_LENGTH,
+    ARTICLE_CACHE_NEGATIVE_TTL,
+    ARTICLE_CACHE_TTL,
+    ARTICLE_EXTRACTOR_PROCESSES,
+    BROWSER_MAX_PAGES,
+    BROWSER_PAGE_MAX_USES,
+    BROWSER_RESTART_AFTER_PAGES,
+    BROWSER_RESTART_AFTER_SECONDS,
+    redis,
+)
+from services.rss_manager.metrics import ERROR_COUNTER, TIME_OF_OPERATION
+from services.rss_manager.utils.article_cache import ArticleCache
+from services.rss_manager.utils.extractor import DomainSelectors, extract_article
+from services.rss_manager.utils.host_limiter import host_limiter
+
+logger = setup_logger(__name__)
+
+# Ресурсы, которые не нужны для извлечения текста статьи
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+# Разбор HTML нагружает CPU, поэтому выполняется вне цикла событий
+extraction_pool = ProcessPoolExecutor(max_workers=ARTICLE_EXTRACTOR_PROCESSES)
+domain_selectors = DomainSelectors()
+article_cache = ArticleCache(
+    redis,
+    ttl=ARTICLE_CACHE_TTL,
+    negative_ttl=ARTICLE_CACHE_NEGATIVE_TTL,
+    max_text_length=ARTICLE_CACHE_MAX_TEXT_LENGTH,
+)
 
 
 async def fetch_html_aiohttp(url: str, timeout: int = 10) -> str:
     """Загрузка HTML с помощью aiohttp."""
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, timeout=timeout) as resp:
+    session = get_http_session()
+    async with host_limiter.limit(url):
+        async with session.get(url, timeout=request_timeout(timeout)) as resp:
             resp.raise_for_status()
             html = await resp.text()
             return html
 
 
-async def extract_main_text(html: str) -> str:
-    """Извлекает текст основного контента со страницы."""
-    soup = BeautifulSoup(html, "html.parser")
+async def extract_main_text(html: str, url: str | None = None) -> str:
+    """
+    Извлекает текст основного контента со страницы в пуле процессов.
 
-    # Удаляем скрипты, стили и прочие неинформационные теги
-    for tag in soup(["script", "style", "header", "footer", "nav", "form", "noscript"]):
-        tag.extract()
+    Если для домена страницы уже выучен селектор основного блока, он
+    передаётся движку извлечения как подсказка.
+    """
+    domain = urlsplit(url).netloc.lower() if url else None
+    hint = domain_selectors.hint(domain) if domain else None
+    with TIME_OF_OPERATION.labels(request_type="extract_main_text").time():
+        loop = asyncio.get_running_loop()
+        extraction = await loop.run_in_executor(
+            extraction_pool, extract_article, html, hint
+        )
+    MIN_CONTENT_LENGTH = 50
+    if domain and len(extraction.text.split()) > MIN_CONTENT_LENGTH:
+        domain_selectors.learn(domain, extraction.selector)
+    return extraction.text
 
-    # Попытка найти основной блок контента. Здесь можно подстраивать логику.
-    # Сейчас берём просто тексты из body.
-    # Можно попробовать что-то более специфичное, например по определенным классам или тегам.
-    body = soup.find("body")
-    if not body:
-        return soup.get_text("\n", strip=True)
 
-    text = body.get_text("\n", strip=True)
-    return text
+async def block_heavy_resources(route: Route):
+    """Отклоняет загрузку изображений, шрифтов и медиа."""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class BrowserPool:
+    """
+    Пул страниц долгоживущего Chromium.
+
+    Страницы (каждая в своём контексте) переиспользуются между запросами и
+    пересоздаются после ``page_max_uses`` загрузок. Браузер перезапускается
+    после ``restart_after_pages`` загрузок или ``restart_after_seconds``
+    секунд работы: новые страницы открываются уже в новом браузере, а
+    старый закрывается, когда в нём завершится последняя активная страница.
+    Поэтому перезапуск не ждёт момента без нагрузки.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = BROWSER_MAX_PAGES,
+        page_max_uses: int = BROWSER_PAGE_MAX_USES,
+        restart_after_pages: int = BROWSER_RESTART_AFTER_PAGES,
+        restart_after_seconds: float = BROWSER_RESTART_AFTER_SECONDS,
+    ):
+        self.semaphore = asyncio.Semaphore(max_pages)
+        self.lock = asyncio.Lock()
+        self.page_max_uses = page_max_uses
+        self.restart_after_pages = restart_after_pages
+        self.restart_after_seconds = restart_after_seconds
+        self.playwright: Playwright | None = None
+        self.browser: Browser | None = None
+        self.started_at = 0.0
+        self.pages_served = 0
+        # Активные страницы каждого браузера, включая выводимые из работы
+        self.active_pages: dict[Browser, int] = {}
+        # Свободные страницы текущего браузера и количество загрузок в каждой
+        self.idle_pages: list[tuple[Page, int]] = []
+
+    def _restart_due(self) -> bool:
+        return (
+            self.pages_served >= self.restart_after_pages
+            or time.monotonic() - self.started_at >= self.restart_after_seconds
+        )
+
+    async def _launch(self):
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=True)
+        self.started_at = time.monotonic()
+        self.pages_served = 0
+
+    @staticmethod
+    async def _close(browser: Browser):
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+    async def _retire_browser(self):
+        """
+        Выводит текущий браузер из работы: свободные страницы закрываются,
+        а сам браузер — сразу или после освобождения его активных страниц.
+        """
+        browser, self.browser = self.browser, None
+        self.idle_pages.clear()
+        if browser is not None and not self.active_pages.get(browser):
+            await self._close(browser)
+
+    async def _new_page(self) -> Page:
+        context = await self.browser.new_context()
+        await context.route("**/*", block_heavy_resources)
+        return await context.new_page()
+
+    def _page_done(self, browser: Browser) -> bool:
+        """Учитывает освобождение страницы; True, если браузер пора закрыть."""
+        self.active_pages[browser] -= 1
+        if self.active_pages[browser]:
+            return False
+        del self.active_pages[browser]
+        return browser is not self.browser
+
+    async def _acquire_page(self) -> tuple[Page, int]:
+        async with self.lock:
+            if (
+                self.browser is None
+                or not self.browser.is_connected()
+                or self._restart_due()
+            ):
+                await self._retire_browser()
+                await self._launch()
+            browser = self.browser
+            self.active_pages[browser] = self.active_pages.get(browser, 0) + 1
+            try:
+                if self.idle_pages:
+                    return self.idle_pages.pop()
+                return await self._new_page(), 0
+            except Exception:
+                if self._page_done(browser):
+                    await self._close(browser)
+                raise
+
+    async def _release_page(self, page: Page, uses: int, healthy: bool):
+        browser = page.context.browser
+        current = browser is self.browser
+        if current:
+            self.pages_served += 1
+        if self._page_done(browser):
+            # Последняя страница браузера, выведенного из работы
+            await self._close(browser)
+            return
+        if healthy and current and uses < self.page_max_uses:
+            try:
+                await page.goto("about:blank")
+                # Пока страница очищалась, браузер мог быть выведен из работы
+                if browser is self.browser:
+                    self.idle_pages.append((page, uses))
+                    return
+            except Exception:
+                pass
+        try:
+            await page.context.close()
+        except Exception:
+            pass
+
+    async def fetch_html(self, url: str, timeout: int) -> str:
+        async with self.semaphore:
+            page, uses = await self._acquire_page()
+            healthy = False
+            try:
+                # Текст статьи доступен уже после DOMContentLoaded
+                await page.goto(url, timeout=timeout * 1000, wait_until="domcontentloaded")
+                html = await page.content()
+                healthy = True
+                return html
+            finally:
+                await self._release_page(page, uses + 1, healthy)
+
+    async def close(self):
+        async with self.lock:
+            await self._retire_browser()
+            for browser in list(self.active_pages):
+                await self._close(browser)
+            self.active_pages.clear()
+            if self.playwright is not None:
+                await self.playwright.stop()
+                self.playwright = None
+
+
+browser_pool = BrowserPool()
 
 
 async def fetch_html_playwright(url: str, timeout: int = 15) -> str:
     """Загрузка HTML с помощью playwright для динамических сайтов."""
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        await page.goto(url, timeout=timeout * 1000)
-        # Опционально: можно подождать определённый селектор, чтобы страница точно загрузилась
-        # await page.wait_for_selector('article', timeout=5000)
-        html = await page.content()
-        await browser.close()
-        return html
+    async with host_limiter.limit(url):
+        return await browser_pool.fetch_html(url, timeout)
 
 
 async def fetch_article_text(url: str) -> str:
+    """
+    Возвращает текст статьи из кэша или загружает и кэширует его.
+    Недоступный кэш не мешает загрузке.
+    """
+    try:
+        hit, text = await article_cache.get(url)
+    except RedisError as e:
+        ERROR_COUNTER.labels(error_type="article_cache_error").inc()
+        logger.error(
+            f"Ошибка чтения кэша статей: {e}", correlation_id=generate_correlation_id()
+        )
+        hit, text = False, None
+    if hit:
+        return text
+    text = await download_article_text(url)
+    try:
+        await article_cache.set(url, text)
+    except RedisError as e:
+        ERROR_COUNTER.labels(error_type="article_cache_error").inc()
+        logger.error(
+            f"Ошибка записи в кэш статей: {e}", correlation_id=generate_correlation_id()
+        )
+    return text
+
+
+async def download_article_text(url: str) -> str:
     # Сначала пробуем загрузить и распарсить без браузера
     try:
         html = await fetch_html_aiohttp(url)
-        text = await extract_main_text(html)
+        text = await extract_main_text(html, url)
         MIN_CONTENT_LENGTH = 50
         if text and len(text.split()) > MIN_CONTENT_LENGTH:  # Если текста достаточно много, считаем успехом
             return text
@@ -59,7 +271,7 @@ async def fetch_article_text(url: str) -> str:
     # Если мало текста или ошибка — пробуем через playwright
     try:
         html = await fetch_html_playwright(url)
-        text = await extract_main_text(html)
+        text = await extract_main_text(html, url)
         return text
     except Exception:
         return None
@@ -0,0 +1,86 @@
+import hashlib
+import hmac
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# Алгоритмы подписи X-Hub-Signature, допустимые спецификацией WebSub
+SIGNATURE_ALGORITHMS = {
+    "sha1": hashlib.sha1,
+    "sha256": hashlib.sha256,
+    "sha384": hashlib.sha384,
+    "sha512": hashlib.sha512,
+}
+# Хаб принимает запрос подписки кодом 202, некоторые хабы отвечают 204
+ACCEPTED_STATUS_CODES = (202, 204)
+
+
+def callback_url(base_url: str, feed_id) -> str:
+    """Адрес обратного вызова для конкретной ленты."""
+    return f"{base_url.rstrip('/')}/websub/{feed_id}"
+
+
+def accepts_secret(hub_url: str) -> bool:
+    """Секрет передаём только по https: по http его прочтёт любой посредник."""
+    return urlsplit(hub_url).scheme.lower() == "https"
+
+
+def verify_signature(secret: str | None, body: bytes, header: str | None) -> bool:
+    """
+    Проверяет HMAC-подпись доставленного хабом содержимого.
+
+    Заголовок имеет вид ``<алгоритм>=<hex-подпись>``. Без секрета подпись не
+    проверить, поэтому такая доставка считается недостоверной.
+    """
+    if not secret or not header or "=" not in header:
+        return False
+    algorithm, _, signature = header.partition("=")
+    digest = SIGNATURE_ALGORITHMS.get(algorithm.strip().lower())
+    if digest is None:
+        return False
+    expected = hmac.new(secret.encode(), body, digest).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+def lease_expires_at(
+    now: datetime, lease_seconds: str | None, default_seconds: int
+) -> datetime:
+    """Момент окончания аренды подписки по параметру hub.lease_seconds."""
+    try:
+        seconds = int(lease_seconds) if lease_seconds else default_seconds
+    except ValueError:
+        seconds = default_seconds
+    return now + timedelta(seconds=max(seconds, 0))
+
+
+def needs_renewal(
+    expires_at: datetime | None, now: datetime, renew_before: float
+) -> bool:
+    """Подписку продлеваем заранее, чтобы поток уведомлений не прерывался."""
+    return expires_at is None or expires_at - timedelta(seconds=renew_before) <= now
+
+
+async def request_subscription(
+    session: aiohttp.ClientSession,
+    hub_url: str,
+    topic: str,
+    callback: str,
+    secret: str | None = None,
+    lease_seconds: int | None = None,
+    mode: str = "subscribe",
+) -> bool:
+    """
+    Отправляет хабу запрос подписки или отписки.
+
+    Хаб подтверждает подписку отдельным GET-запросом на адрес обратного
+    вызова, поэтому успешный ответ означает лишь, что запрос принят. Хабу
+    без https секрет не отправляется.
+    """
+    data = {"hub.mode": mode, "hub.topic": topic, "hub.callback": callback}
+    if secret and accepts_secret(hub_url):
+        data["hub.secret"] = secret
+    if lease_seconds:
+        data["hub.lease_seconds"] = str(lease_seconds)
+    async with session.post(hub_url, data=data) as response:
+        return response.status in ACCEPTED_STATUS_CODES
@@ -0,0 +1,273 @@
+import asyncio
+import secrets
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from aiohttp import web
+from sqlalchemy import select
+
+from http_client import get_http_session
+from logger_setup import generate_correlation_id, setup_logger
+from services.rss_manager.config import (
+    WEBSUB_CALLBACK_URL,
+    WEBSUB_LEASE_SECONDS,
+    WEBSUB_PORT,
+    WEBSUB_RENEW_BEFORE_SECONDS,
+    WEBSUB_RENEWAL_CHECK_SECONDS,
+    WEBSUB_RETRY_SECONDS,
+    async_session_factory,
+)
+from services.rss_manager.database.models import RssFeed
+from services.rss_manager.metrics import (
+    ERROR_COUNTER,
+    TIME_OF_OPERATION,
+    WEBSUB_NOTIFICATIONS,
+)
+from services.rss_manager.rss_listener import RSSListener
+from services.rss_manager.sharding import FeedSharding
+from services.rss_manager.utils.websub import (
+    accepts_secret,
+    callback_url,
+    lease_expires_at,
+    needs_renewal,
+    request_subscription,
+    verify_signature,
+)
+
+logger = setup_logger(__name__)
+
+
+class WebSubSubscriber:
+    """
+    Подписчик WebSub (PubSubHubbub).
+
+    Поднимает HTTP-эндпоинт обратного вызова, подтверждает запросы хаба и
+    передаёт доставленное содержимое в общий конвейер записей RSSListener.
+    Подписки на хабы оформляются и продлеваются для лент этой реплики.
+    """
+
+    def __init__(
+        self,
+        listener: RSSListener,
+        sharding: FeedSharding,
+        base_url: str = WEBSUB_CALLBACK_URL,
+        port: int = WEBSUB_PORT,
+        lease_seconds: int = WEBSUB_LEASE_SECONDS,
+    ):
+        self.listener = listener
+        self.sharding = sharding
+        self.base_url = base_url
+        self.port = port
+        self.lease_seconds = lease_seconds
+        self.session_factory = async_session_factory
+        self.runner: web.AppRunner | None = None
+        self.tasks: set[asyncio.Task] = set()
+
+        self.app = web.Application()
+        self.app.router.add_get("/websub/{feed_id}", self.handle_verification)
+        self.app.router.add_post("/websub/{feed_id}", self.handle_notification)
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "0.0.0.0", self.port)  # noqa: S104
+        await site.start()
+        logger.info(
+            f"Эндпоинт WebSub слушает порт {self.port}",
+            correlation_id=generate_correlation_id(),
+        )
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    @staticmethod
+    def feed_id_from(request: web.Request) -> UUID | None:
+        try:
+            return UUID(request.match_info["feed_id"])
+        except ValueError:
+            return None
+
+    async def handle_verification(self, request: web.Request) -> web.Response:
+        """Подтверждение подписки или отписки по запросу хаба (эхо hub.challenge)."""
+        correlation_id = generate_correlation_id()
+        mode = request.query.get("hub.mode")
+        topic = request.query.get("hub.topic")
+        challenge = request.query.get("hub.challenge", "")
+        feed_id = self.feed_id_from(request)
+        if feed_id is None:
+            return web.Response(status=404)
+
+        async with self.session_factory() as session:
+            db_feed = await session.get(RssFeed, feed_id)
+            if mode == "subscribe":
+                if db_feed is None or db_feed.websub_topic != topic:
+                    return web.Response(status=404)  # Подписку мы не запрашивали
+                db_feed.websub_lease_expires_at = lease_expires_at(
+                    datetime.now(),
+                    request.query.get("hub.lease_seconds"),
+                    self.lease_seconds,
+                )
+                await session.commit()
+                logger.info(
+                    f"Хаб подтвердил подписку на {topic} до "
+                    f"{db_feed.websub_lease_expires_at}",
+                    correlation_id=correlation_id,
+                )
+                return web.Response(text=challenge)
+
+            if mode == "unsubscribe":
+                # Отписку подтверждаем, только если лента больше не ждёт уведомлений
+                if db_feed is not None and db_feed.websub_hub:
+                    return web.Response(status=404)
+                return web.Response(text=challenge)
+
+            if mode == "denied" and db_feed is not None:
+                db_feed.websub_lease_expires_at = None
+                await session.commit()
+                logger.warning(
+                    f"Хаб отклонил подписку на {topic}: "
+                    f"{request.query.get('hub.reason')}",
+                    correlation_id=correlation_id,
+                )
+                return web.Response()
+        return web.Response(status=404)
+
+    async def handle_notification(self, request: web.Request) -> web.Response:
+        """
+        Приём доставленного хабом содержимого.
+
+        Ответ отправляется сразу, а обработка идёт в фоне. Доставку с неверной
+        подписью спецификация требует подтвердить кодом 2xx и отбросить.
+        Ленты с хабом без https подписаны без секрета: такому уведомлению не
+        доверяем и лишь забираем ленту из источника вне очереди.
+        """
+        feed_id = self.feed_id_from(request)
+        body = await request.read()
+        async with self.session_factory() as session:
+            db_feed = await session.get(RssFeed, feed_id) if feed_id else None
+        if db_feed is None:
+            WEBSUB_NOTIFICATIONS.labels(result="unknown_feed").inc()
+            return web.Response(status=410)  # Хаб может прекратить доставку
+
+        if not db_feed.websub_secret:
+            WEBSUB_NOTIFICATIONS.labels(result="unsigned").inc()
+            self.spawn(self.refetch(db_feed))
+            return web.Response(status=202)
+
+        if not verify_signature(
+            db_feed.websub_secret, body, request.headers.get("X-Hub-Signature")
+        ):
+            WEBSUB_NOTIFICATIONS.labels(result="bad_signature").inc()
+            logger.warning(
+                f"Отброшено уведомление WebSub с неверной подписью для {db_feed.url}",
+                correlation_id=generate_correlation_id(),
+            )
+            return web.Response(status=202)
+
+        WEBSUB_NOTIFICATIONS.labels(result="accepted").inc()
+        self.spawn(self.ingest(feed_id, body))
+        return web.Response(status=202)
+
+    def spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def ingest(self, feed_id: UUID, body: bytes):
+        try:
+            await self.listener.ingest_pushed_feed(feed_id, body)
+        except Exception as e:
+            ERROR_COUNTER.labels(error_type="websub_ingest_error").inc()
+            logger.error(
+                f"Ошибка при обработке уведомления WebSub: {e}",
+                correlation_id=generate_correlation_id(),
+            )
+
+    async def refetch(self, db_feed: RssFeed):
+        try:
+            await (await self.listener.submit(db_feed))
+        except Exception as e:
+            ERROR_COUNTER.labels(error_type="websub_ingest_error").inc()
+            logger.error(
+                f"Ошибка при опросе {db_feed.url} по уведомлению WebSub: {e}",
+                correlation_id=generate_correlation_id(),
+            )
+
+    def due_for_subscription(self, db_feed: RssFeed, now: datetime) -> bool:
+        if not self.sharding.owns(db_feed.feed_id):
+            return False
+        if not needs_renewal(
+            db_feed.websub_lease_expires_at, now, WEBSUB_RENEW_BEFORE_SECONDS
+        ):
+            return False
+        # Не повторяем запрос, пока хаб может ещё прислать подтверждение
+        requested_at = db_feed.websub_requested_at
+        return requested_at is None or now - requested_at >= timedelta(
+            seconds=WEBSUB_RETRY_SECONDS
+        )
+
+    async def subscribe(self, session, db_feed: RssFeed, correlation_id: str):
+        """
+        Отправляет хабу запрос подписки с новым сроком аренды.
+
+        Секрет выдаётся только хабу с https, остальные подписываются без него.
+        """
+        if not accepts_secret(db_feed.websub_hub):
+            db_feed.websub_secret = None
+        elif not db_feed.websub_secret:
+            db_feed.websub_secret = secrets.token_hex(32)
+        db_feed.websub_requested_at = datetime.now()
+        # Хаб может проверить подписку и прислать содержимое ещё до ответа,
+        # поэтому секрет должен быть сохранён заранее
+        await session.commit()
+        accepted = await request_subscription(
+            get_http_session(),
+            db_feed.websub_hub,
+            db_feed.websub_topic,
+            callback_url(self.base_url, db_feed.feed_id),
+            secret=db_feed.websub_secret,
+            lease_seconds=self.lease_seconds,
+        )
+        if not accepted:
+            ERROR_COUNTER.labels(error_type="websub_subscribe_error").inc()
+            logger.warning(
+                f"Хаб {db_feed.websub_hub} не принял подписку на {db_feed.websub_topic}",
+                correlation_id=correlation_id,
+            )
+
+    async def renew_subscriptions(self):
+        """Оформляет новые и продлевает истекающие подписки лент этой реплики."""
+        correlation_id = generate_correlation_id()
+        now = datetime.now()
+        with TIME_OF_OPERATION.labels(request_type="renew_websub").time():
+            async with self.session_factory() as session:
+                feeds = (
+                    await session.execute(
+                        select(RssFeed).where(RssFeed.websub_hub.is_not(None))
+                    )
+                ).scalars().all()
+                for db_feed in feeds:
+                    if not self.due_for_subscription(db_feed, now):
+                        continue
+                    try:
+                        await self.subscribe(session, db_feed, correlation_id)
+                    except Exception as e:
+                        ERROR_COUNTER.labels(error_type="websub_subscribe_error").inc()
+                        logger.error(
+                            f"Ошибка при подписке на хаб {db_feed.websub_hub}: {e}",
+                            correlation_id=correlation_id,
+                        )
+
+    async def run_renewals(self, interval: float = WEBSUB_RENEWAL_CHECK_SECONDS):
+        """Периодически продлевает подписки до истечения их аренды."""
+        while True:
+            try:
+                await self.renew_subscriptions()
+            except Exception as e:
+                ERROR_COUNTER.labels(error_type="websub_renewal_error").inc()
+                logger.error(
+                    f"Ошибка при продлении подписок WebSub: {e}",
+                    correlation_id=generate_correlation_id(),
+                )
+            await asyncio.sleep(interval)
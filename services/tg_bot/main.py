@@ -8,6 +8,7 @@ from aiogram import Dispatcher
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiohttp import web
 
+from http_client import close_http_session
 from logger_setup import generate_correlation_id, setup_logger
 from services.tg_bot.config import (
     MINUTES_BETWEEN_POSTS,
@@ -214,6 +215,13 @@ async def on_shutdown(dp: Dispatcher, connection: Optional[aio_pika.Connection])
         except Exception as e:
             logger.error(f"Failed to close RabbitMQ connection: {e}", correlation_id=correlation_id)
 
+    # Close shared HTTP client used by RSS checks
+    try:
+        await close_http_session()
+        logger.info("HTTP client session closed successfully.", correlation_id=correlation_id)
+    except Exception as e:
+        logger.error(f"Failed to close HTTP client session: {e}", correlation_id=correlation_id)
+
     # Close bot session
     try:
         await bot.session.close()
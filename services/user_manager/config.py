@@ -41,6 +41,10 @@ if not all([RABBITMQ_USER, RABBITMQ_PASS, RABBITMQ_HOST]):
     raise ValueError("Переменные окружения для RabbitMQ установлены некорректно.")
 
 
+# Обменник событий изменения профилей пользователей
+PROFILE_CHANGED_EXCHANGE = "user.profile.changed"
+
+
 async def get_rabbit_connection():
     """Устанавливает соединение с RabbitMQ"""
     return await connect_robust(
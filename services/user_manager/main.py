@@ -1,9 +1,14 @@
 import asyncio
 
+from aio_pika import ExchangeType
 from prometheus_client import start_http_server
 
 from logger_setup import generate_correlation_id, setup_logger
-from services.user_manager.config import get_rabbit_connection, init_db
+from services.user_manager.config import (
+    PROFILE_CHANGED_EXCHANGE,
+    get_rabbit_connection,
+    init_db,
+)
 from services.user_manager.managers import UserQueueManager
 from services.user_manager.metrics import user_manager_registry
 
@@ -30,9 +35,13 @@ async def main():
     antipathy_queue = await channel.declare_queue("user.antipathy.update", durable=True)
     set_status_id_queue = await channel.declare_queue("user.set_status.id", durable=True)
     set_status_username_queue = await channel.declare_queue("user.set_status.username", durable=True)
+    # События изменения профилей для сервисов, кэширующих профили
+    profile_changed_exchange = await channel.declare_exchange(
+        PROFILE_CHANGED_EXCHANGE, ExchangeType.FANOUT, durable=True
+    )
 
     # Инициализация менеджера очередей
-    user_queue_manager = UserQueueManager(channel)
+    user_queue_manager = UserQueueManager(channel, profile_changed_exchange)
 
     # Подписка на очереди
     await create_queue.consume(user_queue_manager.handle_create_user)
@@ -1,7 +1,7 @@
 # managers.py
 import json
 
-from aio_pika import Channel, IncomingMessage, Message
+from aio_pika import Channel, Exchange, IncomingMessage, Message
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.future import select
 
@@ -57,7 +57,8 @@ class UserDBManager:
             result = await session.execute(select(User).where(User.username == username))
             return result.scalar_one_or_none()
 
-    async def update_user(self, user_id: int, correlation_id: str, **kwargs):
+    async def update_user(self, user_id: int, correlation_id: str, **kwargs) -> bool:
+        """Обновляет поля пользователя; возвращает True, если изменения сохранены."""
         async with async_session_factory() as session:
             try:
                 result = await session.execute(
@@ -74,6 +75,7 @@ class UserDBManager:
                     f"Пользователь с ID {user_id} обновлен.",
                     correlation_id=correlation_id,
                 )
+                return True
             except NoResultFound:
                 ERROR_COUNTER.labels(error_type="user_not_found").inc()
                 logger.info(
@@ -87,12 +89,14 @@ class UserDBManager:
                     f"Ошибка при обновлении пользователя: {e}",
                     correlation_id=correlation_id,
                 )
+            return False
 
 
 class UserQueueManager:
-    def __init__(self, channel: Channel):
+    def __init__(self, channel: Channel, profile_changed_exchange: Exchange):
         self.user_db_manager = UserDBManager()
         self.channel = channel
+        self.profile_changed_exchange = profile_changed_exchange
 
     async def handle_create_user(self, message: IncomingMessage):
         async with message.process():
@@ -156,6 +160,17 @@ class UserQueueManager:
                         f"Неверный формат запроса: {e}", correlation_id=correlation_id
                     )
 
+    async def publish_profile_changed(self, user_id: int, correlation_id: str):
+        """Сообщает сервисам, кэширующим профили, что профиль изменился."""
+        await self.profile_changed_exchange.publish(
+            Message(
+                body=json.dumps(
+                    {"user_id": user_id, "correlation_id": correlation_id}
+                ).encode()
+            ),
+            routing_key="",
+        )
+
     async def handle_update_preferences(self, message: IncomingMessage):
         async with message.process():
             with TIME_OF_OPERATION.labels(request_type="update_preferences").time():
@@ -165,11 +180,12 @@ class UserQueueManager:
                     user_id = body["user_id"]
                     preferences = body["preferences"]
                     correlation_id = message.correlation_id
-                    await self.user_db_manager.update_user(
+                    if await self.user_db_manager.update_user(
                         user_id=user_id,
                         preferences=preferences,
                         correlation_id=correlation_id,
-                    )
+                    ):
+                        await self.publish_profile_changed(user_id, correlation_id)
                     logger.info(
                         f"Обработано обновление интересов пользователя с ID {user_id}.",
                         correlation_id=correlation_id,
@@ -189,9 +205,10 @@ class UserQueueManager:
                     user_id = body["user_id"]
                     antipathy = body["antipathy"]
                     correlation_id = message.correlation_id
-                    await self.user_db_manager.update_user(
+                    if await self.user_db_manager.update_user(
                         user_id=user_id, antipathy=antipathy, correlation_id=correlation_id
-                    )
+                    ):
+                        await self.publish_profile_changed(user_id, correlation_id)
                     logger.info(
                         f"Обработано обновление антипатий пользователя с ID {user_id}.",
                         correlation_id=correlation_id,
@@ -0,0 +1,53 @@
+import pytest
+
+
+class Clock:
+    """Часы для тестов: время меняется только присваиванием ``now``."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+class FakeRedis:
+    """Хранилище в памяти с подмножеством API redis.asyncio и сроками жизни ключей."""
+
+    def __init__(self, clock: Clock):
+        self.clock = clock
+        self.values: dict[str, tuple[bytes, float | None]] = {}
+
+    def _alive(self, key: str) -> bytes | None:
+        entry = self.values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self.clock():
+            del self.values[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> bytes | None:
+        return self._alive(key)
+
+    async def set(self, key: str, value, ex: float | None = None, nx: bool = False):
+        if nx and self._alive(key) is not None:
+            return None
+        if not isinstance(value, bytes):
+            value = str(value).encode()
+        self.values[key] = (value, None if ex is None else self.clock() + ex)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+
+@pytest.fixture
+def fake_redis(clock: Clock) -> FakeRedis:
+    return FakeRedis(clock)
@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from services.content_validator.aimd import (
+    LATENCY_WARMUP_REQUESTS,
+    AdaptiveLimiter,
+    AIMDController,
+    is_overload,
+)
+
+
+REQUEST = httpx.Request("POST", "https://api.together.xyz/v1/chat/completions")
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@pytest.mark.parametrize(
+    "error,expected_result",
+    [
+        (ProviderError(429), True),
+        (ProviderError(503), True),
+        (ProviderError(400), False),
+        (asyncio.TimeoutError(), True),
+        (openai.APITimeoutError(request=REQUEST), True),
+        (openai.APIConnectionError(request=REQUEST), True),
+        (httpx.ReadTimeout("timed out", request=REQUEST), True),
+        (ValueError("bad json"), False),
+    ],
+)
+def test_is_overload(error, expected_result):
+    assert is_overload(error) is expected_result
+
+
+def test_limit_grows_additively_and_halves_on_overload(clock):
+    controller = AIMDController(1, 32, 4, clock=clock)
+    for _ in range(4):
+        controller.on_success(1.0)
+    assert controller.limit == 4  # Примерно +1 за окно из limit запросов
+    for _ in range(8):
+        controller.on_success(1.0)
+    assert controller.limit >= 5
+    before = controller.current
+    clock.now = 10
+    controller.on_overload()
+    assert controller.current == pytest.approx(before / 2)
+
+
+def test_simultaneous_overloads_decrease_once(clock):
+    controller = AIMDController(1, 32, 16, clock=clock)
+    for _ in range(5):
+        controller.on_overload()
+    assert controller.limit == 8
+    clock.now = 2
+    controller.on_overload()
+    assert controller.limit == 4
+
+
+def test_limit_stays_within_bounds(clock):
+    controller = AIMDController(2, 3, 3, clock=clock)
+    for step in range(5):
+        clock.now = step * 10
+        controller.on_overload()
+    assert controller.limit == 2
+    for _ in range(100):
+        controller.on_success(1.0)
+    assert controller.limit == 3
+
+
+def test_latency_spike_counts_as_overload(clock):
+    controller = AIMDController(1, 32, 8, spike_factor=3, clock=clock)
+    for _ in range(LATENCY_WARMUP_REQUESTS):
+        assert controller.on_success(1.0) is False
+    limit = controller.current
+    assert controller.on_success(10.0) is True
+    assert controller.current == pytest.approx(limit / 2)
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_bounds_concurrency():
+    controller = AIMDController(1, 2, 2)
+    limiter = AdaptiveLimiter(controller)
+    running, peak = 0, 0
+
+    async def request():
+        nonlocal running, peak
+        async with limiter:
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(request() for _ in range(6)))
+    assert peak == 2
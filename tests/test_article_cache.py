@@ -0,0 +1,60 @@
+import pytest
+
+from services.rss_manager.utils.article_cache import ArticleCache
+
+URL = "https://example.com/post"
+
+
+def make_cache(redis) -> ArticleCache:
+    return ArticleCache(redis, ttl=3600, negative_ttl=60, max_text_length=10)
+
+
+@pytest.mark.asyncio
+async def test_miss_then_hit(fake_redis):
+    cache = make_cache(fake_redis)
+    assert await cache.get(URL) == (False, None)
+    await cache.set(URL, "Текст")
+    assert await cache.get(URL) == (True, "Текст")
+
+
+@pytest.mark.asyncio
+async def test_failed_download_is_negative_hit(fake_redis):
+    cache = make_cache(fake_redis)
+    await cache.set(URL, None)
+    assert await cache.get(URL) == (True, None)
+    await cache.set(URL, "")
+    assert await cache.get(URL) == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_negative_entry_expires_before_text(fake_redis, clock):
+    cache = make_cache(fake_redis)
+    other_url = "https://example.com/other"
+    await cache.set(URL, None)
+    await cache.set(other_url, "Текст")
+    clock.now = 61
+    assert await cache.get(URL) == (False, None)
+    assert await cache.get(other_url) == (True, "Текст")
+    clock.now = 3601
+    assert await cache.get(other_url) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_text_starting_with_marker_is_not_negative(fake_redis):
+    cache = make_cache(fake_redis)
+    await cache.set(URL, "0 ошибок")
+    assert await cache.get(URL) == (True, "0 ошибок")
+
+
+@pytest.mark.asyncio
+async def test_long_text_is_truncated(fake_redis):
+    cache = make_cache(fake_redis)
+    await cache.set(URL, "abcdefghijklmnop")
+    assert await cache.get(URL) == (True, "abcdefghij")
+
+
+@pytest.mark.asyncio
+async def test_without_redis_cache_is_disabled():
+    cache = make_cache(None)
+    await cache.set(URL, "Текст")
+    assert await cache.get(URL) == (False, None)
@@ -0,0 +1,39 @@
+from services.rss_manager.utils.extractor import DomainSelectors, extract_article
+
+PARAGRAPH = (
+    "<p>"
+    + "Central banks kept rates unchanged, citing inflation, growth and jobs data. " * 3
+    + "</p>"
+)
+PAGE = f"""<html><head><script>var tracking = 1;</script></head><body>
+<nav><a href="/">Home</a> <a href="/news">News</a></nav>
+<div class="sidebar">Popular: one, two, three, four, five, six</div>
+<div id="content"><h1>Rates</h1>{PARAGRAPH * 5}<div class="share">Share</div></div>
+<footer>Copyright</footer></body></html>"""
+
+
+def test_extract_article_drops_boilerplate():
+    extraction = extract_article(PAGE)
+    assert extraction.selector == "//div[@id='content']"
+    assert extraction.text.startswith("Rates\nCentral banks")
+    for noise in ("Home", "Popular", "Share", "Copyright", "tracking"):
+        assert noise not in extraction.text
+
+
+def test_extract_article_prefers_schema_org_body():
+    page = f"""<html><body><div class="post">{PARAGRAPH * 5}</div>
+    <div itemprop="articleBody">{PARAGRAPH * 2}</div></body></html>"""
+    extraction = extract_article(page)
+    assert extraction.text.count("Central banks") == 6
+
+
+def test_extract_article_handles_empty_html():
+    assert extract_article("").text == ""
+
+
+def test_domain_selectors_need_several_hits():
+    selectors = DomainSelectors(min_hits=2)
+    selectors.learn("example.com", "//div[@id='content']")
+    assert selectors.hint("example.com") is None
+    selectors.learn("example.com", "//div[@id='content']")
+    assert selectors.hint("example.com") == "//div[@id='content']"
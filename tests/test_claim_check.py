@@ -0,0 +1,21 @@
+import pytest
+
+from claim_check import post_key, split_subscribers, subscribers_key
+
+
+@pytest.mark.parametrize(
+    "subscribers,chunk_size,expected_result",
+    [
+        ([1, 2, 3, 4, 5], 2, [[1, 2], [3, 4], [5]]),
+        ([1, 2, 3, 4], 2, [[1, 2], [3, 4]]),
+        ([1, 2], 500, [[1, 2]]),
+        ([], 500, [[]]),
+    ],
+)
+def test_split_subscribers(subscribers, chunk_size, expected_result):
+    assert split_subscribers(subscribers, chunk_size) == expected_result
+
+
+def test_chunk_keys_belong_to_post():
+    assert subscribers_key("42", 0).startswith(post_key("42") + ":")
+    assert subscribers_key("42", 0) != subscribers_key("42", 1)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.rss_manager.utils.entries import entry_key, is_fresh, normalize_link
+
+
+@pytest.mark.parametrize(
+    "link,expected_result",
+    [
+        ("HTTPS://Example.com:443/news/1/", "https://example.com/news/1"),
+        ("https://example.com/a?utm_source=rss&b=2&a=1", "https://example.com/a?a=1&b=2"),
+        ("https://example.com/a?fbclid=xyz#comments", "https://example.com/a"),
+        ("http://example.com", "http://example.com/"),
+    ],
+)
+def test_normalize_link(link, expected_result):
+    assert normalize_link(link) == expected_result
+
+
+def test_entry_key_prefers_guid():
+    first = {"id": "urn:post:1", "link": "https://example.com/a"}
+    edited = {"id": "urn:post:1", "link": "https://example.com/a-renamed", "title": "New"}
+    assert entry_key(first) == entry_key(edited)
+
+
+def test_entry_key_falls_back_to_normalized_link():
+    first = {"link": "https://example.com/a?utm_medium=rss"}
+    second = {"link": "https://EXAMPLE.com/a/"}
+    assert entry_key(first) == entry_key(second)
+
+
+def test_entry_key_falls_back_to_content():
+    first = {"title": "Title", "summary": "Text"}
+    second = {"title": "Title", "summary": "Other text"}
+    assert entry_key(first) != entry_key(second)
+    assert len(entry_key(first)) == 64
+
+
+@pytest.mark.parametrize(
+    "age_hours,expected_result",
+    [(1, True), (24, True), (25, False), (None, True)],
+)
+def test_is_fresh(age_hours, expected_result):
+    now = datetime(2024, 5, 10, 12)
+    published_at = None if age_hours is None else now - timedelta(hours=age_hours)
+    assert is_fresh(published_at, now, timedelta(hours=24)) is expected_result
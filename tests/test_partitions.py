@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from services.rss_manager.utils.partitions import (
+    add_months,
+    expired_partitions,
+    months_between,
+    partition_month,
+    partition_name,
+)
+
+
+def test_add_months_crosses_years():
+    assert add_months(datetime(2024, 11, 1), 3) == datetime(2025, 2, 1)
+    assert add_months(datetime(2024, 1, 1), -1) == datetime(2023, 12, 1)
+
+
+def test_partition_name_round_trip():
+    name = partition_name(datetime(2024, 5, 1))
+    assert name == "rss_posts_y2024m05"
+    assert partition_month(name) == datetime(2024, 5, 1)
+    assert partition_month("rss_posts_default") is None
+
+
+def test_months_between():
+    assert months_between(datetime(2024, 11, 15), datetime(2025, 1, 3)) == [
+        datetime(2024, 11, 1),
+        datetime(2024, 12, 1),
+        datetime(2025, 1, 1),
+    ]
+
+
+def test_expired_partitions_keep_retention_window():
+    names = [
+        "rss_posts_y2024m01",
+        "rss_posts_y2024m02",
+        "rss_posts_y2024m03",
+        "rss_posts_default",
+    ]
+    # При сроке хранения в 2 месяца в мае нужны посты с 1 марта
+    assert expired_partitions(names, datetime(2024, 5, 20), 2) == [
+        "rss_posts_y2024m01",
+        "rss_posts_y2024m02",
+    ]
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from services.rss_manager.pipeline import Stage
+
+
+def record_error(errors: list):
+    async def on_error(item, error):
+        errors.append((item, error))
+
+    return on_error
+
+
+@pytest.mark.asyncio
+async def test_items_are_handed_to_next_stage():
+    results = []
+    errors = []
+
+    async def collect(item):
+        results.append(item)
+
+    collect_stage = Stage("collect", collect, 1, 10, record_error(errors))
+
+    async def double(item):
+        await collect_stage.put(item * 2)
+
+    double_stage = Stage("double", double, 2, 10, record_error(errors))
+    for stage in (double_stage, collect_stage):
+        stage.start()
+    for item in range(5):
+        await double_stage.put(item)
+    await double_stage.queue.join()
+    await collect_stage.queue.join()
+    for stage in (double_stage, collect_stage):
+        await stage.stop()
+
+    assert sorted(results) == [0, 2, 4, 6, 8]
+    assert errors == []
+
+
+@pytest.mark.asyncio
+async def test_full_queue_blocks_previous_stage():
+    release = asyncio.Event()
+
+    async def wait(item):
+        await release.wait()
+
+    stage = Stage("slow", wait, 1, 1, record_error([]))
+    stage.start()
+    await stage.put(1)  # Занимает обработчик
+    await asyncio.sleep(0)
+    await stage.put(2)  # Заполняет очередь
+    blocked = asyncio.create_task(stage.put(3))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    release.set()
+    await asyncio.wait_for(blocked, 1)
+    await stage.queue.join()
+    await stage.stop()
+
+
+@pytest.mark.asyncio
+async def test_handler_error_is_reported_with_item():
+    errors = []
+
+    async def fail(item):
+        raise ValueError(item)
+
+    stage = Stage("fail", fail, 1, 10, record_error(errors))
+    stage.start()
+    await stage.put("job")
+    await stage.queue.join()
+    await stage.stop()
+
+    assert [(item, str(error)) for item, error in errors] == [("job", "job")]
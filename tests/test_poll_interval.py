@@ -0,0 +1,139 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.rss_manager.utils.polling import (
+    CACHE_VALIDATORS,
+    FeedResponse,
+    compare_response,
+    conditional_headers,
+    failure_backoff,
+    next_poll_interval,
+    parse_max_age,
+    parse_retry_after,
+    parse_ttl,
+    with_jitter,
+)
+
+MIN_INTERVAL = 120
+MAX_INTERVAL = 6 * 3600
+NOW = datetime(2024, 12, 1, 12, 0)
+
+
+@pytest.mark.parametrize(
+    "header,expected_result",
+    [
+        ("public, max-age=600", 600),
+        ("max-age=60, s-maxage=900", 900),
+        ("no-store, max-age=600", None),
+        ("no-cache", None),
+        (None, None),
+    ],
+)
+def test_parse_max_age(header, expected_result):
+    assert parse_max_age(header) == expected_result
+
+
+@pytest.mark.parametrize(
+    "ttl,expected_result",
+    [("60", 3600), (15, 900), ("0", None), ("abc", None), (None, None)],
+)
+def test_parse_ttl(ttl, expected_result):
+    assert parse_ttl(ttl) == expected_result
+
+
+def test_busy_feed_is_polled_more_often():
+    dates = [NOW - timedelta(minutes=20 * i) for i in range(10)]
+    interval = next_poll_interval(600, MIN_INTERVAL, MAX_INTERVAL, entry_dates=dates)
+    assert interval == 600  # половина промежутка между публикациями
+
+
+def test_unchanged_feed_backs_off_up_to_limit():
+    interval = 600
+    for _ in range(50):
+        interval = next_poll_interval(
+            interval, MIN_INTERVAL, MAX_INTERVAL, changed=False
+        )
+    assert interval == MAX_INTERVAL
+
+
+def test_server_hints_are_lower_bound():
+    dates = [NOW - timedelta(minutes=i) for i in range(10)]
+    assert next_poll_interval(600, MIN_INTERVAL, MAX_INTERVAL, entry_dates=dates) == MIN_INTERVAL
+    assert (
+        next_poll_interval(600, MIN_INTERVAL, MAX_INTERVAL, entry_dates=dates, ttl=1800)
+        == 1800
+    )
+    assert (
+        next_poll_interval(600, MIN_INTERVAL, MAX_INTERVAL, changed=False, max_age=86400)
+        == MAX_INTERVAL
+    )
+
+
+def test_with_jitter_stays_within_bounds():
+    rng = random.Random(42)
+    values = [with_jitter(600, 0.1, rng) for _ in range(100)]
+    assert all(540 <= value <= 660 for value in values)
+
+
+@pytest.mark.parametrize(
+    "failures,expected_result",
+    [(0, 0), (1, 300), (2, 600), (4, 2400), (20, 86400)],
+)
+def test_failure_backoff(failures, expected_result):
+    assert failure_backoff(failures, 300, 86400) == expected_result
+
+
+def test_parse_retry_after():
+    now = datetime(2024, 12, 1, 12, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("Sun, 01 Dec 2024 12:10:00 GMT", now) == 600
+    assert parse_retry_after("Sun, 01 Dec 2024 11:00:00 GMT", now) == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_conditional_headers_use_stored_validators():
+    assert conditional_headers(None, None) == {}
+    assert conditional_headers('"v1"', "Mon, 02 Dec 2024 10:00:00 GMT") == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 02 Dec 2024 10:00:00 GMT",
+    }
+    assert conditional_headers(None, "Mon, 02 Dec 2024 10:00:00 GMT") == {
+        "If-Modified-Since": "Mon, 02 Dec 2024 10:00:00 GMT"
+    }
+
+
+def test_not_modified_response_keeps_stored_state():
+    response = FeedResponse(status=304)
+    assert compare_response("hash", response) == (True, {})
+
+
+def test_same_body_is_unchanged_but_refreshes_validators():
+    body = b"<rss/>"
+    stored_hash = FeedResponse(status=200, body=body).content_hash
+    response = FeedResponse(status=200, body=body, etag='"v2"', last_modified=None)
+    assert compare_response(stored_hash, response) == (
+        True,
+        {"etag": '"v2"', "last_modified": None},
+    )
+
+
+def test_new_body_is_changed_and_stores_hash():
+    response = FeedResponse(
+        status=200,
+        body=b"<rss>new</rss>",
+        etag='"v3"',
+        last_modified="Mon, 02 Dec 2024 10:00:00 GMT",
+    )
+    unchanged, updates = compare_response("old hash", response)
+    assert not unchanged
+    assert updates == {
+        "etag": '"v3"',
+        "last_modified": "Mon, 02 Dec 2024 10:00:00 GMT",
+        "content_hash": response.content_hash,
+    }
+    assert set(updates) == set(CACHE_VALIDATORS)
+    # Первый опрос ленты без сохранённого хэша тоже считается изменением
+    assert compare_response(None, response)[0] is False
@@ -0,0 +1,62 @@
+from uuid import uuid4
+
+from services.rss_manager.utils.poll_queue import PollQueue
+
+
+def drain(queue: PollQueue) -> list:
+    polled = []
+    while (feed_id := queue.pop_due()) is not None:
+        polled.append(feed_id)
+    return polled
+
+
+def test_feeds_are_polled_in_deadline_order(clock):
+    queue = PollQueue(clock=clock)
+    first, second = uuid4(), uuid4()
+    queue.schedule(second, 20)
+    queue.schedule(first, 10)
+    assert queue.pop_due() is None
+    assert queue.next_deadline() == 10
+    clock.now = 30
+    assert drain(queue) == [first, second]
+
+
+def test_rescheduling_replaces_previous_entry(clock):
+    queue = PollQueue(clock=clock)
+    feed_id = uuid4()
+    queue.schedule(feed_id, 10)
+    queue.schedule(feed_id, 50)
+    clock.now = 20
+    assert queue.pop_due() is None
+    clock.now = 60
+    assert drain(queue) == [feed_id]
+
+
+def test_unowned_and_reowned_feed_keeps_single_chain(clock):
+    queue = PollQueue(clock=clock)
+    feed_id = uuid4()
+    queue.schedule(feed_id, 10)
+    queue.discard(feed_id)
+    assert queue.next_deadline() is None
+    queue.schedule(feed_id, 15)
+    clock.now = 20
+    assert drain(queue) == [feed_id]
+    # После опроса лента планируется снова, и цепочка остаётся одна
+    queue.schedule(feed_id, 10)
+    assert len(queue) == 1
+    clock.now = 40
+    assert drain(queue) == [feed_id]
+
+
+def test_reowning_during_poll_does_not_duplicate_chain(clock):
+    queue = PollQueue(clock=clock)
+    feed_id = uuid4()
+    queue.schedule(feed_id, 0)
+    assert queue.pop_due() == feed_id
+    # Пока идёт опрос, лента снята с реплики и возвращена ей
+    queue.discard(feed_id)
+    queue.schedule(feed_id, 5)
+    # Завершившийся опрос назначает следующий
+    queue.schedule(feed_id, 10)
+    clock.now = 100
+    assert drain(queue) == [feed_id]
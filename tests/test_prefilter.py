@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from services.content_validator.prefilter import (
+    char_ngrams,
+    evaluate_floors,
+    hash_vector,
+    prefilter,
+)
+
+DIMENSIONS = 1024
+
+
+def test_char_ngrams_mark_word_boundaries():
+    assert char_ngrams("Ai") == [" ai", "ai ", " ai "]
+    assert char_ngrams("...") == []
+
+
+def test_hash_vector_is_normalized_and_stable():
+    vector = hash_vector("Новости машинного обучения", DIMENSIONS)
+    assert np.linalg.norm(vector) == pytest.approx(1.0)
+    assert np.array_equal(vector, hash_vector("новости машинного обучения", DIMENSIONS))
+    assert not hash_vector("", DIMENSIONS).any()
+
+
+def test_prefilter_skips_unrelated_posts():
+    post = hash_vector("Центробанк повысил ключевую ставку до 21%", DIMENSIONS)
+    preferences = np.stack(
+        [
+            hash_vector("ключевая ставка центробанка", DIMENSIONS),
+            hash_vector("футбол и хоккей", DIMENSIONS),
+            hash_vector("", DIMENSIONS),
+        ]
+    )
+    antipathy = np.stack([hash_vector("", DIMENSIONS)] * 3)
+    passed, similarities, _ = prefilter(post, preferences, antipathy, 0.1, 0.6)
+    assert passed.tolist() == [True, False, True]
+    assert similarities[0] > similarities[1]
+
+
+def test_prefilter_skips_posts_matching_antipathy():
+    post = hash_vector("Центробанк повысил ключевую ставку", DIMENSIONS)
+    preferences = np.stack([hash_vector("экономика ставка", DIMENSIONS)])
+    antipathy = np.stack([hash_vector("центробанк ключевую ставку", DIMENSIONS)])
+    passed, _, _ = prefilter(post, preferences, antipathy, 0.0, 0.6)
+    assert passed.tolist() == [False]
+
+
+def test_evaluate_floors():
+    similarities = np.array([0.01, 0.05, 0.2, 0.3])
+    ranks = np.array([10, 80, 90, 20])
+    weights = np.array([10.0, 10.0, 1.0, 1.0])
+    low, high = evaluate_floors(similarities, ranks, [0.0, 0.1], 70, weights)
+    assert low == {
+        "floor": 0.0,
+        "pairs": 4,
+        "skipped_share": 0.0,
+        "recall": 1.0,
+        "lost_relevant": 0.0,
+    }
+    assert high["skipped_share"] == pytest.approx(20 / 22)
+    assert high["recall"] == pytest.approx(1 / 11)
+    assert high["lost_relevant"] == pytest.approx(10.0)
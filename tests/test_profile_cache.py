@@ -0,0 +1,26 @@
+from services.content_validator.profiles import ProfileCache
+
+
+def test_profiles_expire_after_ttl(clock):
+    cache = ProfileCache(maxsize=10, ttl=60, clock=clock)
+    cache.put_many({1: ("ai", None)}, cache.generation)
+    assert cache.get_many([1, 2]) == {1: ("ai", None)}
+    clock.now = 61
+    assert cache.get_many([1]) == {}
+
+
+def test_least_recently_used_profile_is_evicted(clock):
+    cache = ProfileCache(maxsize=2, ttl=60, clock=clock)
+    cache.put_many({1: ("a", None), 2: ("b", None)}, cache.generation)
+    cache.get_many([1])
+    cache.put_many({3: ("c", None)}, cache.generation)
+    assert set(cache.get_many([1, 2, 3])) == {1, 3}
+
+
+def test_invalidation_discards_profiles_loaded_before_it(clock):
+    cache = ProfileCache(maxsize=10, ttl=60, clock=clock)
+    cache.put_many({1: ("old", None)}, cache.generation)
+    generation = cache.generation  # Загрузка началась до изменения профиля
+    cache.invalidate(1)
+    cache.put_many({1: ("old", None)}, generation)
+    assert cache.get_many([1]) == {}
@@ -0,0 +1,45 @@
+import pytest
+
+from services.content_validator.batching import (
+    estimate_tokens,
+    parse_batch_ranks,
+    plan_batches,
+)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcde") == 2
+
+
+@pytest.mark.parametrize(
+    "profile_tokens,budget,max_users,expected_result",
+    [
+        ([10, 10, 10, 10], 1000, 16, [[0, 1, 2, 3]]),
+        ([10, 10, 10, 10], 1000, 3, [[0, 1, 2], [3]]),
+        ([40, 40, 40], 200, 16, [[0, 1], [2]]),
+        ([500, 10], 200, 16, [[0], [1]]),
+        ([], 1000, 16, []),
+    ],
+)
+def test_plan_batches(profile_tokens, budget, max_users, expected_result):
+    assert plan_batches(100, profile_tokens, budget, max_users) == expected_result
+
+
+def test_parse_batch_ranks_orders_by_reader():
+    result = {"evaluations": [{"reader": 2, "rank": 10}, {"reader": 1, "rank": 90}]}
+    assert parse_batch_ranks(result, 2) == [90, 10]
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        None,
+        {"evaluations": [{"reader": 1, "rank": 90}]},
+        {"evaluations": [{"reader": 1, "rank": 90}, {"reader": 3, "rank": 5}]},
+        {"evaluations": [{"reader": 1, "rank": 190}, {"reader": 2, "rank": 5}]},
+        {"evaluations": [{"reader": 1, "rank": "high"}, {"reader": 2, "rank": 5}]},
+    ],
+)
+def test_parse_batch_ranks_rejects_incomplete_answers(result):
+    assert parse_batch_ranks(result, 2) is None
@@ -0,0 +1,61 @@
+import pytest
+
+from services.content_validator.rank_cache import (
+    DeliveryLog,
+    RankCache,
+    content_hash,
+    group_by_fingerprint,
+    profile_fingerprint,
+)
+
+
+def test_fingerprint_ignores_case_and_whitespace():
+    assert profile_fingerprint(" Машинное  обучение\n", None) == profile_fingerprint(
+        "машинное обучение", ""
+    )
+    assert profile_fingerprint("спорт", "политика") != profile_fingerprint(
+        "политика", "спорт"
+    )
+
+
+def test_content_hash_matches_same_article():
+    assert content_hash("Title", "Some  text") == content_hash("title", "some text")
+    assert content_hash("Title", "Some text") != content_hash("Title", "Other text")
+
+
+def test_group_by_fingerprint():
+    profiles = [("ai", None), ("sport", ""), ("AI ", ""), (None, None), ("", "")]
+    assert list(group_by_fingerprint(profiles).values()) == [[0, 2], [1], [3, 4]]
+
+
+def test_cache_key_includes_model_and_prompt_version():
+    first = RankCache(None, "model-a", "1", 60)
+    second = RankCache(None, "model-a", "2", 60)
+    assert first.key("post", "profile") != second.key("post", "profile")
+
+
+@pytest.mark.asyncio
+async def test_delivery_log_drops_repeated_message(fake_redis, clock):
+    log = DeliveryLog(fake_redis, ttl=60)
+    assert await log.claim("message:0", 1)
+    assert not await log.claim("message:0", 1)
+    assert await log.claim("message:0", 2)
+    assert await log.claim("message:1", 1)
+    clock.now = 61
+    assert await log.claim("message:0", 1)
+
+
+@pytest.mark.asyncio
+async def test_delivery_log_release_allows_retry(fake_redis):
+    log = DeliveryLog(fake_redis, ttl=60)
+    assert await log.claim("message", 1)
+    await log.release("message", 1)
+    assert await log.claim("message", 1)
+
+
+@pytest.mark.asyncio
+async def test_delivery_log_without_redis_or_message_id_allows_delivery(fake_redis):
+    assert await DeliveryLog(None, ttl=60).claim("message", 1)
+    log = DeliveryLog(fake_redis, ttl=60)
+    assert await log.claim(None, 1)
+    assert await log.claim(None, 1)
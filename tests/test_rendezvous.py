@@ -0,0 +1,22 @@
+from collections import Counter
+
+from services.rss_manager.utils.rendezvous import rendezvous_owner
+
+FEEDS = [f"feed-{i}" for i in range(3000)]
+
+
+def test_feeds_are_split_between_workers():
+    owners = Counter(rendezvous_owner(feed, ["a", "b", "c"]) for feed in FEEDS)
+    assert set(owners) == {"a", "b", "c"}
+    assert all(count > 800 for count in owners.values())
+
+
+def test_only_dead_worker_feeds_move():
+    before = {feed: rendezvous_owner(feed, ["a", "b", "c"]) for feed in FEEDS}
+    after = {feed: rendezvous_owner(feed, ["a", "b"]) for feed in FEEDS}
+    moved = {feed for feed in FEEDS if before[feed] != after[feed]}
+    assert moved == {feed for feed in FEEDS if before[feed] == "c"}
+
+
+def test_no_workers():
+    assert rendezvous_owner("feed", []) is None
@@ -0,0 +1,111 @@
+from uuid import uuid4
+
+import pytest
+
+from services.rss_manager.utils.subscriptions import SubscriberMap, subscription_items
+
+
+def test_add_remove_and_drop_feed():
+    index = SubscriberMap()
+    feed_id, other_feed = uuid4(), uuid4()
+    index.add(feed_id, 1)
+    index.add(feed_id, 2)
+    index.add(other_feed, 1)
+    assert sorted(index.get(feed_id)) == [1, 2]
+    assert index.size() == 3
+
+    index.remove(feed_id, 1)
+    index.remove(feed_id, 3)  # Неизвестный подписчик не ломает индекс
+    assert index.get(feed_id) == [2]
+    index.remove(feed_id, 2)
+    assert feed_id not in index.subscribers  # Пустые ленты не хранятся
+
+    index.drop_feed(other_feed)
+    index.drop_feed(other_feed)
+    assert index.get(other_feed) == []
+    assert index.size() == 0
+
+
+def test_apply_changes_in_order():
+    index = SubscriberMap()
+    feed_id = uuid4()
+    index.apply_changes([("add", feed_id, 1), ("add", feed_id, 2), ("remove", feed_id, 1)])
+    assert index.get(feed_id) == [2]
+    index.apply_changes([("drop", feed_id, None), ("add", feed_id, 3)])
+    assert index.get(feed_id) == [3]
+
+
+def test_changes_during_reload_are_replayed_over_snapshot():
+    index = SubscriberMap()
+    kept, removed, added, dropped = uuid4(), uuid4(), uuid4(), uuid4()
+    index.begin_reload()
+    # Выборка сделана до этих изменений и их не содержит
+    index.add(added, 1)
+    index.remove(removed, 2)
+    index.drop_feed(dropped)
+    index.finish_reload([(kept, 1), (removed, 2), (removed, 3), (dropped, 4)])
+
+    assert index.get(kept) == [1]
+    assert index.get(added) == [1]
+    assert index.get(removed) == [3]
+    assert index.get(dropped) == []
+    assert index.pending is None
+
+
+def test_reload_without_changes_replaces_index():
+    index = SubscriberMap()
+    stale, fresh = uuid4(), uuid4()
+    index.add(stale, 1)
+    index.begin_reload()
+    index.finish_reload([(fresh, 2)])
+    assert index.get(stale) == []
+    assert index.get(fresh) == [2]
+
+
+def test_aborted_reload_keeps_index_and_stops_recording():
+    index = SubscriberMap()
+    feed_id = uuid4()
+    index.add(feed_id, 1)
+    index.begin_reload()
+    index.add(feed_id, 2)
+    index.abort_reload()
+    index.add(feed_id, 3)
+    assert index.pending is None
+    assert sorted(index.get(feed_id)) == [1, 2, 3]
+
+
+def test_legacy_single_subscription_message():
+    data = {"user_id": 1, "feed_url": "https://example.com/rss", "correlation_id": "c"}
+    assert subscription_items(data) == [(1, "https://example.com/rss")]
+
+
+def test_batched_message_without_repeats():
+    data = {
+        "items": [
+            {"user_id": 1, "feed_url": "https://example.com/rss"},
+            {"user_id": 2, "feed_url": "https://example.com/rss"},
+            {"user_id": 1, "feed_url": "https://example.com/rss"},
+        ],
+        "correlation_id": "c",
+    }
+    assert subscription_items(data) == [
+        (1, "https://example.com/rss"),
+        (2, "https://example.com/rss"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"correlation_id": "c"},
+        {"items": [], "correlation_id": "c"},
+        {"items": "https://example.com/rss"},
+        {"items": [{"user_id": 1}]},
+        {"items": [{"user_id": "1", "feed_url": "https://example.com/rss"}]},
+        {"items": [{"user_id": 1, "feed_url": ""}]},
+        {"items": [{"user_id": 1, "feed_url": "https://example.com/rss"}, None]},
+    ],
+)
+def test_malformed_message_is_rejected(data):
+    with pytest.raises(ValueError):
+        subscription_items(data)
@@ -0,0 +1,116 @@
+import hashlib
+import hmac
+from datetime import datetime, timedelta
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from services.rss_manager.utils.feed_parser import parse_feed
+from services.rss_manager.utils.websub import (
+    accepts_secret,
+    callback_url,
+    lease_expires_at,
+    needs_renewal,
+    request_subscription,
+    verify_signature,
+)
+
+NOW = datetime(2024, 1, 1)
+
+ATOM_WITH_HUB = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Example</title>
+  <link rel="hub" href="https://hub.example.com/"/>
+  <link rel="self" href="https://example.com/feed.atom"/>
+  <entry><id>1</id><title>Post</title><link href="https://example.com/1"/></entry>
+</feed>
+"""
+
+
+def sign(secret: str, body: bytes, algorithm: str = "sha256") -> str:
+    digest = hmac.new(secret.encode(), body, getattr(hashlib, algorithm)).hexdigest()
+    return f"{algorithm}={digest}"
+
+
+def test_hub_links_are_discovered():
+    parsed = parse_feed(ATOM_WITH_HUB)
+    assert parsed.hub_url == "https://hub.example.com/"
+    assert parsed.self_url == "https://example.com/feed.atom"
+    assert len(parsed.entries) == 1
+
+
+def test_feed_without_hub():
+    parsed = parse_feed(b"<rss><channel><title>x</title></channel></rss>")
+    assert parsed.hub_url is None
+
+
+@pytest.mark.parametrize("algorithm", ["sha1", "sha256", "sha512"])
+def test_valid_signature(algorithm):
+    body = b"<feed/>"
+    assert verify_signature("secret", body, sign("secret", body, algorithm))
+
+
+def test_invalid_signature():
+    body = b"<feed/>"
+    assert not verify_signature("secret", body, sign("other", body))
+    assert not verify_signature("secret", body, None)
+    assert not verify_signature(None, body, sign("secret", body))
+    assert not verify_signature("secret", body, "md5=abc")
+
+
+def test_lease_expiry():
+    assert lease_expires_at(NOW, "3600", 60) == NOW + timedelta(hours=1)
+    assert lease_expires_at(NOW, None, 60) == NOW + timedelta(minutes=1)
+    assert lease_expires_at(NOW, "junk", 60) == NOW + timedelta(minutes=1)
+
+
+def test_renewal_before_expiry():
+    assert needs_renewal(None, NOW, 3600)
+    assert needs_renewal(NOW + timedelta(minutes=30), NOW, 3600)
+    assert not needs_renewal(NOW + timedelta(days=2), NOW, 3600)
+
+
+def test_callback_url():
+    assert callback_url("https://iq.example.com/", "abc") == (
+        "https://iq.example.com/websub/abc"
+    )
+
+
+def test_secret_is_sent_only_over_https():
+    assert accepts_secret("https://hub.example.com/")
+    assert accepts_secret("HTTPS://hub.example.com/")
+    assert not accepts_secret("http://hub.example.com/")
+
+
+@pytest.mark.asyncio
+async def test_subscription_request_to_stand_in_hub():
+    requests = []
+
+    async def hub(request: web.Request) -> web.Response:
+        requests.append(dict(await request.post()))
+        return web.Response(status=202)
+
+    app = web.Application()
+    app.router.add_post("/", hub)
+    async with TestServer(app) as server, aiohttp.ClientSession() as session:
+        accepted = await request_subscription(
+            session,
+            str(server.make_url("/")),
+            "https://example.com/feed.atom",
+            "https://iq.example.com/websub/abc",
+            secret="secret",
+            lease_seconds=600,
+        )
+
+    assert accepted
+    assert requests == [
+        {
+            "hub.mode": "subscribe",
+            "hub.topic": "https://example.com/feed.atom",
+            "hub.callback": "https://iq.example.com/websub/abc",
+            # Хаб доступен по http, поэтому секрет ему не передаётся
+            "hub.lease_seconds": "600",
+        }
+    ]